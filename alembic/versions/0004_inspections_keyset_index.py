@@ -0,0 +1,34 @@
+"""add composite (created_at, id) index for keyset pagination of inspections
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # build without blocking writers on the (large) inspections table
+        with op.get_context().autocommit_block():
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inspections_created_at_id '
+                'ON inspections (created_at, id)'
+            )
+    elif not _index_exists('inspections', 'ix_inspections_created_at_id'):
+        op.create_index('ix_inspections_created_at_id', 'inspections', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_inspections_created_at_id', table_name='inspections')
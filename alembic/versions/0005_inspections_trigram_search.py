@@ -0,0 +1,38 @@
+"""add pg_trgm GIN indexes backing the inspections search box
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TRGM_INDEXES = {
+    'ix_inspections_id_trgm': 'id',
+    'ix_inspections_batch_id_trgm': 'batch_id',
+    'ix_inspections_operator_id_trgm': 'operator_id',
+}
+
+
+def upgrade():
+    # trigram indexes are PostgreSQL-only; other dialects keep the plain ILIKE scan
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, column in TRGM_INDEXES.items():
+            op.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+                f'ON inspections USING gin ({column} gin_trgm_ops)'
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name in TRGM_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
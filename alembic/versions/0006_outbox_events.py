@@ -0,0 +1,30 @@
+"""add outbox_events table for transactional event publishing
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if inspect(op.get_bind()).has_table('outbox_events'):
+        return
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer, 'sqlite'), primary_key=True, autoincrement=True),
+        sa.Column('queue', sa.String(128), nullable=False, server_default='worker:queue'),
+        sa.Column('item', sa.Text, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('outbox_events')
@@ -0,0 +1,33 @@
+"""index inspection_defects.inspection_id
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inspection_defects_inspection_id '
+                'ON inspection_defects (inspection_id)'
+            )
+    elif not _index_exists('inspection_defects', 'ix_inspection_defects_inspection_id'):
+        op.create_index('ix_inspection_defects_inspection_id', 'inspection_defects', ['inspection_id'])
+
+
+def downgrade():
+    op.drop_index('ix_inspection_defects_inspection_id', table_name='inspection_defects')
@@ -0,0 +1,32 @@
+"""add daily_inspection_rollup table
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if inspect(op.get_bind()).has_table('daily_inspection_rollup'):
+        return
+    op.create_table(
+        'daily_inspection_rollup',
+        sa.Column('day', sa.Date, primary_key=True),
+        sa.Column('status', sa.String(32), primary_key=True),
+        sa.Column('product_id', sa.String(64), primary_key=True, server_default=''),
+        sa.Column('inspection_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('defect_sum', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('daily_inspection_rollup')
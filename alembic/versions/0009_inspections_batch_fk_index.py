@@ -0,0 +1,33 @@
+"""index inspections.batch_id_fk for batch-scoped stats
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inspections_batch_id_fk '
+                'ON inspections (batch_id_fk)'
+            )
+    elif not _index_exists('inspections', 'ix_inspections_batch_id_fk'):
+        op.create_index('ix_inspections_batch_id_fk', 'inspections', ['batch_id_fk'])
+
+
+def downgrade():
+    op.drop_index('ix_inspections_batch_id_fk', table_name='inspections')
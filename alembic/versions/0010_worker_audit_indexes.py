@@ -0,0 +1,42 @@
+"""add keyset/filter indexes on worker_audit
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_worker_audit_created_at_id': ['created_at', 'id'],
+    'ix_worker_audit_event_type_created_at_id': ['event_type', 'created_at', 'id'],
+    'ix_worker_audit_inspection_id_created_at_id': ['inspection_id', 'created_at', 'id'],
+    'ix_worker_audit_worker_id_created_at_id': ['worker_id', 'created_at', 'id'],
+}
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # worker_audit grows without bound; build without blocking the worker
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES.items():
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON worker_audit ({', '.join(columns)})")
+    else:
+        for name, columns in INDEXES.items():
+            if not _index_exists('worker_audit', name):
+                op.create_index(name, 'worker_audit', columns)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name='worker_audit')
@@ -0,0 +1,54 @@
+"""add inspections.finalized_at, per-operator index and operator_scorecards
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'finalized_at' not in [c['name'] for c in inspect(bind).get_columns('inspections')]:
+        op.add_column('inspections', sa.Column('finalized_at', sa.DateTime(timezone=True), nullable=True))
+    if not inspect(bind).has_table('operator_scorecards'):
+        op.create_table(
+            'operator_scorecards',
+            sa.Column('operator_id', sa.String(128), primary_key=True),
+            sa.Column('window_days', sa.Integer, primary_key=True),
+            sa.Column('inspections', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('shifts', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('passes', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('defect_sum', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('finalized', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('seconds_to_final', sa.Float, nullable=False, server_default='0'),
+            sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index('ix_operator_scorecards_window_days', 'operator_scorecards', ['window_days'])
+    if bind.dialect.name == 'postgresql':
+        # inspections is large and hot; build without blocking writes
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inspections_operator_id_created_at "
+                "ON inspections (operator_id, created_at)"
+            )
+    elif not _index_exists('inspections', 'ix_inspections_operator_id_created_at'):
+        op.create_index('ix_inspections_operator_id_created_at', 'inspections', ['operator_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_inspections_operator_id_created_at', table_name='inspections')
+    op.drop_table('operator_scorecards')
+    op.drop_column('inspections', 'finalized_at')
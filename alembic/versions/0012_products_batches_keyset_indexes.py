@@ -0,0 +1,40 @@
+"""add keyset indexes for product and batch listings
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_products_name_id': ('products', ['name', 'id']),
+    'ix_batches_created_at_id': ('batches', ['created_at', 'id']),
+    'ix_batches_product_id_created_at_id': ('batches', ['product_id', 'created_at', 'id']),
+}
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, (table, columns) in INDEXES.items():
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    else:
+        for name, (table, columns) in INDEXES.items():
+            if not _index_exists(table, name):
+                op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, (table, _) in INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,39 @@
+"""index inspections.operator_id_fk; drop the legacy operator_id index
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # inspections is large and hot; build without blocking writes
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_inspections_operator_id_fk_created_at "
+                "ON inspections (operator_id_fk, created_at)"
+            )
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_inspections_operator_id_created_at")
+    else:
+        if not _index_exists('inspections', 'ix_inspections_operator_id_fk_created_at'):
+            op.create_index('ix_inspections_operator_id_fk_created_at', 'inspections', ['operator_id_fk', 'created_at'])
+        if _index_exists('inspections', 'ix_inspections_operator_id_created_at'):
+            op.drop_index('ix_inspections_operator_id_created_at', table_name='inspections')
+
+
+def downgrade():
+    op.create_index('ix_inspections_operator_id_created_at', 'inspections', ['operator_id', 'created_at'])
+    op.drop_index('ix_inspections_operator_id_fk_created_at', table_name='inspections')
@@ -0,0 +1,64 @@
+"""one active signature per (inspection, role): partial unique index
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+# the old check-then-insert could race; keep the earliest active signature
+# per role and revoke the rest so the unique index can be built
+REVOKE_DUPLICATES = """
+    UPDATE signatures SET revoked = true, revoked_at = CURRENT_TIMESTAMP, revoked_by = 'system:duplicate'
+    WHERE NOT revoked AND EXISTS (
+        SELECT 1 FROM signatures s
+        WHERE s.inspection_id = signatures.inspection_id
+          AND s.signer_role = signatures.signer_role
+          AND NOT s.revoked
+          AND s.id < signatures.id
+    )
+"""
+
+
+# NULL if the index does not exist; false if a failed CONCURRENTLY build left it INVALID
+INDEX_VALID = sa.text("""
+    SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = 'uq_signatures_active_role'
+""")
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    op.execute(REVOKE_DUPLICATES)
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            bind = op.get_bind()
+            # a duplicate signed between the revoke above and the build fails
+            # the build and leaves an INVALID index, which IF NOT EXISTS would
+            # skip on the next run: drop it so a re-run revokes and rebuilds
+            if bind.execute(INDEX_VALID).scalar() is False:
+                op.execute("DROP INDEX CONCURRENTLY uq_signatures_active_role")
+            op.execute(
+                "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_signatures_active_role "
+                "ON signatures (inspection_id, signer_role) WHERE NOT revoked"
+            )
+            if not bind.execute(INDEX_VALID).scalar():
+                raise RuntimeError('uq_signatures_active_role is not valid; re-run the migration')
+    elif not _index_exists('signatures', 'uq_signatures_active_role'):
+        op.create_index('uq_signatures_active_role', 'signatures', ['inspection_id', 'signer_role'],
+                        unique=True, sqlite_where=sa.text('NOT revoked'))
+
+
+def downgrade():
+    op.drop_index('uq_signatures_active_role', table_name='signatures')
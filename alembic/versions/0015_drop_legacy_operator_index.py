@@ -0,0 +1,36 @@
+"""drop the legacy inspections (operator_id, created_at) index wherever it remains
+
+0011 built it and 0013 drops it, but databases created from the startup DDL
+or from an interim copy of 0011/0013 can still carry it. Per-operator reads
+go through ix_inspections_operator_id_fk_created_at (0013).
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-18
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def _index_exists(table: str, name: str) -> bool:
+    bind = op.get_bind()
+    return name in [ix['name'] for ix in inspect(bind).get_indexes(table)]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # inspections is large and hot; drop without blocking writes
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_inspections_operator_id_created_at")
+    elif _index_exists('inspections', 'ix_inspections_operator_id_created_at'):
+        op.drop_index('ix_inspections_operator_id_created_at', table_name='inspections')
+
+
+def downgrade():
+    # 0013's downgrade recreates the index; nothing to restore at this step
+    pass
@@ -0,0 +1,23 @@
+"""add outbox_events.txid, the writing transaction's id
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'txid' not in [c['name'] for c in inspect(op.get_bind()).get_columns('outbox_events')]:
+        op.add_column('outbox_events', sa.Column('txid', sa.BigInteger, nullable=True))
+
+
+def downgrade():
+    op.drop_column('outbox_events', 'txid')
@@ -0,0 +1,31 @@
+"""add rollup_state, marking when the daily rollup has been fully built
+
+Until its row exists the dashboard reads inspections directly; the worker
+builds the rollup and writes the row on its first start (see app/rollup.py).
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if inspect(op.get_bind()).has_table('rollup_state'):
+        return
+    op.create_table(
+        'rollup_state',
+        sa.Column('name', sa.String(64), primary_key=True),
+        sa.Column('populated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_state')
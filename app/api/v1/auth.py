@@ -4,7 +4,7 @@ from typing import Optional, List
 from sqlalchemy import select
 from app.db import get_session
 from app.models.orm_models import User
-import uuid
+from app.ids import new_id
 import hashlib
 import hmac
 import os
@@ -158,7 +158,7 @@ def signup(req: SignupRequest):
             if email_exists:
                 raise HTTPException(409, "Email already registered")
         user = User(
-            id=f"usr-{uuid.uuid4().hex[:12]}",
+            id=new_id('usr'),
             username=req.username,
             email=req.email,
             hashed_password=_hash_password(req.password),
@@ -1,12 +1,28 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List
-from sqlalchemy import select
+from pydantic import BaseModel, Field
+from typing import Dict, NamedTuple, Optional, List
+from collections import defaultdict
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from app.db import get_session
+from app.defect_counts import apply_deltas
+from app import outbox
 from app.models.orm_models import DefectType, InspectionDefect, Inspection
+from app.redis_client import get_redis, redis_health
+import logging
+import os
+import threading
+import time
 import uuid
+from app.ids import new_id
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+CATALOGUE_CHANNEL = 'defects:catalogue'
+MAX_BULK_ITEMS = 500
+# upper bound on staleness if an invalidation message is missed (Redis down)
+CATALOGUE_TTL = float(os.getenv('DEFECT_CATALOGUE_TTL', '300'))
 
 
 class DefectTypeIn(BaseModel):
@@ -27,10 +43,19 @@ class DefectTypeOut(BaseModel):
 
 class AttachDefectIn(BaseModel):
     defect_type_id: str
-    quantity: int = 1
+    # removals go through DELETE, which subtracts the stored quantity
+    quantity: int = Field(1, gt=0)
     notes: Optional[str] = None
 
 
+class BulkAttachItem(AttachDefectIn):
+    inspection_id: str
+
+
+class BulkAttachDefectIn(BaseModel):
+    items: List[BulkAttachItem]
+
+
 class InspectionDefectOut(BaseModel):
     id: int
     defect_type_id: str
@@ -42,16 +67,128 @@ class InspectionDefectOut(BaseModel):
     created_at: Optional[str]
 
 
+# ── Catalogue cache ───────────────────────────────────────────────────────
+
+class _Snapshot(NamedTuple):
+    ordered: List[DefectTypeOut]
+    by_id: Dict[str, DefectTypeOut]
+    by_code: Dict[str, DefectTypeOut]
+
+
+class DefectCatalogue:
+    """Read-through, in-process copy of the defect_types table.
+
+    The whole catalogue (a few dozen rows, changed a few times a month) is
+    loaded in one query on first use and served from memory by id and code.
+    Writers call `publish_invalidation()` after commit; every replica's
+    listener thread drops its copy on the message, and the next read reloads.
+    Entries also expire after CATALOGUE_TTL so a missed message is bounded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._loaded_at: Optional[float] = None
+        self._snapshot = _Snapshot([], {}, {})
+
+    def _current(self) -> _Snapshot:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < CATALOGUE_TTL:
+            return self._snapshot
+        with self._lock:
+            generation = self._generation
+        session = get_session()
+        try:
+            rows = session.execute(select(DefectType).order_by(DefectType.name)).scalars().all()
+            ordered = [_dt_out(r) for r in rows]
+        finally:
+            session.close()
+        snapshot = _Snapshot(ordered, {d.id: d for d in ordered}, {d.code: d for d in ordered if d.code})
+        with self._lock:
+            # an invalidation that raced the load may make it stale: serve it
+            # to this caller but don't keep it
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._loaded_at = time.monotonic()
+        return snapshot
+
+    def all(self) -> List[DefectTypeOut]:
+        return list(self._current().ordered)
+
+    def by_id(self, defect_type_id: str) -> Optional[DefectTypeOut]:
+        return self._current().by_id.get(defect_type_id)
+
+    def by_code(self, code: str) -> Optional[DefectTypeOut]:
+        return self._current().by_code.get(code)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+            self._snapshot = _Snapshot([], {}, {})
+
+    def publish_invalidation(self):
+        """Drop the local copy and tell the other replicas to drop theirs."""
+        self.invalidate()
+        r = get_redis()
+        if r is None:
+            return
+        try:
+            r.publish(CATALOGUE_CHANNEL, 'invalidate')
+            redis_health.record_success()
+        except Exception as exc:
+            redis_health.record_failure(exc)
+
+
+catalogue = DefectCatalogue()
+
+_listener: Optional[threading.Thread] = None
+_listener_stop = threading.Event()
+
+
+def _listen_for_invalidations():
+    while not _listener_stop.is_set():
+        pubsub = None
+        try:
+            pubsub = get_redis(ignore_health=True).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CATALOGUE_CHANNEL)
+            # anything published while we were (re)connecting was missed
+            catalogue.invalidate()
+            while not _listener_stop.is_set():
+                if pubsub.get_message(timeout=1.0):
+                    catalogue.invalidate()
+        except Exception as exc:
+            logger.warning('Defect catalogue listener disconnected: %s', exc)
+            catalogue.invalidate()
+            _listener_stop.wait(5)
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+def start_catalogue_listener():
+    global _listener
+    if _listener is None or not _listener.is_alive():
+        _listener_stop.clear()
+        _listener = threading.Thread(target=_listen_for_invalidations, name='defect-catalogue', daemon=True)
+        _listener.start()
+
+
+def stop_catalogue_listener():
+    global _listener
+    _listener_stop.set()
+    if _listener is not None:
+        _listener.join(timeout=2)
+        _listener = None
+
+
 # ── Defect Types (catalogue) ──────────────────────────────────────────────
 
 @router.get("/types", response_model=List[DefectTypeOut])
 def list_defect_types():
-    session = get_session()
-    try:
-        rows = session.execute(select(DefectType).order_by(DefectType.name)).scalars().all()
-        return [_dt_out(r) for r in rows]
-    finally:
-        session.close()
+    return catalogue.all()
 
 
 @router.post("/types", response_model=DefectTypeOut, status_code=201)
@@ -59,13 +196,14 @@ def create_defect_type(req: DefectTypeIn):
     session = get_session()
     try:
         dt = DefectType(
-            id=f"dt-{uuid.uuid4().hex[:12]}",
+            id=new_id('dt'),
             code=req.code or f"DT-{uuid.uuid4().hex[:6].upper()}", name=req.name,
             description=req.description, severity=req.severity,
         )
         session.add(dt)
         session.commit()
         session.refresh(dt)
+        catalogue.publish_invalidation()
         return _dt_out(dt)
     finally:
         session.close()
@@ -80,6 +218,7 @@ def delete_defect_type(defect_type_id: str):
             raise HTTPException(404, "Defect type not found")
         session.delete(dt)
         session.commit()
+        catalogue.publish_invalidation()
     finally:
         session.close()
 
@@ -93,21 +232,21 @@ def list_inspection_defects(inspection_id: str):
         rows = session.execute(
             select(InspectionDefect).where(InspectionDefect.inspection_id == inspection_id)
         ).scalars().all()
-        return [_id_out(r) for r in rows]
+        return [_id_out(r, catalogue.by_id(r.defect_type_id)) for r in rows]
     finally:
         session.close()
 
 
 @router.post("/inspection/{inspection_id}", response_model=InspectionDefectOut, status_code=201)
 def attach_defect(inspection_id: str, req: AttachDefectIn):
+    dt = catalogue.by_id(req.defect_type_id)
+    if not dt:
+        raise HTTPException(404, "Defect type not found")
     session = get_session()
     try:
-        ins = session.get(Inspection, inspection_id)
-        if not ins:
+        # the increment doubles as the existence check (0 rows -> unknown id)
+        if not apply_deltas(session, {inspection_id: req.quantity}):
             raise HTTPException(404, "Inspection not found")
-        dt = session.get(DefectType, req.defect_type_id)
-        if not dt:
-            raise HTTPException(404, "Defect type not found")
         id_row = InspectionDefect(
             inspection_id=inspection_id,
             defect_type_id=req.defect_type_id,
@@ -115,11 +254,59 @@ def attach_defect(inspection_id: str, req: AttachDefectIn):
             notes=req.notes,
         )
         session.add(id_row)
-        # update defect_count on inspection
-        ins.defect_count = (ins.defect_count or 0) + req.quantity
-        session.commit()
+        outbox.enqueue(session, [_defects_event(inspection_id, req.quantity)])
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            _raise_attach_conflict(session, {req.defect_type_id})
         session.refresh(id_row)
-        return _id_out(id_row)
+        return _id_out(id_row, dt)
+    finally:
+        session.close()
+
+
+@router.post("/bulk", response_model=List[InspectionDefectOut], status_code=201)
+def bulk_attach_defects(req: BulkAttachDefectIn):
+    """Attach many defects across one or many inspections, all or nothing.
+
+    One in-place increment per touched inspection plus one multi-row INSERT
+    for the attachments, in a single transaction. The increments come first:
+    they lock the inspections in id order (see apply_deltas), so the
+    INSERT's foreign key checks, made in request order, only touch rows this
+    transaction already holds.
+    """
+    if not req.items:
+        return []
+    if len(req.items) > MAX_BULK_ITEMS:
+        raise HTTPException(422, f"at most {MAX_BULK_ITEMS} items per request")
+    unknown_types = sorted({i.defect_type_id for i in req.items if not catalogue.by_id(i.defect_type_id)})
+    if unknown_types:
+        raise HTTPException(404, f"Defect type(s) not found: {', '.join(unknown_types)}")
+    deltas = defaultdict(int)
+    for item in req.items:
+        deltas[item.inspection_id] += item.quantity
+    session = get_session()
+    try:
+        found = set(session.execute(
+            select(Inspection.id).where(Inspection.id.in_(list(deltas)))
+        ).scalars())
+        missing = sorted(set(deltas) - found)
+        if missing:
+            raise HTTPException(404, f"Inspection(s) not found: {', '.join(missing)}")
+        apply_deltas(session, deltas)
+        try:
+            rows = session.execute(
+                insert(InspectionDefect).returning(InspectionDefect, sort_by_parameter_order=True),
+                [item.model_dump() for item in req.items],
+            ).scalars().all()
+        except IntegrityError:
+            session.rollback()
+            _raise_attach_conflict(session, {i.defect_type_id for i in req.items})
+        outbox.enqueue(session, [_defects_event(ins_id, delta) for ins_id, delta in sorted(deltas.items())])
+        out = [_id_out(r, catalogue.by_id(r.defect_type_id)) for r in rows]
+        session.commit()
+        return out
     finally:
         session.close()
 
@@ -131,15 +318,35 @@ def remove_defect(inspection_id: str, defect_id: int):
         id_row = session.get(InspectionDefect, defect_id)
         if not id_row or id_row.inspection_id != inspection_id:
             raise HTTPException(404, "Defect record not found")
-        ins = session.get(Inspection, inspection_id)
-        if ins:
-            ins.defect_count = max(0, (ins.defect_count or 0) - id_row.quantity)
+        apply_deltas(session, {inspection_id: -(id_row.quantity or 0)})
+        outbox.enqueue(session, [_defects_event(inspection_id, -(id_row.quantity or 0))])
         session.delete(id_row)
         session.commit()
     finally:
         session.close()
 
 
+def _raise_attach_conflict(session, defect_type_ids):
+    """Turn an attach's foreign key violation into a client error.
+
+    The catalogue can be stale by up to CATALOGUE_TTL (or until another
+    replica's invalidation arrives), so a defect type deleted meanwhile
+    passes the up-front check and only fails on insert.
+    """
+    catalogue.invalidate()
+    existing = set(session.execute(
+        select(DefectType.id).where(DefectType.id.in_(defect_type_ids))
+    ).scalars())
+    gone = sorted(set(defect_type_ids) - existing)
+    if gone:
+        raise HTTPException(404, f"Defect type(s) not found: {', '.join(gone)}")
+    raise HTTPException(409, "Inspection or defect type changed concurrently; retry")
+
+
+def _defects_event(inspection_id: str, delta: int) -> str:
+    return outbox.event('inspection.defects_changed', id=inspection_id, delta=delta)
+
+
 def _dt_out(r: DefectType) -> DefectTypeOut:
     return DefectTypeOut(
         id=r.id, code=r.code, name=r.name,
@@ -148,13 +355,15 @@ def _dt_out(r: DefectType) -> DefectTypeOut:
     )
 
 
-def _id_out(r: InspectionDefect) -> InspectionDefectOut:
+def _id_out(r: InspectionDefect, dt=None) -> InspectionDefectOut:
+    # `dt` (a cached DefectTypeOut) avoids lazy-loading r.defect_type
+    dt = dt or r.defect_type
     return InspectionDefectOut(
         id=r.id,
         defect_type_id=r.defect_type_id,
-        defect_code=r.defect_type.code if r.defect_type else "",
-        defect_name=r.defect_type.name if r.defect_type else "",
-        severity=r.defect_type.severity if r.defect_type else "minor",
+        defect_code=dt.code if dt else "",
+        defect_name=dt.name if dt else "",
+        severity=dt.severity if dt else "minor",
         quantity=r.quantity,
         notes=r.notes,
         created_at=r.created_at.isoformat() if r.created_at else None,
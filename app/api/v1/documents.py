@@ -3,10 +3,12 @@ from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy import select
-from app.db import get_session
+from sqlalchemy.orm import selectinload
+from app.db import get_session, get_async_session
 from app.models.orm_models import SignoffDocument, SignRequest
 from app.api.v1.auth import decode_token
-import uuid
+from app import batch_quality
+from app.ids import new_id
 import os
 import shutil
 from datetime import datetime, timezone
@@ -103,24 +105,22 @@ class RejectActionIn(BaseModel):
 
 @router.get("", response_model=List[DocumentOut])
 @router.get("/", response_model=List[DocumentOut])
-def list_documents(
+async def list_documents(
     status: Optional[str] = Query(None),
     batch_id: Optional[str] = Query(None),
     limit: int = Query(50, le=200),
     authorization: Optional[str] = Header(None),
 ):
     _require_auth(authorization)
-    session = get_session()
-    try:
-        q = select(SignoffDocument).order_by(SignoffDocument.created_at.desc()).limit(limit)
-        if status:
-            q = q.where(SignoffDocument.status == status)
-        if batch_id:
-            q = q.where(SignoffDocument.batch_id == batch_id)
-        rows = session.execute(q).scalars().all()
-        return [_doc_out(r) for r in rows]
-    finally:
-        session.close()
+    q = (select(SignoffDocument).options(selectinload(SignoffDocument.sign_requests))
+         .order_by(SignoffDocument.created_at.desc()).limit(limit))
+    if status:
+        q = q.where(SignoffDocument.status == status)
+    if batch_id:
+        q = q.where(SignoffDocument.batch_id == batch_id)
+    async with get_async_session() as session:
+        rows = (await session.scalars(q)).all()
+    return [_doc_out(r) for r in rows]
 
 
 @router.post("", response_model=DocumentOut, status_code=201)
@@ -129,7 +129,7 @@ def create_document(req: DocumentIn, authorization: Optional[str] = Header(None)
     user = _require_auth(authorization)
     session = get_session()
     try:
-        doc_id = f"doc-{uuid.uuid4().hex[:12]}"
+        doc_id = new_id('doc')
         doc = SignoffDocument(
             id=doc_id,
             title=req.title,
@@ -144,7 +144,7 @@ def create_document(req: DocumentIn, authorization: Optional[str] = Header(None)
         session.flush()
         for s in req.signers:
             sr = SignRequest(
-                id=f"sr-{uuid.uuid4().hex[:12]}",
+                id=new_id('sr'),
                 document_id=doc_id,
                 assigned_to_id=s.assigned_to_id,
                 assigned_to_name=s.assigned_to_name,
@@ -160,6 +160,7 @@ def create_document(req: DocumentIn, authorization: Optional[str] = Header(None)
             )
             session.add(sr)
         session.commit()
+        batch_quality.touch_document(session, doc)
         session.refresh(doc)
         return _doc_out(doc)
     finally:
@@ -203,16 +204,14 @@ def my_tasks(authorization: Optional[str] = Header(None)):
 
 
 @router.get("/{document_id}", response_model=DocumentOut)
-def get_document(document_id: str, authorization: Optional[str] = Header(None)):
+async def get_document(document_id: str, authorization: Optional[str] = Header(None)):
     _require_auth(authorization)
-    session = get_session()
-    try:
-        doc = session.get(SignoffDocument, document_id)
-        if not doc:
-            raise HTTPException(404, "Document not found")
-        return _doc_out(doc)
-    finally:
-        session.close()
+    async with get_async_session() as session:
+        doc = await session.get(SignoffDocument, document_id,
+                                options=[selectinload(SignoffDocument.sign_requests)])
+    if not doc:
+        raise HTTPException(404, "Document not found")
+    return _doc_out(doc)
 
 
 @router.post("/{document_id}/sign-requests", status_code=201)
@@ -224,7 +223,7 @@ def add_signer(document_id: str, req: SignerIn, authorization: Optional[str] = H
         if not doc:
             raise HTTPException(404, "Document not found")
         sr = SignRequest(
-            id=f"sr-{uuid.uuid4().hex[:12]}",
+            id=new_id('sr'),
             document_id=document_id,
             assigned_to_id=req.assigned_to_id,
             assigned_to_name=req.assigned_to_name,
@@ -237,6 +236,7 @@ def add_signer(document_id: str, req: SignerIn, authorization: Optional[str] = H
         if doc.status == 'draft':
             doc.status = 'in_progress'
         session.commit()
+        batch_quality.touch_document(session, doc)
         session.refresh(sr)
         return _sr_out(sr)
     finally:
@@ -268,6 +268,7 @@ def sign_document(document_id: str, request_id: str, req: SignActionIn,
         elif any(r.status == 'rejected' for r in all_requests):
             doc.status = 'rejected'
         session.commit()
+        batch_quality.touch_document(session, doc)
         return {"message": "Document signed successfully", "sign_request": _sr_out(sr), "document_status": doc.status}
     finally:
         session.close()
@@ -288,6 +289,7 @@ def reject_sign(document_id: str, request_id: str, req: RejectActionIn,
         doc = session.get(SignoffDocument, document_id)
         doc.status = 'rejected'
         session.commit()
+        batch_quality.touch_document(session, doc)
         return {"message": "Signing rejected", "sign_request": _sr_out(sr)}
     finally:
         session.close()
@@ -316,6 +318,7 @@ async def upload_pdf(
         doc.pdf_path = dest
         doc.pdf_filename = file.filename
         session.commit()
+        batch_quality.touch_document(session, doc)
         return {"message": "PDF uploaded", "pdf_filename": file.filename}
     finally:
         session.close()
@@ -357,6 +360,7 @@ def update_placeholder(
         sr.placeholder_w = req.placeholder_w if req.placeholder_w is not None else sr.placeholder_w
         sr.placeholder_h = req.placeholder_h if req.placeholder_h is not None else sr.placeholder_h
         session.commit()
+        batch_quality.touch_document(session, sr.document)
         return _sr_out(sr)
     finally:
         session.close()
@@ -372,6 +376,7 @@ def delete_document(document_id: str, authorization: Optional[str] = Header(None
             raise HTTPException(404, "Document not found")
         session.delete(doc)
         session.commit()
+        batch_quality.touch_document(session, doc)
     finally:
         session.close()
 
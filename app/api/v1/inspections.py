@@ -1,16 +1,37 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
-from app.db import get_session
-from app.models.orm_models import Inspection as InspectionORM
-from sqlalchemy import select, or_
-import uuid
-import os
+from app.db import get_session, get_async_session
+from app.models.orm_models import Inspection as InspectionORM, InspectionDefect, Signature
+from app.api.v1.defects import InspectionDefectOut, _id_out
+from app.api.v1.signatures import SignatureOut, _sig_out
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_cursor_datetime
+from app import outbox
+from app.inspection_fks import (
+    batch_filter, batch_ref, operator_filter, operator_ref, resolve_batches, resolve_operators,
+)
+from app.rollup import day_of
+from app.scorecards import FINAL_STATUSES
+from app.streaming import MEDIA_TYPES, csv_header, encoder_for, stream_rows
+from datetime import datetime, timezone
+from sqlalchemy import func, select, insert, update, or_, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+from app.ids import new_id
 
 router = APIRouter()
 
 VALID_STATUSES = {'pending', 'in_review', 'pass', 'fail', 'conditional_pass'}
 
+MAX_BULK_ITEMS = 500
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = [
+    InspectionORM.id, InspectionORM.batch_id, InspectionORM.operator_id,
+    InspectionORM.status, InspectionORM.defect_count, InspectionORM.severity,
+    InspectionORM.notes, InspectionORM.created_at, InspectionORM.updated_at,
+]
+
 
 class InspectionOut(BaseModel):
     id: str
@@ -33,79 +54,233 @@ class CreateInspectionRequest(BaseModel):
     severity: Optional[str] = None
 
 
+class BulkCreateInspectionRequest(BaseModel):
+    items: List[CreateInspectionRequest]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    ok: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
+    inspection: Optional[InspectionOut] = None
+
+
+class BulkCreateInspectionResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class InspectionDetailOut(BaseModel):
+    inspection: InspectionOut
+    defects: List[InspectionDefectOut]
+    signatures: List[SignatureOut]
+
+
 class UpdateStatusRequest(BaseModel):
     status: str
 
 
+class BulkStatusRequest(BaseModel):
+    status: str
+    ids: Optional[List[str]] = None
+    batch_id: Optional[str] = None
+    # only transition inspections currently in this status (e.g. in_review -> pass)
+    from_status: Optional[str] = None
+
+
+class BulkStatusResponse(BaseModel):
+    status: str
+    updated: int
+    ids: List[str]
+
+
 @router.get("", response_model=List[InspectionOut])
 @router.get("/", response_model=List[InspectionOut])
-def list_inspections(
+async def list_inspections(
+    response: Response,
     status: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    batch_id: Optional[str] = Query(None, description="Batch id or batch number"),
+    operator_id: Optional[str] = Query(None, description="Operator id or employee id"),
     limit: int = Query(50, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces offset"),
 ):
-    session = get_session()
-    try:
-        q = select(InspectionORM)
-        if status:
-            q = q.where(InspectionORM.status == status)
-        if search:
-            q = q.where(or_(
-                InspectionORM.batch_id.ilike(f"%{search}%"),
-                InspectionORM.operator_id.ilike(f"%{search}%"),
-                InspectionORM.id.ilike(f"%{search}%"),
-            ))
-        q = q.order_by(InspectionORM.created_at.desc()).limit(limit).offset(offset)
-        rows = session.execute(q).scalars().all()
-        return [_ins_out(r) for r in rows]
-    finally:
-        session.close()
+    """List inspections newest first.
+
+    With `cursor` the page is located by keyset on (created_at, id) instead of
+    OFFSET. Whenever more rows follow, the cursor for the next page is returned
+    in the `X-Next-Cursor` response header.
+    """
+    async with get_async_session() as session:
+        refs = await session.run_sync(_ref_filters, batch_id, operator_id)
+        q = _apply_filters(select(InspectionORM), status, search, refs=refs)
+        if cursor:
+            created_at, ins_id = decode_cursor(cursor, 2)
+            q = q.where(tuple_(InspectionORM.created_at, InspectionORM.id)
+                        < tuple_(parse_cursor_datetime(created_at), ins_id))
+        else:
+            q = q.offset(offset)
+        q = q.order_by(InspectionORM.created_at.desc(), InspectionORM.id.desc()).limit(limit + 1)
+        rows = (await session.execute(q)).scalars().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return [_ins_out(r) for r in rows]
 
 
 @router.post("", response_model=InspectionOut, status_code=201)
 @router.post("/", response_model=InspectionOut, status_code=201)
-def create_inspection(req: CreateInspectionRequest, background_tasks: BackgroundTasks):
+def create_inspection(req: CreateInspectionRequest):
     status = req.status if req.status in VALID_STATUSES else 'pending'
     session = get_session()
     try:
-        ins_id = f"ins-{uuid.uuid4().hex[:12]}"
+        ins_id = new_id('ins')
         ins = InspectionORM(
             id=ins_id,
             batch_id=req.batch_id,
+            batch_id_fk=batch_ref(req.batch_id),
             operator_id=req.operator_id,
+            operator_id_fk=operator_ref(req.operator_id),
             status=status,
             defect_count=req.defect_count or 0,
             notes=req.notes,
             severity=req.severity,
+            finalized_at=func.now() if status in FINAL_STATUSES else None,
         )
         session.add(ins)
+        outbox.enqueue(session, [_created_event(ins_id, status, ins.defect_count)])
         session.commit()
         session.refresh(ins)
-        try:
-            import redis as _redis
-            redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
-            r = _redis.from_url(redis_url, decode_responses=True)
-            r.rpush('worker:queue', ins.id)
-        except Exception:
-            background_tasks.add_task(_post_create_actions, {'id': ins.id})
         return _ins_out(ins)
     finally:
         session.close()
 
 
-@router.get("/{inspection_id}", response_model=InspectionOut)
-def get_inspection(inspection_id: str):
+@router.post("/bulk", response_model=BulkCreateInspectionResponse, status_code=201)
+def bulk_create_inspections(req: BulkCreateInspectionRequest):
+    """Create many inspections in one transaction with a multi-row INSERT.
+
+    Items that fail validation are reported individually and skipped; the
+    rest are inserted together with their outbox events.
+    """
+    if len(req.items) > MAX_BULK_ITEMS:
+        raise HTTPException(422, f"at most {MAX_BULK_ITEMS} items per request")
+    results = [BulkItemResult(index=i, ok=False) for i in range(len(req.items))]
+    payloads, indexes = [], []
+    now = datetime.now(timezone.utc)
+    for i, item in enumerate(req.items):
+        error = _validate_bulk_item(item)
+        if error:
+            results[i].error = error
+            continue
+        status = item.status if item.status in VALID_STATUSES else 'pending'
+        payloads.append(dict(
+            id=new_id('ins'),
+            batch_id=item.batch_id,
+            operator_id=item.operator_id,
+            status=status,
+            defect_count=item.defect_count or 0,
+            notes=item.notes,
+            severity=item.severity,
+            finalized_at=now if status in FINAL_STATUSES else None,
+        ))
+        indexes.append(i)
     session = get_session()
     try:
-        ins = session.get(InspectionORM, inspection_id)
-        if not ins:
-            raise HTTPException(404, "Not found")
-        return _ins_out(ins)
+        if payloads:
+            batches = resolve_batches(session, (p['batch_id'] for p in payloads))
+            operators = resolve_operators(session, (p['operator_id'] for p in payloads))
+            for p in payloads:
+                p['batch_id_fk'] = batches.get(p['batch_id'])
+                p['operator_id_fk'] = operators.get(p['operator_id'])
+            rows = session.scalars(
+                insert(InspectionORM).returning(InspectionORM, sort_by_parameter_order=True),
+                payloads,
+            ).all()
+            outbox.enqueue(session, [_created_event(row.id, row.status, row.defect_count) for row in rows])
+            # serialize before commit expires the rows (avoids a refresh per row)
+            for i, row in zip(indexes, rows):
+                results[i] = BulkItemResult(index=i, ok=True, id=row.id, inspection=_ins_out(row))
+            session.commit()
+        return BulkCreateInspectionResponse(
+            created=len(payloads), failed=len(req.items) - len(payloads), results=results,
+        )
     finally:
         session.close()
 
 
+@router.get("/export")
+def export_inspections(
+    format: str = Query('ndjson', pattern='^(csv|ndjson)$'),
+    status: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    batch_id: Optional[str] = Query(None, description="Batch id or batch number"),
+    operator_id: Optional[str] = Query(None, description="Operator id or employee id"),
+    created_from: Optional[datetime] = Query(None, alias='from'),
+    created_to: Optional[datetime] = Query(None, alias='to'),
+):
+    """Stream every matching inspection as CSV or NDJSON, newest first.
+
+    Rows come from a server-side cursor in chunks of EXPORT_CHUNK_SIZE, so
+    memory use is constant regardless of the result size.
+    """
+    session = get_session()
+    try:
+        refs = _ref_filters(session, batch_id, operator_id)
+    except Exception:
+        session.close()
+        raise
+    q = _apply_filters(select(*EXPORT_COLUMNS), status, search, created_from, created_to, refs)
+    q = q.order_by(InspectionORM.created_at.desc(), InspectionORM.id.desc())
+    names = [c.key for c in EXPORT_COLUMNS]
+    body = stream_rows(
+        session, q, encoder_for(format, names),
+        head=csv_header(names) if format == 'csv' else None,
+        chunk_size=EXPORT_CHUNK_SIZE,
+    )
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers={
+        'Content-Disposition': f'attachment; filename="inspections.{format}"',
+    })
+
+
+@router.get("/{inspection_id}", response_model=InspectionOut)
+async def get_inspection(inspection_id: str):
+    async with get_async_session() as session:
+        ins = await session.get(InspectionORM, inspection_id)
+    if not ins:
+        raise HTTPException(404, "Not found")
+    return _ins_out(ins)
+
+
+@router.get("/{inspection_id}/full", response_model=InspectionDetailOut)
+async def get_inspection_full(inspection_id: str):
+    """Inspection with its defects (and their types) and active signatures.
+
+    Two queries: the inspection joined to its defects and defect types, then
+    a selectin load of the non-revoked signatures.
+    """
+    q = (
+        select(InspectionORM)
+        .where(InspectionORM.id == inspection_id)
+        .options(
+            joinedload(InspectionORM.defects).joinedload(InspectionDefect.defect_type),
+            selectinload(InspectionORM.signatures.and_(Signature.revoked == False)),
+        )
+    )
+    async with get_async_session() as session:
+        ins = (await session.scalars(q)).unique().first()
+    if not ins:
+        raise HTTPException(404, "Not found")
+    return InspectionDetailOut(
+        inspection=_ins_out(ins),
+        defects=[_id_out(d) for d in sorted(ins.defects, key=lambda d: d.id)],
+        signatures=[_sig_out(sig) for sig in sorted(ins.signatures, key=lambda sig: sig.id)],
+    )
+
+
 @router.patch("/{inspection_id}/status", response_model=InspectionOut)
 def update_status(inspection_id: str, req: UpdateStatusRequest):
     if req.status not in VALID_STATUSES:
@@ -115,6 +290,9 @@ def update_status(inspection_id: str, req: UpdateStatusRequest):
         ins = session.get(InspectionORM, inspection_id)
         if not ins:
             raise HTTPException(404, "Not found")
+        if ins.status != req.status:
+            outbox.enqueue(session, [_status_event(ins.id, ins.status, req.status)])
+            ins.finalized_at = func.now() if req.status in FINAL_STATUSES else None
         ins.status = req.status
         session.commit()
         session.refresh(ins)
@@ -123,6 +301,63 @@ def update_status(inspection_id: str, req: UpdateStatusRequest):
         session.close()
 
 
+@router.patch("/status", response_model=BulkStatusResponse)
+def bulk_update_status(req: BulkStatusRequest):
+    """Transition many inspections (by id list and/or batch) in one statement.
+
+    A locking CTE captures each row's previous status, a single
+    UPDATE ... FROM ... RETURNING applies the change (on PostgreSQL; SQLite
+    reads then updates), and one status-changed event per row is queued in
+    the same transaction. Rows already in the
+    target status are left untouched.
+
+    `batch_id` is a batch id or batch number, matched through batch_id_fk
+    (run scripts/backfill_inspection_fks.py for older rows); a value naming
+    no batch falls back to the legacy batch_id text.
+    """
+    if req.status not in VALID_STATUSES:
+        raise HTTPException(422, f"status must be one of {VALID_STATUSES}")
+    if req.from_status is not None and req.from_status not in VALID_STATUSES:
+        raise HTTPException(422, f"from_status must be one of {VALID_STATUSES}")
+    if not req.ids and not req.batch_id:
+        raise HTTPException(422, "provide ids and/or batch_id")
+    if req.ids and len(req.ids) > MAX_BULK_ITEMS:
+        raise HTTPException(422, f"at most {MAX_BULK_ITEMS} ids per request")
+    target = select(InspectionORM.id, InspectionORM.status).where(InspectionORM.status != req.status)
+    if req.ids:
+        target = target.where(InspectionORM.id.in_(req.ids))
+    if req.from_status:
+        target = target.where(InspectionORM.status == req.from_status)
+    session = get_session()
+    try:
+        if req.batch_id:
+            target = target.where(batch_filter(session, req.batch_id))
+        inspections = InspectionORM.__table__
+        values = dict(status=req.status, finalized_at=func.now() if req.status in FINAL_STATUSES else None)
+        if session.get_bind().dialect.name == 'postgresql':
+            # PostgreSQL evaluates the CTE against the pre-update snapshot, so
+            # previous.status is the old value. Core table: ORM-level UPDATE
+            # cannot RETURN columns of the CTE.
+            previous = target.with_for_update().cte('previous')
+            rows = session.execute(
+                update(inspections)
+                .where(inspections.c.id == previous.c.id)
+                .values(**values)
+                .returning(inspections.c.id, previous.c.status)
+            ).all()
+        else:
+            # SQLite's RETURNING only sees the updated table: read the old
+            # statuses first, then update those rows
+            rows = session.execute(target).all()
+            if rows:
+                session.execute(update(inspections).where(inspections.c.id.in_([r[0] for r in rows])).values(**values))
+        outbox.enqueue(session, [_status_event(r[0], r[1], req.status) for r in rows])
+        session.commit()
+        return BulkStatusResponse(status=req.status, updated=len(rows), ids=[r[0] for r in rows])
+    finally:
+        session.close()
+
+
 @router.delete("/{inspection_id}", status_code=204)
 def delete_inspection(inspection_id: str):
     session = get_session()
@@ -130,12 +365,90 @@ def delete_inspection(inspection_id: str):
         ins = session.get(InspectionORM, inspection_id)
         if not ins:
             raise HTTPException(404, "Not found")
+        outbox.enqueue(session, [outbox.event(
+            'inspection.deleted', id=ins.id, status=ins.status, defect_count=ins.defect_count,
+            operator_id=ins.operator_id_fk, batch_id=ins.batch_id_fk,
+            # the row is gone by the time the worker sees this; carry its rollup bucket
+            day=day_of(ins.created_at).isoformat() if ins.created_at else None,
+            product_id=ins.batch.product_id if ins.batch else '',
+        )])
         session.delete(ins)
         session.commit()
     finally:
         session.close()
 
 
+def _ref_filters(session, batch_id: Optional[str], operator_id: Optional[str]) -> list:
+    # the same batch/operator matching as bulk_update_status, so a filter
+    # selects the rows a bulk update by that batch would change
+    refs = []
+    if batch_id:
+        refs.append(batch_filter(session, batch_id))
+    if operator_id:
+        refs.append(operator_filter(session, operator_id))
+    return refs
+
+
+def _apply_filters(q, status: Optional[str], search: Optional[str],
+                   created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                   refs: list = ()):
+    if status:
+        q = q.where(InspectionORM.status == status)
+    if search:
+        q = q.where(_search_clause(search))
+    if created_from:
+        q = q.where(InspectionORM.created_at >= created_from)
+    if created_to:
+        q = q.where(InspectionORM.created_at < created_to)
+    # batch/operator predicates from _ref_filters
+    return q.where(*refs) if refs else q
+
+
+# String columns a bulk item writes verbatim (status is coerced to a valid one)
+_BOUNDED_FIELDS = ('batch_id', 'operator_id', 'severity')
+# inspections.defect_count is a 32-bit INTEGER
+MAX_DEFECT_COUNT = 2**31 - 1
+
+
+def _validate_bulk_item(item: CreateInspectionRequest) -> Optional[str]:
+    # checked up front so one bad row cannot abort the shared transaction
+    if not 0 <= (item.defect_count or 0) <= MAX_DEFECT_COUNT:
+        return f"defect_count must be between 0 and {MAX_DEFECT_COUNT}"
+    for field in _BOUNDED_FIELDS:
+        value = getattr(item, field)
+        max_len = InspectionORM.__table__.c[field].type.length
+        if value is not None and len(value) > max_len:
+            return f"{field} must be at most {max_len} characters"
+    return None
+
+
+def _search_clause(term: str):
+    """ILIKE match on batch/operator/id served by the pg_trgm GIN indexes.
+
+    Every term matches anywhere, with `%`, `_` and `\\` taken literally.
+    Terms under three characters have no trigram to look up, so PostgreSQL
+    answers those by walking the (created_at, id) index until the page fills.
+    """
+    term = term.strip()
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    pattern = f"%{escaped}%"
+    return or_(
+        InspectionORM.batch_id.ilike(pattern, escape='\\'),
+        InspectionORM.operator_id.ilike(pattern, escape='\\'),
+        InspectionORM.id.ilike(pattern, escape='\\'),
+    )
+
+
+def _created_event(inspection_id: str, status: str, defect_count: int) -> str:
+    # status and defect_count as created: later changes carry their own events,
+    # so the live feed must not pick them up from the row a second time
+    return outbox.event('inspection.created', id=inspection_id, status=status, defect_count=defect_count)
+
+
+def _status_event(inspection_id: str, old_status: Optional[str], new_status: str) -> str:
+    return outbox.event('inspection.status_changed', id=inspection_id, **{'from': old_status, 'to': new_status})
+
+
 def _ins_out(r: InspectionORM) -> InspectionOut:
     return InspectionOut(
         id=r.id,
@@ -148,7 +461,3 @@ def _ins_out(r: InspectionORM) -> InspectionOut:
         created_at=r.created_at.isoformat() if r.created_at else None,
         updated_at=r.updated_at.isoformat() if r.updated_at else None,
     )
-
-
-def _post_create_actions(inspection_payload: dict):
-    print("[worker] post create actions", inspection_payload)
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List
-from sqlalchemy import select, func
+from sqlalchemy import select, func, Float, cast
 from app.db import get_session
-from app.models.orm_models import Operator, Inspection
+from app.models.orm_models import Operator, Inspection, OperatorScorecard
+from app.api.v1.stats import _utc
+from app.scorecards import WINDOWS
 import uuid
+from app.ids import new_id
 
 router = APIRouter()
 
@@ -30,32 +34,118 @@ class OperatorOut(BaseModel):
     pass_rate: Optional[float] = None
 
 
+class ScorecardOut(BaseModel):
+    operator_id: str
+    name: Optional[str] = None
+    window_days: int
+    inspections: int
+    shifts: int
+    inspections_per_shift: Optional[float]
+    pass_rate: Optional[float]
+    defect_density: Optional[float]
+    mean_hours_to_final: Optional[float]
+    refreshed_at: Optional[str]
+
+
+_sc = OperatorScorecard
+# metric -> (SQL expression, higher is better)
+METRICS = {
+    'pass_rate': (cast(_sc.passes, Float) * 100 / func.nullif(_sc.inspections, 0), True),
+    'inspections_per_shift': (cast(_sc.inspections, Float) / func.nullif(_sc.shifts, 0), True),
+    'defect_density': (cast(_sc.defect_sum, Float) / func.nullif(_sc.inspections, 0), False),
+    'mean_hours_to_final': (_sc.seconds_to_final / 3600 / func.nullif(_sc.finalized, 0), False),
+}
+
+
+def _scorecard_out(sc: OperatorScorecard, name: Optional[str] = None) -> ScorecardOut:
+    def ratio(num, den, scale=1.0):
+        return round(num * scale / den, 2) if den else None
+    return ScorecardOut(
+        operator_id=sc.operator_id, name=name, window_days=sc.window_days,
+        inspections=sc.inspections, shifts=sc.shifts,
+        inspections_per_shift=ratio(sc.inspections, sc.shifts),
+        pass_rate=ratio(sc.passes, sc.inspections, 100),
+        defect_density=ratio(sc.defect_sum, sc.inspections),
+        mean_hours_to_final=ratio(sc.seconds_to_final, sc.finalized, 1 / 3600),
+        refreshed_at=sc.refreshed_at.isoformat() if sc.refreshed_at else None,
+    )
+
+
+def _check_window(window: int):
+    if window not in WINDOWS:
+        raise HTTPException(422, f"window must be one of {list(WINDOWS)}")
+
+
+def _inspection_stats(created_from: Optional[datetime], created_to: Optional[datetime],
+                      operator_id: Optional[str] = None):
+    """Per-operator inspection and pass counts in one GROUP BY. Bounds are
+    compared in UTC, as in the dashboard stats (naive values are UTC)."""
+    created_from, created_to = _utc(created_from), _utc(created_to)
+    q = (
+        select(
+            Inspection.operator_id_fk.label('operator_id'),
+            func.count().label('total'),
+            func.count().filter(Inspection.status == 'pass').label('passes'),
+        )
+        .where(Inspection.operator_id_fk.is_not(None))
+        .group_by(Inspection.operator_id_fk)
+    )
+    if operator_id is not None:
+        q = q.where(Inspection.operator_id_fk == operator_id)
+    if created_from:
+        q = q.where(Inspection.created_at >= created_from)
+    if created_to:
+        q = q.where(Inspection.created_at < created_to)
+    return q.subquery()
+
+
+def _with_stats(q, stats):
+    return (
+        q.add_columns(func.coalesce(stats.c.total, 0), func.coalesce(stats.c.passes, 0))
+        .outerjoin(stats, stats.c.operator_id == Operator.id)
+    )
+
+
 @router.get("/", response_model=List[OperatorOut])
-def list_operators():
+def list_operators(
+    created_from: Optional[datetime] = Query(None, alias='from', description="Only count inspections created at or after"),
+    created_to: Optional[datetime] = Query(None, alias='to', description="Only count inspections created before"),
+):
+    session = get_session()
+    try:
+        rows = session.execute(_with_stats(
+            select(Operator).where(Operator.active == True).order_by(Operator.name),
+            _inspection_stats(created_from, created_to),
+        )).all()
+        return [_op_out(op, total, passes) for op, total, passes in rows]
+    finally:
+        session.close()
+
+
+@router.get("/leaderboard", response_model=List[ScorecardOut])
+def leaderboard(
+    window: int = Query(30, description="Window in days: 7, 30 or 90"),
+    metric: str = Query('pass_rate', description=f"One of {', '.join(METRICS)}"),
+    limit: int = Query(20, ge=1, le=500),
+    min_inspections: int = Query(1, ge=0, description="Skip operators with fewer inspections in the window"),
+):
+    """Rank operators by a scorecard metric, read from the precomputed
+    `operator_scorecards` table (refreshed by the worker). Shifts are
+    SHIFT_HOURS-long UTC blocks."""
+    _check_window(window)
+    if metric not in METRICS:
+        raise HTTPException(422, f"metric must be one of {list(METRICS)}")
+    expr, higher_is_better = METRICS[metric]
     session = get_session()
     try:
         rows = session.execute(
-            select(Operator).where(Operator.active == True).order_by(Operator.name)
-        ).scalars().all()
-        result = []
-        for op in rows:
-            total = session.execute(
-                select(func.count()).select_from(Inspection)
-                .where(Inspection.operator_id == op.id)
-            ).scalar() or 0
-            passes = session.execute(
-                select(func.count()).select_from(Inspection)
-                .where(Inspection.operator_id == op.id, Inspection.status == 'pass')
-            ).scalar() or 0
-            pass_rate = round(passes / total * 100, 1) if total > 0 else None
-            result.append(OperatorOut(
-                id=op.id, employee_id=op.employee_id, name=op.name,
-                email=op.email, department=op.department, role=op.role,
-                active=op.active,
-                created_at=op.created_at.isoformat() if op.created_at else None,
-                inspection_count=total, pass_rate=pass_rate,
-            ))
-        return result
+            select(_sc, Operator.name)
+            .outerjoin(Operator, Operator.id == _sc.operator_id)
+            .where(_sc.window_days == window, _sc.inspections >= min_inspections)
+            .order_by((expr.desc() if higher_is_better else expr.asc()).nulls_last(), _sc.operator_id)
+            .limit(limit)
+        ).all()
+        return [_scorecard_out(sc, name) for sc, name in rows]
     finally:
         session.close()
 
@@ -65,7 +155,7 @@ def create_operator(req: OperatorIn):
     session = get_session()
     try:
         op = Operator(
-            id=f"op-{uuid.uuid4().hex[:12]}",
+            id=new_id('op'),
             employee_id=req.employee_id or f"EMP-{uuid.uuid4().hex[:6].upper()}",
             name=req.name,
             email=req.email, department=req.department, role=req.role,
@@ -73,40 +163,48 @@ def create_operator(req: OperatorIn):
         session.add(op)
         session.commit()
         session.refresh(op)
-        return OperatorOut(
-            id=op.id, employee_id=op.employee_id, name=op.name,
-            email=op.email, department=op.department, role=op.role,
-            active=op.active,
-            created_at=op.created_at.isoformat() if op.created_at else None,
-            inspection_count=0, pass_rate=None,
-        )
+        return _op_out(op)
     finally:
         session.close()
 
 
 @router.get("/{operator_id}", response_model=OperatorOut)
-def get_operator(operator_id: str):
+def get_operator(
+    operator_id: str,
+    created_from: Optional[datetime] = Query(None, alias='from'),
+    created_to: Optional[datetime] = Query(None, alias='to'),
+):
     session = get_session()
     try:
-        op = session.get(Operator, operator_id)
-        if not op:
+        row = session.execute(_with_stats(
+            select(Operator).where(Operator.id == operator_id),
+            _inspection_stats(created_from, created_to, operator_id),
+        )).first()
+        if not row:
             raise HTTPException(404, "Operator not found")
-        total = session.execute(
-            select(func.count()).select_from(Inspection)
-            .where(Inspection.operator_id == op.id)
-        ).scalar() or 0
-        passes = session.execute(
-            select(func.count()).select_from(Inspection)
-            .where(Inspection.operator_id == op.id, Inspection.status == 'pass')
-        ).scalar() or 0
-        pass_rate = round(passes / total * 100, 1) if total > 0 else None
-        return OperatorOut(
-            id=op.id, employee_id=op.employee_id, name=op.name,
-            email=op.email, department=op.department, role=op.role,
-            active=op.active,
-            created_at=op.created_at.isoformat() if op.created_at else None,
-            inspection_count=total, pass_rate=pass_rate,
+        return _op_out(*row)
+    finally:
+        session.close()
+
+
+@router.get("/{operator_id}/scorecard", response_model=List[ScorecardOut])
+def get_operator_scorecard(operator_id: str, window: Optional[int] = Query(None, description="7, 30 or 90; all if omitted")):
+    if window is not None:
+        _check_window(window)
+    session = get_session()
+    try:
+        q = (
+            select(_sc, Operator.name)
+            .outerjoin(Operator, Operator.id == _sc.operator_id)
+            .where(_sc.operator_id == operator_id)
+            .order_by(_sc.window_days)
         )
+        if window is not None:
+            q = q.where(_sc.window_days == window)
+        rows = session.execute(q).all()
+        if not rows and session.get(Operator, operator_id) is None:
+            raise HTTPException(404, "Operator not found")
+        return [_scorecard_out(sc, name) for sc, name in rows]
     finally:
         session.close()
 
@@ -122,3 +220,14 @@ def deactivate_operator(operator_id: str):
         session.commit()
     finally:
         session.close()
+
+
+def _op_out(op: Operator, total: int = 0, passes: int = 0) -> OperatorOut:
+    return OperatorOut(
+        id=op.id, employee_id=op.employee_id, name=op.name,
+        email=op.email, department=op.department, role=op.role,
+        active=op.active,
+        created_at=op.created_at.isoformat() if op.created_at else None,
+        inspection_count=total,
+        pass_rate=round(passes / total * 100, 1) if total > 0 else None,
+    )
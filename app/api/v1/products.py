@@ -1,13 +1,37 @@
-from fastapi import APIRouter, HTTPException
+import os
+import tempfile
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
-from sqlalchemy import select
-from app.db import get_session
-from app.models.orm_models import Product, Batch
-import uuid
+from typing import Dict, Optional, List
+from sqlalchemy import select, func, or_, tuple_
+from sqlalchemy.orm import selectinload
+from app.db import get_session, get_async_session
+from app.models.orm_models import (
+    Product, Batch, Inspection, InspectionDefect, DefectType, Signature, SignoffDocument,
+)
+from app.api.v1.inspections import InspectionOut, _ins_out
+from app.api.v1.signatures import SignatureOut, _sig_out
+from app.api.v1.documents import DocumentOut, _doc_out
+from app import batch_quality, cache, catalog_import
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_cursor_datetime
+from app.streaming import json_array_encoder, stream_rows
+from app.ids import new_id
 
 router = APIRouter()
 
+# request bodies larger than this are spooled to disk before importing
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+# larger import bodies are refused with 413; split the file or use
+# scripts/import_catalog.py
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# page size when a cursor is passed without a limit
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
 
 # ── Products ──────────────────────────────────────────────────────────────
 
@@ -27,31 +51,98 @@ class ProductOut(BaseModel):
     created_at: Optional[str]
 
 
+PRODUCT_COLUMNS = [Product.id, Product.sku, Product.name, Product.category,
+                   Product.description, Product.created_at]
+
+
 @router.get("/products", response_model=List[ProductOut])
-def list_products():
-    session = get_session()
-    try:
-        rows = session.execute(select(Product).order_by(Product.name)).scalars().all()
-        return [ProductOut(id=r.id, sku=r.sku, name=r.name, category=r.category,
-                           description=r.description,
-                           created_at=r.created_at.isoformat() if r.created_at else None)
-                for r in rows]
-    finally:
-        session.close()
+def list_products(
+    response: Response,
+    category: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None, alias='from'),
+    created_to: Optional[datetime] = Query(None, alias='to'),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+):
+    """List products by name.
+
+    With `limit` (or `cursor`) one keyset page on (name, id) is returned and
+    the cursor for the next one is sent in `X-Next-Cursor`. Without either,
+    every matching product is streamed as a JSON array from a server-side
+    cursor, so memory stays flat however large the catalogue is.
+    """
+    q = select(*PRODUCT_COLUMNS)
+    if category is not None:
+        q = q.where(Product.category == category)
+    if created_from:
+        q = q.where(Product.created_at >= created_from)
+    if created_to:
+        q = q.where(Product.created_at < created_to)
+    if cursor:
+        name, product_id = decode_cursor(cursor, 2)
+        q = q.where(tuple_(Product.name, Product.id) > tuple_(name, product_id))
+    q = q.order_by(Product.name, Product.id)
+    if limit is None and cursor is None:
+        return _stream_json(q, [c.key for c in PRODUCT_COLUMNS])
+    rows = _page(q, limit or DEFAULT_PAGE_SIZE, response, lambda r: (r.name, r.id))
+    return [_product_out(r) for r in rows]
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportOut(BaseModel):
+    upserted: int
+    failed: int
+    errors: List[ImportRowError]
+
+
+async def _import(kind: str, request: Request, fmt: str) -> ImportOut:
+    too_large = HTTPException(413, f"import body larger than {IMPORT_MAX_BYTES} bytes")
+    if int(request.headers.get('content-length') or 0) > IMPORT_MAX_BYTES:
+        raise too_large
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as body:
+        # chunked bodies carry no Content-Length, so count as we spool
+        size = 0
+        async for part in request.stream():
+            size += len(part)
+            if size > IMPORT_MAX_BYTES:
+                raise too_large
+            body.write(part)
+        body.seek(0)
+
+        def load():
+            session = get_session()
+            try:
+                return catalog_import.import_catalog(session, kind, body, fmt)
+            finally:
+                session.close()
+        result = await run_in_threadpool(load)
+    return ImportOut(**result.as_dict())
+
+
+@router.post("/products/import", response_model=ImportOut)
+async def import_products(request: Request, format: str = Query('csv', pattern='^(csv|ndjson)$')):
+    """Upsert products (keyed by `sku`) from a CSV or NDJSON request body.
+
+    Columns: sku, name, category, description. Rows are validated and
+    written in chunks; invalid rows are reported by line and skipped.
+    """
+    return await _import('products', request, format)
 
 
 @router.post("/products", response_model=ProductOut, status_code=201)
 def create_product(req: ProductIn):
     session = get_session()
     try:
-        p = Product(id=f"prod-{uuid.uuid4().hex[:12]}", sku=req.sku,
+        p = Product(id=new_id('prod'), sku=req.sku,
                     name=req.name, category=req.category, description=req.description)
         session.add(p)
         session.commit()
         session.refresh(p)
-        return ProductOut(id=p.id, sku=p.sku, name=p.name, category=p.category,
-                          description=p.description,
-                          created_at=p.created_at.isoformat() if p.created_at else None)
+        return _product_out(p)
     finally:
         session.close()
 
@@ -63,9 +154,7 @@ def get_product(product_id: str):
         p = session.get(Product, product_id)
         if not p:
             raise HTTPException(404, "Product not found")
-        return ProductOut(id=p.id, sku=p.sku, name=p.name, category=p.category,
-                          description=p.description,
-                          created_at=p.created_at.isoformat() if p.created_at else None)
+        return _product_out(p)
     finally:
         session.close()
 
@@ -107,16 +196,66 @@ class BatchOut(BaseModel):
     created_at: Optional[str]
 
 
+BATCH_COLUMNS = [
+    Batch.id, Batch.product_id, Product.name.label('product_name'), Batch.batch_number,
+    func.coalesce(Batch.quantity, 0).label('quantity'), Batch.production_date,
+    Batch.expiry_date, func.coalesce(Batch.status, 'active').label('status'),
+    Batch.notes, Batch.created_at,
+]
+
+
 @router.get("/batches", response_model=List[BatchOut])
-def list_batches():
-    session = get_session()
-    try:
-        rows = session.execute(
-            select(Batch).order_by(Batch.created_at.desc())
-        ).scalars().all()
-        return [_batch_out(r) for r in rows]
-    finally:
-        session.close()
+def list_batches(
+    response: Response,
+    product_id: Optional[str] = Query(None),
+    category: Optional[str] = Query(None, description="Product category"),
+    status: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None, alias='from'),
+    created_to: Optional[datetime] = Query(None, alias='to'),
+    produced_from: Optional[datetime] = Query(None, description="production_date at or after"),
+    produced_to: Optional[datetime] = Query(None, description="production_date before"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+):
+    """List batches newest first, with the product name joined in.
+
+    Paging and streaming work as in `list_products`; pages are located by
+    keyset on (created_at, id).
+    """
+    q = select(*BATCH_COLUMNS).outerjoin(Product, Product.id == Batch.product_id)
+    if product_id is not None:
+        q = q.where(Batch.product_id == product_id)
+    if category is not None:
+        q = q.where(Product.category == category)
+    if status is not None:
+        q = q.where(Batch.status == status)
+    if created_from:
+        q = q.where(Batch.created_at >= created_from)
+    if created_to:
+        q = q.where(Batch.created_at < created_to)
+    if produced_from:
+        q = q.where(Batch.production_date >= produced_from)
+    if produced_to:
+        q = q.where(Batch.production_date < produced_to)
+    if cursor:
+        created_at, batch_id = decode_cursor(cursor, 2)
+        q = q.where(tuple_(Batch.created_at, Batch.id) < tuple_(parse_cursor_datetime(created_at), batch_id))
+    q = q.order_by(Batch.created_at.desc(), Batch.id.desc())
+    if limit is None and cursor is None:
+        return _stream_json(q, [c.key for c in BATCH_COLUMNS])
+    rows = _page(q, limit or DEFAULT_PAGE_SIZE, response, lambda r: (r.created_at, r.id))
+    return [_batch_out(r, r.product_name) for r in rows]
+
+
+@router.post("/batches/import", response_model=ImportOut)
+async def import_batches(request: Request, format: str = Query('csv', pattern='^(csv|ndjson)$')):
+    """Upsert batches (keyed by `batch_number`) from a CSV or NDJSON body.
+
+    Columns: batch_number, product_id or product_sku, quantity,
+    production_date, expiry_date, status, notes. Unknown products are
+    reported per row.
+    """
+    return await _import('batches', request, format)
 
 
 @router.post("/batches", response_model=BatchOut, status_code=201)
@@ -127,14 +266,13 @@ def create_batch(req: BatchIn):
             prod = session.get(Product, req.product_id)
             if not prod:
                 raise HTTPException(400, "Product not found")
-        from datetime import datetime
         prod_date = None
         if req.production_date:
             try:
                 prod_date = datetime.fromisoformat(req.production_date)
             except Exception:
                 pass
-        b = Batch(id=f"batch-{uuid.uuid4().hex[:12]}", product_id=req.product_id,
+        b = Batch(id=new_id('batch'), product_id=req.product_id,
                   batch_number=req.batch_number, quantity=req.quantity,
                   production_date=prod_date, expiry_date=req.expiry_date, notes=req.notes)
         session.add(b)
@@ -157,6 +295,98 @@ def get_batch(batch_id: str):
         session.close()
 
 
+class DefectTotalOut(BaseModel):
+    defect_type_id: str
+    code: str
+    name: str
+    severity: str
+    quantity: int
+    inspections: int
+
+
+class SignatureStatusOut(BaseModel):
+    signed_inspections: int
+    unsigned_inspections: int
+    by_role: Dict[str, int]
+
+
+class BatchQualityOut(BaseModel):
+    batch: BatchOut
+    inspections: List[InspectionOut]
+    defects: List[DefectTotalOut]
+    signature_status: SignatureStatusOut
+    signatures: List[SignatureOut]
+    documents: List[DocumentOut]
+
+
+async def _batch_quality(batch_id: str) -> Optional[dict]:
+    """Six set-based queries: the batch, its inspections, defect totals by
+    type, active signatures, and its sign-off documents with their requests."""
+    async with get_async_session() as session:
+        batch = (await session.execute(
+            select(*BATCH_COLUMNS).outerjoin(Product, Product.id == Batch.product_id).where(Batch.id == batch_id)
+        )).first()
+        if batch is None:
+            return None
+        inspection_ids = select(Inspection.id).where(Inspection.batch_id_fk == batch_id)
+        inspections = (await session.scalars(
+            select(Inspection).where(Inspection.batch_id_fk == batch_id)
+            .order_by(Inspection.created_at.desc(), Inspection.id.desc())
+        )).all()
+        defects = (await session.execute(
+            select(DefectType.id, DefectType.code, DefectType.name, DefectType.severity,
+                   func.coalesce(func.sum(InspectionDefect.quantity), 0),
+                   func.count(func.distinct(InspectionDefect.inspection_id)))
+            .join(InspectionDefect, InspectionDefect.defect_type_id == DefectType.id)
+            .where(InspectionDefect.inspection_id.in_(inspection_ids))
+            .group_by(DefectType.id, DefectType.code, DefectType.name, DefectType.severity)
+            .order_by(func.sum(InspectionDefect.quantity).desc())
+        )).all()
+        signatures = (await session.scalars(
+            select(Signature)
+            .where(Signature.inspection_id.in_(inspection_ids), Signature.revoked == False)
+            .order_by(Signature.signed_at)
+        )).all()
+        documents = (await session.scalars(
+            select(SignoffDocument).options(selectinload(SignoffDocument.sign_requests))
+            .where(or_(SignoffDocument.batch_id == batch_id, SignoffDocument.batch_number == batch.batch_number))
+            .order_by(SignoffDocument.created_at.desc())
+        )).all()
+    signed = {sig.inspection_id for sig in signatures}
+    by_role: Dict[str, int] = {}
+    for sig in signatures:
+        by_role[sig.signer_role] = by_role.get(sig.signer_role, 0) + 1
+    return BatchQualityOut(
+        batch=_batch_out(batch, batch.product_name),
+        inspections=[_ins_out(i) for i in inspections],
+        defects=[DefectTotalOut(defect_type_id=d[0], code=d[1], name=d[2], severity=d[3],
+                                quantity=d[4], inspections=d[5]) for d in defects],
+        signature_status=SignatureStatusOut(
+            signed_inspections=len(signed),
+            unsigned_inspections=len(inspections) - len(signed),
+            by_role=by_role,
+        ),
+        signatures=[_sig_out(sig) for sig in signatures],
+        documents=[_doc_out(doc) for doc in documents],
+    ).model_dump()
+
+
+@router.get("/batches/{batch_id}/quality", response_model=BatchQualityOut)
+async def get_batch_quality(batch_id: str):
+    """A batch's full quality picture in one response.
+
+    Cached in Redis until one of its inspections, defects, signatures or
+    sign-off documents changes (see app/batch_quality.py).
+    """
+    result = await cache.get_or_compute(
+        await batch_quality.cache_key(batch_id), lambda: _batch_quality(batch_id),
+        ttl=batch_quality.CACHE_TTL, stale_ttl=0,
+    )
+    if result is None:
+        raise HTTPException(404, "Batch not found")
+    return result
+
+
 @router.delete("/batches/{batch_id}", status_code=204)
 def delete_batch(batch_id: str):
     session = get_session()
@@ -166,15 +396,43 @@ def delete_batch(batch_id: str):
             raise HTTPException(404, "Batch not found")
         session.delete(b)
         session.commit()
+        batch_quality.touch([batch_id])
     finally:
         session.close()
 
 
-def _batch_out(b: Batch) -> BatchOut:
+def _stream_json(q, columns: List[str]) -> StreamingResponse:
+    body = stream_rows(get_session(), q, json_array_encoder(columns), head='[', tail=']')
+    return StreamingResponse(body, media_type='application/json')
+
+
+def _page(q, limit: int, response: Response, sort_key) -> list:
+    """Fetch one keyset page; sets X-Next-Cursor when more rows follow."""
+    session = get_session()
+    try:
+        rows = session.execute(q.limit(limit + 1)).all()
+    finally:
+        session.close()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*sort_key(rows[-1]))
+    return rows
+
+
+def _product_out(p) -> ProductOut:
+    return ProductOut(id=p.id, sku=p.sku, name=p.name, category=p.category,
+                      description=p.description,
+                      created_at=p.created_at.isoformat() if p.created_at else None)
+
+
+def _batch_out(b, product_name: Optional[str] = None) -> BatchOut:
+    """`b` is a Batch, or a BATCH_COLUMNS row with the product name joined in."""
+    if isinstance(b, Batch):
+        product_name = b.product.name if b.product else None
     return BatchOut(
         id=b.id,
         product_id=b.product_id,
-        product_name=b.product.name if b.product else None,
+        product_name=product_name,
         batch_number=b.batch_number,
         quantity=b.quantity or 0,
         production_date=b.production_date.isoformat() if b.production_date else None,
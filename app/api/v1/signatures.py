@@ -1,13 +1,18 @@
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional, List
-from sqlalchemy import select
+from sqlalchemy import String, insert, literal, select
+from sqlalchemy.exc import IntegrityError
 from app.db import get_session
 from app.models.orm_models import Signature, Inspection
+from app import batch_quality
 from datetime import datetime
 
 router = APIRouter()
 
+# partial unique index: one non-revoked signature per (inspection, role)
+ACTIVE_ROLE_INDEX = 'uq_signatures_active_role'
+
 
 class SignatureIn(BaseModel):
     signer_name: str
@@ -44,34 +49,45 @@ def list_signatures(inspection_id: str):
 
 @router.post("/{inspection_id}/signatures", response_model=SignatureOut, status_code=201)
 def sign_inspection(inspection_id: str, req: SignatureIn, request: Request):
+    """Sign as `signer_role`, at most once per role until revoked.
+
+    One INSERT ... SELECT FROM inspections: no row means no such inspection,
+    and the partial unique index uq_signatures_active_role rejects a second
+    active signature for the role, even from a concurrent request.
+    """
+    ip = request.client.host if request.client else None
+    signatures = Signature.__table__
+    stmt = (
+        insert(signatures)
+        .from_select(
+            ['inspection_id', 'signer_id', 'signer_name', 'signer_role', 'ip_address', 'revoked'],
+            select(Inspection.id, literal(req.signer_id, String), literal(req.signer_name),
+                   literal(req.signer_role), literal(ip, String), literal(False))
+            .where(Inspection.id == inspection_id),
+        )
+        .returning(
+            *signatures.c,
+            # for the batch quality cache, without another round trip
+            select(Inspection.batch_id_fk).where(Inspection.id == inspection_id)
+            .scalar_subquery().label('batch_id_fk'),
+        )
+    )
     session = get_session()
     try:
-        ins = session.get(Inspection, inspection_id)
-        if not ins:
+        try:
+            sig = session.execute(stmt).first()
+            session.commit()
+        except IntegrityError as exc:
+            session.rollback()
+            if _violates_active_role(exc):
+                raise HTTPException(409, f"Already signed by a {req.signer_role}")
+            if req.signer_id:
+                # signatures.signer_id -> operators.id
+                raise HTTPException(422, f"Unknown signer_id {req.signer_id}")
+            raise
+        if sig is None:
             raise HTTPException(404, "Inspection not found")
-
-        # Check not already signed by this role (active)
-        existing = session.execute(
-            select(Signature).where(
-                Signature.inspection_id == inspection_id,
-                Signature.signer_role == req.signer_role,
-                Signature.revoked == False,
-            )
-        ).scalars().first()
-        if existing:
-            raise HTTPException(409, f"Already signed by a {req.signer_role}")
-
-        ip = request.client.host if request.client else None
-        sig = Signature(
-            inspection_id=inspection_id,
-            signer_id=req.signer_id,
-            signer_name=req.signer_name,
-            signer_role=req.signer_role,
-            ip_address=ip,
-        )
-        session.add(sig)
-        session.commit()
-        session.refresh(sig)
+        batch_quality.touch([sig.batch_id_fk])
         return _sig_out(sig)
     finally:
         session.close()
@@ -90,12 +106,23 @@ def revoke_signature(inspection_id: str, sig_id: int, revoked_by: str = "admin")
         sig.revoked_at = datetime.utcnow()
         sig.revoked_by = revoked_by
         session.commit()
+        batch_quality.touch([sig.inspection.batch_id_fk])
         session.refresh(sig)
         return _sig_out(sig)
     finally:
         session.close()
 
 
+def _violates_active_role(exc: IntegrityError) -> bool:
+    """True if `exc` comes from uq_signatures_active_role rather than, say, a
+    foreign key."""
+    diag = getattr(exc.orig, 'diag', None)
+    if diag is not None:  # psycopg2
+        return diag.constraint_name == ACTIVE_ROLE_INDEX
+    # SQLite names the columns, not the index
+    return 'UNIQUE constraint failed: signatures.inspection_id, signatures.signer_role' in str(exc.orig)
+
+
 def _sig_out(r: Signature) -> SignatureOut:
     return SignatureOut(
         id=r.id,
@@ -1,138 +1,365 @@
-from fastapi import APIRouter, Query
-from sqlalchemy import select, func
-from typing import Optional
-from app.db import get_session
-from app.models.orm_models import Inspection, DefectType, InspectionDefect, WorkerAudit
+import asyncio
+import json
+from datetime import datetime, time, timezone
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
+from sqlalchemy import select, func, tuple_
+from typing import NamedTuple, Optional
+from app import cache, live, outbox, rollup
+from app.db import get_async_session
+from app.redis_client import get_async_redis, redis_health
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_cursor_datetime
+from app.models.orm_models import (
+    Batch, Inspection, DefectType, InspectionDefect, WorkerAudit, DailyInspectionRollup as Rollup,
+)
 
 router = APIRouter()
 
+STATS_CACHE_KEY = 'stats:v1:dashboard'
+STATUSES = ('pass', 'fail', 'pending', 'in_review')
+# seconds between SSE keep-alive comments (also how often disconnects are noticed)
+SSE_HEARTBEAT = 15
+# seconds between fresh snapshots on an open stream, which bounds any drift
+SSE_SNAPSHOT_INTERVAL = 300
 
-@router.get("/")
-def get_stats():
-    session = get_session()
-    try:
-        total = session.execute(select(func.count()).select_from(Inspection)).scalar() or 0
-        passes = session.execute(
-            select(func.count()).select_from(Inspection).where(Inspection.status == 'pass')
-        ).scalar() or 0
-        fails = session.execute(
-            select(func.count()).select_from(Inspection).where(Inspection.status == 'fail')
-        ).scalar() or 0
-        pending = session.execute(
-            select(func.count()).select_from(Inspection).where(Inspection.status == 'pending')
-        ).scalar() or 0
-        in_review = session.execute(
-            select(func.count()).select_from(Inspection).where(Inspection.status == 'in_review')
-        ).scalar() or 0
-
-        pass_rate = round(passes / total * 100, 1) if total > 0 else 0
-        fail_rate = round(fails / total * 100, 1) if total > 0 else 0
-
-        avg_defects = session.execute(
-            select(func.avg(Inspection.defect_count)).select_from(Inspection)
-        ).scalar()
-        avg_defects = round(float(avg_defects), 2) if avg_defects else 0
-
-        # Top 5 defect types
-        top_defects_rows = session.execute(
-            select(DefectType.name, DefectType.severity, func.sum(InspectionDefect.quantity).label('total'))
-            .join(InspectionDefect, InspectionDefect.defect_type_id == DefectType.id)
-            .group_by(DefectType.id, DefectType.name, DefectType.severity)
-            .order_by(func.sum(InspectionDefect.quantity).desc())
-            .limit(5)
-        ).all()
-        top_defects = [{"name": r.name, "severity": r.severity, "total": int(r.total)}
-                       for r in top_defects_rows]
-
-        # Last 10 inspections for activity feed
-        recent_rows = session.execute(
-            select(Inspection).order_by(Inspection.created_at.desc()).limit(10)
-        ).scalars().all()
-        recent = [
-            {
-                "id": r.id,
-                "batch_id": r.batch_id,
-                "status": r.status,
-                "defect_count": r.defect_count,
-                "created_at": r.created_at.isoformat() if r.created_at else None,
-            }
-            for r in recent_rows
-        ]
-
-        # Daily pass/fail for last 30 days (simplified counts)
-        from sqlalchemy import cast, Date
-        from datetime import date, timedelta
-        daily_rows = session.execute(
-            select(
-                cast(Inspection.created_at, Date).label('day'),
-                Inspection.status,
-                func.count().label('cnt')
-            )
-            .group_by(cast(Inspection.created_at, Date), Inspection.status)
-            .order_by(cast(Inspection.created_at, Date))
-        ).all()
-        trend = {}
-        for row in daily_rows:
-            day = str(row.day)
-            if day not in trend:
-                trend[day] = {"day": day, "pass": 0, "fail": 0, "pending": 0}
-            if row.status == 'pass':
-                trend[day]['pass'] = row.cnt
-            elif row.status == 'fail':
-                trend[day]['fail'] = row.cnt
-            else:
-                trend[day]['pending'] += row.cnt
-        trend_list = sorted(trend.values(), key=lambda x: x['day'])[-30:]
-
-        return {
-            "total_inspections": total,
-            "pass_count": passes,
-            "fail_count": fails,
-            "pending_count": pending,
-            "in_review_count": in_review,
-            "pass": passes,
-            "fail": fails,
-            "pending": pending,
-            "pass_rate": pass_rate,
-            "fail_rate": fail_rate,
-            "avg_defects_per_ins": avg_defects,
-            "avg_defects_per_inspection": avg_defects,
-            "total_defects": session.execute(select(func.sum(InspectionDefect.quantity)).select_from(InspectionDefect)).scalar() or 0,
-            "total_products": 0,
-            "total_operators": 0,
-            "top_defects": top_defects,
-            "recent_activity": recent,
-            "trend": trend_list,
+
+class StatsScope(NamedTuple):
+    """Optional window/filters for the dashboard; all None = global, all-time."""
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    product_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    # read inspections even where the rollup would do: the rollup trails the
+    # committed rows by the worker's lag (used for the live stream's snapshot)
+    committed: bool = False
+
+    @property
+    def uses_rollup(self) -> bool:
+        # the rollup has day x status x product granularity
+        return not self.committed and self.batch_id is None and all(
+            ts is None or ts.time() == time.min for ts in (self.start, self.end)
+        )
+
+    @property
+    def cache_key(self) -> str:
+        if self == StatsScope():
+            return STATS_CACHE_KEY
+        parts = [ts.isoformat() if ts else '' for ts in (self.start, self.end)]
+        return ':'.join([STATS_CACHE_KEY, *parts, self.product_id or '', self.batch_id or ''])
+
+    def filter_inspections(self, q):
+        if self.start:
+            q = q.where(Inspection.created_at >= self.start)
+        if self.end:
+            q = q.where(Inspection.created_at < self.end)
+        if self.product_id:
+            q = q.where(Inspection.batch_id_fk.in_(select(Batch.id).where(Batch.product_id == self.product_id)))
+        if self.batch_id:
+            q = q.where(Inspection.batch_id_fk == self.batch_id)
+        return q
+
+    def filter_rollup(self, q):
+        if self.start:
+            q = q.where(Rollup.day >= self.start.date())
+        if self.end:
+            q = q.where(Rollup.day < self.end.date())
+        if self.product_id:
+            q = q.where(Rollup.product_id == self.product_id)
+        return q
+
+    @property
+    def scoped(self) -> bool:
+        return any((self.start, self.end, self.product_id, self.batch_id))
+
+
+def _utc(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is None:
+        return None
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+async def _status_totals(session, scope: StatsScope) -> dict:
+    # one FILTER aggregate for the total, every status count and the average;
+    # day-aligned scopes read the daily rollup (a few hundred rows)
+    if scope.uses_rollup:
+        count, defects, status_col = Rollup.inspection_count, Rollup.defect_sum, Rollup.status
+        q = scope.filter_rollup(select(
+            func.sum(count).label('total'),
+            *(func.sum(count).filter(status_col == s).label(s) for s in STATUSES),
+            func.coalesce(func.sum(defects), 0).label('defect_count_sum'),
+        ))
+    else:
+        q = scope.filter_inspections(select(
+            func.count().label('total'),
+            *(func.count().filter(Inspection.status == s).label(s) for s in STATUSES),
+            func.coalesce(func.sum(Inspection.defect_count), 0).label('defect_count_sum'),
+        ).select_from(Inspection))
+    return (await session.execute(q)).one()._asdict()
+
+
+def _scoped_defects(q, scope: StatsScope):
+    if not scope.scoped:
+        return q
+    return scope.filter_inspections(q.join(Inspection, Inspection.id == InspectionDefect.inspection_id))
+
+
+async def _top_defects(session, scope: StatsScope) -> list:
+    rows = (await session.execute(_scoped_defects(
+        select(DefectType.name, DefectType.severity, func.sum(InspectionDefect.quantity).label('total'))
+        .join(InspectionDefect, InspectionDefect.defect_type_id == DefectType.id), scope)
+        .group_by(DefectType.id, DefectType.name, DefectType.severity)
+        .order_by(func.sum(InspectionDefect.quantity).desc())
+        .limit(5)
+    )).all()
+    return [{"name": r.name, "severity": r.severity, "total": int(r.total)} for r in rows]
+
+
+async def _recent_activity(session, scope: StatsScope) -> list:
+    rows = (await session.execute(scope.filter_inspections(
+        select(Inspection.id, Inspection.batch_id, Inspection.status,
+               Inspection.defect_count, Inspection.created_at))
+        .order_by(Inspection.created_at.desc()).limit(10)
+    )).all()
+    return [
+        {
+            "id": r.id,
+            "batch_id": r.batch_id,
+            "status": r.status,
+            "defect_count": r.defect_count,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
         }
-    finally:
-        session.close()
+        for r in rows
+    ]
+
+
+async def _trend(session, scope: StatsScope) -> list:
+    # Daily pass/fail for the last 30 days with data in scope
+    if scope.uses_rollup:
+        day, status_col, count = Rollup.day, Rollup.status, func.sum(Rollup.inspection_count)
+        filtered = scope.filter_rollup
+        base = select(day)
+    else:
+        day = rollup.day_expr(session.sync_session)
+        status_col, count = Inspection.status, func.count()
+        filtered = scope.filter_inspections
+        base = select(day).select_from(Inspection)
+    last_days = filtered(base).distinct().order_by(day.desc()).limit(30).subquery()
+    first_day = select(func.min(last_days.c[0])).scalar_subquery()
+    daily_rows = (await session.execute(
+        filtered(select(day.label('day'), status_col.label('status'), count.label('cnt')))
+        .where(day >= first_day)
+        .group_by(day, status_col)
+        .order_by(day)
+    )).all()
+    trend = {}
+    for row in daily_rows:
+        key = str(row.day)
+        if key not in trend:
+            trend[key] = {"day": key, "pass": 0, "fail": 0, "pending": 0}
+        if row.status == 'pass':
+            trend[key]['pass'] = row.cnt
+        elif row.status == 'fail':
+            trend[key]['fail'] = row.cnt
+        else:
+            trend[key]['pending'] += row.cnt
+    return sorted(trend.values(), key=lambda x: x['day'])
+
+
+async def _total_defects(session, scope: StatsScope) -> int:
+    return await session.scalar(_scoped_defects(select(func.sum(InspectionDefect.quantity)), scope)) or 0
+
+
+async def _in_own_session(query, scope: StatsScope):
+    # an AsyncSession runs one statement at a time, so each concurrent query
+    # gets its own pooled connection
+    async with get_async_session() as session:
+        return await query(session, scope)
+
+
+async def _rollup_populated() -> bool:
+    async with get_async_session() as session:
+        return (await session.execute(rollup.populated_query())).first() is not None
+
+
+async def compute_stats(scope: StatsScope = StatsScope()) -> dict:
+    if scope.uses_rollup and not await _rollup_populated():
+        # a fresh deploy: the rollup holds only what the worker has touched
+        # until its first full rebuild (see app/rollup.py)
+        scope = scope._replace(committed=True)
+    totals, top_defects, recent, trend_list, total_defects = await asyncio.gather(*(
+        _in_own_session(q, scope) for q in (_status_totals, _top_defects, _recent_activity, _trend, _total_defects)
+    ))
+    total = totals['total'] or 0
+    passes, fails = totals['pass'] or 0, totals['fail'] or 0
+    pending, in_review = totals['pending'] or 0, totals['in_review'] or 0
+    pass_rate = round(passes / total * 100, 1) if total > 0 else 0
+    fail_rate = round(fails / total * 100, 1) if total > 0 else 0
+    # SUM(defect_count) / COUNT(*), the same on the rollup and the live feed
+    # (webui/src/liveStats.js), which keeps both terms as running totals
+    defect_count_sum = int(totals['defect_count_sum'] or 0)
+    avg_defects = round(defect_count_sum / total, 2) if total > 0 else 0
+
+    return {
+        "total_inspections": total,
+        "pass_count": passes,
+        "fail_count": fails,
+        "pending_count": pending,
+        "in_review_count": in_review,
+        "pass": passes,
+        "fail": fails,
+        "pending": pending,
+        "pass_rate": pass_rate,
+        "fail_rate": fail_rate,
+        "avg_defects_per_ins": avg_defects,
+        "avg_defects_per_inspection": avg_defects,
+        "defect_count_sum": defect_count_sum,
+        "total_defects": total_defects,
+        "total_products": 0,
+        "total_operators": 0,
+        "top_defects": top_defects,
+        "recent_activity": recent,
+        "trend": trend_list,
+    }
+
+
+@router.get("/")
+async def get_stats(
+    from_: Optional[datetime] = Query(None, alias='from', description="Inclusive lower bound on created_at"),
+    to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    product_id: Optional[str] = Query(None),
+    batch_id: Optional[str] = Query(None),
+):
+    scope = StatsScope(_utc(from_), _utc(to), product_id, batch_id)
+    if scope.start and scope.end and scope.start >= scope.end:
+        raise HTTPException(422, "'from' must be before 'to'")
+    return await cache.get_or_compute(scope.cache_key, lambda: compute_stats(scope))
 
 
 @router.get("/summary")
-def get_summary():
+async def get_summary(
+    from_: Optional[datetime] = Query(None, alias='from'),
+    to: Optional[datetime] = Query(None),
+    product_id: Optional[str] = Query(None),
+    batch_id: Optional[str] = Query(None),
+):
     """Alias for / - used by dashboard."""
-    return get_stats()
+    return await get_stats(from_, to, product_id, batch_id)
+
+
+async def _stream_version() -> dict:
+    r = get_async_redis() if redis_health.available else None
+    async with get_async_session() as session:
+        xact = await outbox.commit_snapshot(session)
+        try:
+            version = await outbox.high_water(session, r)
+        except RedisError as exc:
+            redis_health.record_failure(exc)
+            version = await outbox.high_water(session, None)
+    return {'version': version, 'xact': xact}
+
+
+async def _snapshot_event() -> str:
+    # version first: a change committed in between is then at worst counted
+    # twice until the next snapshot, never missed
+    version = await _stream_version()
+    snapshot = await compute_stats(StatsScope(committed=True))
+    return f"event: snapshot\ndata: {json.dumps({**snapshot, **version}, default=str)}\n\n"
+
+
+@router.get("/stream")
+async def stream_stats(request: Request):
+    """Server-Sent Events: a `snapshot` event with fresh global stats, then one
+    message per change (see app/live.py) instead of re-polling.
+
+    The feed is subscribed before the snapshot is computed, so no change falls
+    between them, and the snapshot is read from the committed rows rather than
+    the cache or rollup. It carries `version`, the newest outbox event it
+    reflects, and on PostgreSQL `xact`, the transactions it sees; each delta
+    carries its event's `seq` and `txid`. Clients drop deltas the snapshot
+    already reflects (txid visible in `xact`, else seq at or below the
+    version; see app/outbox.py and webui/src/liveStats.js) and deltas they
+    have already applied (delivery is at-least-once). A new snapshot is sent on `resync` and every
+    SSE_SNAPSHOT_INTERVAL.
+    """
+    async def events():
+        loop = asyncio.get_running_loop()
+        queue = live.feed.subscribe()
+        try:
+            yield await _snapshot_event()
+            next_snapshot = loop.time() + SSE_SNAPSHOT_INTERVAL
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    data = None
+                # a delta that arrives as the snapshot is due is already in it
+                if data == live.RESYNC or loop.time() >= next_snapshot:
+                    yield await _snapshot_event()
+                    next_snapshot = loop.time() + SSE_SNAPSHOT_INTERVAL
+                elif data is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"data: {data}\n\n"
+        finally:
+            live.feed.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(), media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 
 @router.get("/audit-log")
-def get_audit_log(limit: int = Query(100, le=500)):
-    session = get_session()
-    try:
-        rows = session.execute(
-            select(WorkerAudit).order_by(WorkerAudit.created_at.desc()).limit(limit)
-        ).scalars().all()
-        return [
-            {
-                "id": r.id,
-                "event_type": r.event_type,
-                "inspection_id": r.inspection_id,
-                "worker_id": r.worker_id,
-                "status": r.status,
-                "message": r.message,
-                "item": r.item,
-                "created_at": r.created_at.isoformat() if r.created_at else None,
-            }
-            for r in rows
-        ]
-    finally:
-        session.close()
+async def get_audit_log(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    event_type: Optional[str] = Query(None),
+    inspection_id: Optional[str] = Query(None),
+    worker_id: Optional[str] = Query(None),
+    from_: Optional[datetime] = Query(None, alias='from', description="Inclusive lower bound on created_at"),
+    to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+):
+    """Worker audit rows newest first, keyset-paged on (created_at, id).
+
+    Each equality filter has a (column, created_at, id) index, so any page of
+    a filtered walk is an index range scan. The next page's cursor is returned
+    in the `X-Next-Cursor` response header.
+    """
+    q = select(WorkerAudit)
+    for column, value in ((WorkerAudit.event_type, event_type),
+                          (WorkerAudit.inspection_id, inspection_id),
+                          (WorkerAudit.worker_id, worker_id)):
+        if value is not None:
+            q = q.where(column == value)
+    if from_:
+        q = q.where(WorkerAudit.created_at >= _utc(from_))
+    if to:
+        q = q.where(WorkerAudit.created_at < _utc(to))
+    if cursor:
+        created_at, audit_id = decode_cursor(cursor, 2)
+        q = q.where(tuple_(WorkerAudit.created_at, WorkerAudit.id)
+                    < tuple_(parse_cursor_datetime(created_at), audit_id))
+    q = q.order_by(WorkerAudit.created_at.desc(), WorkerAudit.id.desc()).limit(limit + 1)
+    async with get_async_session() as session:
+        rows = (await session.scalars(q)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return [
+        {
+            "id": r.id,
+            "event_type": r.event_type,
+            "inspection_id": r.inspection_id,
+            "worker_id": r.worker_id,
+            "status": r.status,
+            "message": r.message,
+            "item": r.item,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+        }
+        for r in rows
+    ]
@@ -0,0 +1,83 @@
+"""Cache versioning for the batch quality view (GET /api/v1/batches/{id}/quality).
+
+Each batch has a version counter in Redis, and its cached quality payload is
+keyed by that version. So bumping the counter with `touch()` retires the
+cached copy at once. Nothing has to find and delete keys. The writers of a
+batch's child records call it after they commit:
+
+- inspections and their defects: `worker.py`, from the outbox events, via
+  `batches_for()`
+- signatures and sign-off documents: their routers, directly
+
+Cached payloads also expire after BATCH_QUALITY_CACHE_TTL, which bounds how
+stale a payload can get if a bump is lost while Redis is unavailable.
+"""
+import os
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.orm_models import Batch, Inspection, SignoffDocument
+from app.redis_client import get_async_redis, get_redis, redis_health
+
+CACHE_TTL = float(os.getenv('BATCH_QUALITY_CACHE_TTL', '300'))
+# outlives every cached payload, so a counter never restarts under a live key
+VERSION_TTL = 24 * 3600
+
+
+def _version_key(batch_id: str) -> str:
+    return f'batch:quality:ver:{batch_id}'
+
+
+async def cache_key(batch_id: str) -> str:
+    version = '0'
+    if redis_health.available:
+        try:
+            version = (await get_async_redis().get(_version_key(batch_id))) or '0'
+            redis_health.record_success()
+        except Exception as exc:
+            redis_health.record_failure(exc)
+    return f'batch:quality:{batch_id}:{version}'
+
+
+def touch(batch_ids: Iterable[Optional[str]]) -> None:
+    """Retire the cached quality view of each batch (best effort)."""
+    batch_ids = {b for b in batch_ids if b}
+    r = get_redis()
+    if not batch_ids or r is None:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        for batch_id in batch_ids:
+            pipe.incr(_version_key(batch_id))
+            pipe.expire(_version_key(batch_id), VERSION_TTL)
+        pipe.execute()
+        redis_health.record_success()
+    except Exception as exc:
+        redis_health.record_failure(exc)
+
+
+def touch_document(session: Session, doc: SignoffDocument) -> None:
+    """Retire the batch a sign-off document belongs to (by id or number)."""
+    batch_id = doc.batch_id
+    if not batch_id and doc.batch_number:
+        batch_id = session.scalar(select(Batch.id).where(Batch.batch_number == doc.batch_number))
+    touch([batch_id])
+
+
+def batches_for(session: Session, events: Iterable[dict]) -> Set[str]:
+    """Batches whose quality view a batch of parsed outbox events changes."""
+    batches, ids = set(), []
+    for ev in events:
+        if ev.get('type') == 'inspection.deleted':
+            if ev.get('batch_id'):
+                batches.add(ev['batch_id'])
+        elif ev.get('id'):
+            ids.append(ev['id'])
+    if ids:
+        batches.update(session.execute(
+            select(Inspection.batch_id_fk).distinct()
+            .where(Inspection.id.in_(ids), Inspection.batch_id_fk.is_not(None))
+        ).scalars())
+    return batches
@@ -0,0 +1,127 @@
+"""Shared Redis cache for expensive read endpoints (dashboard stats).
+
+`get_or_compute(key, compute)` layers three protections against a thundering
+herd of identical requests:
+
+- Redis holds the last result for `ttl` seconds (fresh) plus `stale_ttl`
+  seconds (stale). Fresh hits return immediately.
+- A stale hit is returned immediately too, and one background refresh is
+  started; a `SET NX PX` lock in Redis makes sure only one replica recomputes.
+  On a cold miss, callers on other replicas wait briefly for the lock holder's
+  result instead of computing it again.
+- Inside one process, concurrent callers for the same key await a single
+  in-flight computation.
+
+When Redis is unavailable (see `redis_health`) results are still coalesced
+in-process but not stored.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.redis_client import get_async_redis, redis_health
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '10'))
+CACHE_STALE_TTL = float(os.getenv('STATS_CACHE_STALE_TTL', '60'))
+# longest a recompute may hold the lock, and how long a cold miss waits on it
+LOCK_TTL = float(os.getenv('STATS_CACHE_LOCK_TTL', '30'))
+LOCK_WAIT = float(os.getenv('STATS_CACHE_LOCK_WAIT', '5'))
+
+_RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+_inflight: Dict[str, asyncio.Future] = {}
+_background: Set[asyncio.Task] = set()
+
+Compute = Callable[[], Awaitable[Any]]
+
+_MISS = object()
+
+
+def _redis():
+    return get_async_redis() if redis_health.available else None
+
+
+async def _call(coro, default=None):
+    """Await a Redis call; on failure record it and return `default`."""
+    try:
+        result = await coro
+    except Exception as exc:
+        redis_health.record_failure(exc)
+        return default
+    redis_health.record_success()
+    return result
+
+
+async def _read(r, key: str) -> Optional[dict]:
+    raw = await _call(r.get(key))
+    return json.loads(raw) if raw else None
+
+
+async def _write(r, key: str, value, ttl: float, stale_ttl: float):
+    entry = json.dumps({'at': time.time(), 'value': value}, separators=(',', ':'), default=str)
+    await _call(r.set(key, entry, px=int((ttl + stale_ttl) * 1000)))
+
+
+def _coalesced(key: str, compute: Compute) -> Awaitable:
+    fut = _inflight.get(key)
+    if fut is None:
+        fut = asyncio.ensure_future(compute())
+        _inflight[key] = fut
+        fut.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: one caller disconnecting must not cancel the shared computation
+    return asyncio.shield(fut)
+
+
+async def _recompute(r, key: str, compute: Compute, ttl: float, stale_ttl: float, wait: bool):
+    lock_key, token = f'{key}:lock', uuid.uuid4().hex
+    if await _call(r.set(lock_key, token, nx=True, px=int(LOCK_TTL * 1000))):
+        try:
+            value = await compute()
+            await _write(r, key, value, ttl, stale_ttl)
+            return value
+        finally:
+            await _call(r.eval(_RELEASE, 1, lock_key, token))
+    if not wait:
+        return _MISS
+    # another replica is computing a cold key: poll for its result
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline and redis_health.available:
+        await asyncio.sleep(0.05)
+        entry = await _read(r, key)
+        if entry is not None:
+            return entry['value']
+    return await compute()
+
+
+def _refresh_in_background(r, key: str, compute: Compute, ttl: float, stale_ttl: float):
+    refresh_key = f'{key}:refresh'
+    if refresh_key in _inflight:
+        return
+    task = asyncio.ensure_future(_coalesced(refresh_key, lambda: _recompute(r, key, compute, ttl, stale_ttl, wait=False)))
+    _background.add(task)
+
+    def _done(t):
+        _background.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning('Background refresh of %s failed: %s', key, t.exception())
+    task.add_done_callback(_done)
+
+
+async def get_or_compute(key: str, compute: Compute, ttl: float = CACHE_TTL, stale_ttl: float = CACHE_STALE_TTL):
+    r = _redis()
+    if r is None:
+        return await _coalesced(key, compute)
+    entry = await _read(r, key)
+    if entry is not None:
+        if time.time() - entry['at'] >= ttl:
+            _refresh_in_background(r, key, compute, ttl, stale_ttl)
+        return entry['value']
+    if not redis_health.available:
+        return await _coalesced(key, compute)
+    return await _coalesced(key, lambda: _recompute(r, key, compute, ttl, stale_ttl, wait=True))
@@ -0,0 +1,239 @@
+"""Bulk import of products and batches from CSV or NDJSON.
+
+Records are read from a file object one at a time and handled in chunks of
+`chunk_size`. Each chunk is validated in Python, product references (by id or
+SKU) are resolved with one set lookup, and the valid rows are written with a
+single multi-row INSERT ... ON CONFLICT DO UPDATE in their own transaction:
+
+- products upsert on `sku` (required for imports, since it is the ERP key)
+- batches upsert on `batch_number`
+
+Only the columns a record supplies are written on conflict, so re-importing
+a file with fewer columns leaves the others alone; on insert the missing
+columns take their defaults. Invalid rows are skipped and reported with
+their line number; the rest of the chunk still loads. So is a repeat of a key (sku / batch_number) already
+seen earlier in the same import: the first valid occurrence wins. Used by
+`POST /api/v1/{products,batches}/import` and scripts/import_catalog.py.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.ids import new_id
+from app.models.orm_models import Batch, Product
+
+DEFAULT_CHUNK_SIZE = 1000
+# per-row errors returned to the caller; the counts stay exact beyond this
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'ndjson')
+KINDS = ('products', 'batches')
+KEYS = {'products': 'sku', 'batches': 'batch_number'}
+
+Record = Tuple[int, dict]
+
+
+class ImportResult:
+    def __init__(self):
+        self.upserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        # key -> line it was first loaded from, to report repeats
+        self.seen: Dict[str, int] = {}
+
+    def error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self) -> dict:
+        return {'upserted': self.upserted, 'failed': self.failed, 'errors': self.errors}
+
+
+def read_records(fp: IO[bytes], fmt: str) -> Iterator[Record]:
+    """Yield (line number, record) pairs; unparseable lines become
+    `{'_error': ...}` records so they are reported like validation errors."""
+    text = io.TextIOWrapper(fp, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k.strip(): v for k, v in row.items() if k}
+        return
+    for n, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield n, {'_error': f'invalid JSON: {exc}'}
+            continue
+        yield n, record if isinstance(record, dict) else {'_error': 'expected a JSON object'}
+
+
+def _str(record: dict, field: str, max_len: int, required: bool = False) -> Optional[str]:
+    value = record.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise ValueError(f'{field} is required')
+        return None
+    value = str(value).strip()
+    if len(value) > max_len:
+        raise ValueError(f'{field} longer than {max_len} characters')
+    return value
+
+
+def _optional(record: dict, fields: Tuple[Tuple[str, int], ...]) -> dict:
+    # only the fields the record has (a CSV column, an NDJSON key): an absent
+    # field is left as is on update, a blank one is cleared
+    return {field: _str(record, field, max_len) for field, max_len in fields if field in record}
+
+
+def _product_row(record: dict) -> dict:
+    return {
+        'sku': _str(record, 'sku', 128, required=True),
+        'name': _str(record, 'name', 256, required=True),
+        **_optional(record, (('category', 128), ('description', 10_000))),
+    }
+
+
+def _batch_row(record: dict) -> dict:
+    row = {
+        'batch_number': _str(record, 'batch_number', 128, required=True),
+        **_optional(record, (('expiry_date', 32), ('notes', 10_000),
+                             # resolved against products below
+                             ('product_id', 64), ('product_sku', 128))),
+    }
+    if 'quantity' in record:
+        quantity = record['quantity']
+        try:
+            row['quantity'] = int(quantity) if quantity not in (None, '') else 0
+        except (TypeError, ValueError):
+            raise ValueError('quantity must be an integer')
+        if row['quantity'] < 0:
+            raise ValueError('quantity must be >= 0')
+    if 'production_date' in record:
+        production_date = _str(record, 'production_date', 64)
+        if production_date:
+            try:
+                production_date = datetime.fromisoformat(production_date)
+            except ValueError:
+                raise ValueError('production_date must be an ISO date')
+        row['production_date'] = production_date
+    if 'status' in record:
+        row['status'] = _str(record, 'status', 32) or 'active'
+    return row
+
+
+def _resolve_products(session: Session, rows: List[Tuple[int, dict]], result: ImportResult) -> List[Tuple[int, dict]]:
+    """Map product_id / product_sku to product ids with one query."""
+    ids = {r['product_id'] for _, r in rows if r.get('product_id')}
+    skus = {r['product_sku'] for _, r in rows if r.get('product_sku') and not r.get('product_id')}
+    known_ids, by_sku = set(), {}
+    if ids or skus:
+        for pid, sku in session.execute(
+            select(Product.id, Product.sku).where(or_(Product.id.in_(ids), Product.sku.in_(skus)))
+        ):
+            known_ids.add(pid)
+            by_sku[sku] = pid
+    resolved = []
+    for line, row in rows:
+        has_sku = 'product_sku' in row
+        sku = row.pop('product_sku', None)
+        if row.get('product_id') and row['product_id'] not in known_ids:
+            result.error(line, f"product {row['product_id']} not found")
+            continue
+        if not row.get('product_id') and sku:
+            if sku not in by_sku:
+                result.error(line, f'product with sku {sku} not found')
+                continue
+            row['product_id'] = by_sku[sku]
+        elif has_sku:
+            row.setdefault('product_id', None)
+        resolved.append((line, row))
+    return resolved
+
+
+def _upsert(session: Session, model, key: str, rows: List[dict], id_prefix: str):
+    insert = postgresql.insert if session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+    # keys are unique within `rows` (see _drop_repeats): ON CONFLICT cannot
+    # touch the same row twice in one statement. One statement per set of
+    # supplied columns, which updates only those; column defaults fill the
+    # rest on insert.
+    groups: Dict[Tuple[str, ...], List[dict]] = {}
+    for r in rows:
+        groups.setdefault(tuple(sorted(r)), []).append(r)
+    for columns, group in groups.items():
+        stmt = insert(model.__table__)
+        updates = {c: stmt.excluded[c] for c in columns if c != key}
+        stmt = (stmt.on_conflict_do_update(index_elements=[key], set_=updates) if updates
+                else stmt.on_conflict_do_nothing(index_elements=[key]))
+        session.execute(stmt, [{**r, 'id': new_id(id_prefix)} for r in group])
+    return len(rows)
+
+
+def _drop_repeats(kind: str, rows: List[Tuple[int, dict]], result: ImportResult) -> List[Tuple[int, dict]]:
+    key = KEYS[kind]
+    unique = []
+    for line, row in rows:
+        first = result.seen.setdefault(row[key], line)
+        if first != line:
+            result.error(line, f'duplicate {key} {row[key]} (first on line {first})')
+            continue
+        unique.append((line, row))
+    return unique
+
+
+def _load_chunk(session: Session, kind: str, chunk: List[Record], result: ImportResult):
+    build = _product_row if kind == 'products' else _batch_row
+    valid = []
+    for line, record in chunk:
+        if '_error' in record:
+            result.error(line, record['_error'])
+            continue
+        try:
+            valid.append((line, build(record)))
+        except ValueError as exc:
+            result.error(line, str(exc))
+    if kind == 'batches':
+        valid = _resolve_products(session, valid, result)
+    valid = _drop_repeats(kind, valid, result)
+    if not valid:
+        return
+    rows = [row for _, row in valid]
+    try:
+        if kind == 'products':
+            result.upserted += _upsert(session, Product, 'sku', rows, 'prod')
+        else:
+            result.upserted += _upsert(session, Batch, 'batch_number', rows, 'batch')
+        session.commit()
+    except Exception as exc:
+        session.rollback()
+        for line, _ in valid:
+            result.error(line, f'chunk rejected: {exc.__class__.__name__}')
+
+
+def import_catalog(session: Session, kind: str, fp: IO[bytes], fmt: str,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, log=None) -> ImportResult:
+    """Import `kind` ('products' or 'batches') records from `fp`."""
+    if kind not in KINDS:
+        raise ValueError(f'kind must be one of {KINDS}')
+    if fmt not in FORMATS:
+        raise ValueError(f'format must be one of {FORMATS}')
+    result = ImportResult()
+    chunk: List[Record] = []
+    for record in read_records(fp, fmt):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            _load_chunk(session, kind, chunk, result)
+            chunk = []
+            if log:
+                log(f'{result.upserted} upserted, {result.failed} failed')
+    if chunk:
+        _load_chunk(session, kind, chunk, result)
+    result.errors.sort(key=lambda e: e['line'])
+    return result
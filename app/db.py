@@ -1,5 +1,6 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./dev.db')
@@ -11,3 +12,58 @@ Base = declarative_base()
 
 def get_session():
     return SessionLocal()
+
+
+# ---------------------------------------------------------------------------
+# Async engine (asyncpg / aiosqlite) for routers declared `async def`.
+# Awaiting the database frees the event loop instead of pinning one of AnyIO's
+# 40 threadpool slots per in-flight query. Created lazily so importing this
+# module never requires the async driver.
+# ---------------------------------------------------------------------------
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'postgres': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+ASYNC_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', '20'))
+ASYNC_MAX_OVERFLOW = int(os.getenv('ASYNC_DB_MAX_OVERFLOW', '10'))
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """Map a sync DATABASE_URL onto its async driver (psycopg2 -> asyncpg)."""
+    u = make_url(url)
+    backend = u.drivername.split('+')[0]
+    u = u.set(drivername=ASYNC_DRIVERS.get(backend, u.drivername))
+    if backend.startswith('postgres') and 'sslmode' in u.query:
+        # asyncpg spells libpq's sslmode as ssl
+        u = u.difference_update_query(['sslmode']).update_query_dict({'ssl': u.query['sslmode']})
+    return u.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL') or async_database_url()
+
+_async_sessionmaker = None
+
+
+def get_async_engine():
+    return _get_async_sessionmaker().kw['bind']
+
+
+def _get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        kwargs = {}
+        if not ASYNC_DATABASE_URL.startswith('sqlite'):
+            kwargs = dict(pool_size=ASYNC_POOL_SIZE, max_overflow=ASYNC_MAX_OVERFLOW, pool_pre_ping=True)
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, **kwargs)
+        _async_sessionmaker = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+
+def get_async_session():
+    """Return an AsyncSession; use as `async with get_async_session() as session:`."""
+    return _get_async_sessionmaker()()
+
+
+async def dispose_async_engine():
+    global _async_sessionmaker
+    if _async_sessionmaker is not None:
+        await get_async_engine().dispose()
+        _async_sessionmaker = None
@@ -0,0 +1,83 @@
+"""SQL-side maintenance of `inspections.defect_count`.
+
+`defect_count` is a denormalised SUM(quantity) over the inspection's
+`inspection_defects` rows. Writers adjust it with `apply_deltas` (an in-place
+`defect_count = defect_count + :delta`, never a Python read-modify-write), and
+`reconcile` recomputes it from `inspection_defects` in keyset-ordered chunks to
+repair drift from older code paths or manual edits.
+
+Inspections may also be created with a `defect_count` and no itemised defect
+rows; `reconcile` leaves those alone, since there is nothing to recompute from.
+"""
+from typing import Dict
+
+from sqlalchemy import bindparam, case, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.orm_models import Inspection, InspectionDefect
+
+DEFAULT_CHUNK_SIZE = 1000
+
+_inspections = Inspection.__table__
+
+
+def apply_deltas(session: Session, deltas: Dict[str, int]) -> int:
+    """Add `deltas[inspection_id]` to each inspection's defect_count, floored at 0.
+
+    Rows are updated in id order so concurrent bulk writers touching
+    overlapping inspections take row locks in the same order, provided this
+    is their first write to those rows (bulk_attach_defects calls it before
+    inserting the defect rows). Returns the
+    driver rowcount, which is exact for a single inspection (DBAPI
+    executemany rowcounts are not).
+    """
+    params = [{'ins_id': ins_id, 'delta': delta} for ins_id, delta in sorted(deltas.items())]
+    if not params:
+        return 0
+    adjusted = func.coalesce(_inspections.c.defect_count, 0) + bindparam('delta')
+    stmt = (
+        update(_inspections)
+        .where(_inspections.c.id == bindparam('ins_id'))
+        .values(defect_count=case((adjusted < 0, 0), else_=adjusted))
+    )
+    return session.execute(stmt, params).rowcount
+
+
+def reconcile(session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE, log=None) -> int:
+    """Recompute defect_count for every inspection with defect rows; returns
+    how many were wrong.
+
+    Each chunk locks its inspection rows first, so the UPDATE's fresh snapshot
+    sees every committed attachment and in-flight writers apply their
+    increment on top of the corrected value after we commit.
+    """
+    actual = (
+        select(func.coalesce(func.sum(InspectionDefect.quantity), 0))
+        .where(InspectionDefect.inspection_id == _inspections.c.id)
+        .scalar_subquery()
+    )
+    fixed = 0
+    last_id = ''
+    while True:
+        ids = session.execute(
+            select(_inspections.c.id)
+            .where(_inspections.c.id > last_id)
+            .order_by(_inspections.c.id)
+            .limit(chunk_size)
+            .with_for_update()
+        ).scalars().all()
+        if not ids:
+            break
+        result = session.execute(
+            update(_inspections)
+            .where(_inspections.c.id.in_(ids),
+                   exists().where(InspectionDefect.inspection_id == _inspections.c.id),
+                   func.coalesce(_inspections.c.defect_count, -1) != actual)
+            .values(defect_count=actual)
+        )
+        session.commit()
+        fixed += result.rowcount
+        last_id = ids[-1]
+        if log:
+            log(f'checked through {last_id}: {fixed} corrected so far')
+    return fixed
@@ -0,0 +1,43 @@
+"""Time-ordered primary keys.
+
+`new_id('ins')` -> `ins-<12 hex ms timestamp><4 hex sequence><12 hex random>`.
+
+IDs minted later sort after earlier ones (UUIDv7-style: 48-bit Unix
+millisecond timestamp first), so B-tree inserts append to the right-most
+index page instead of splitting random pages across the whole index. The
+sequence keeps IDs strictly increasing within one process even inside a
+single millisecond; the random tail keeps concurrent processes distinct.
+"""
+import os
+import threading
+import time
+
+_lock = threading.Lock()
+_last_ms = 0
+_seq = 0
+
+# sequence starts at a random point in the lower half of its range each
+# millisecond, leaving 32k IDs of headroom before borrowing the next tick
+_SEQ_START_MASK = 0x7FFF
+_SEQ_MAX = 0xFFFF
+
+
+def _next_tick() -> tuple:
+    global _last_ms, _seq
+    with _lock:
+        now = time.time_ns() // 1_000_000
+        if now > _last_ms:
+            _last_ms = now
+            _seq = int.from_bytes(os.urandom(2), 'big') & _SEQ_START_MASK
+        elif _seq < _SEQ_MAX:
+            _seq += 1
+        else:
+            # sequence exhausted (or clock stepped back): borrow the next ms
+            _last_ms += 1
+            _seq = int.from_bytes(os.urandom(2), 'big') & _SEQ_START_MASK
+        return _last_ms, _seq
+
+
+def new_id(prefix: str) -> str:
+    ms, seq = _next_tick()
+    return f"{prefix}-{ms:012x}{seq:04x}{os.urandom(6).hex()}"
@@ -0,0 +1,125 @@
+"""Resolve inspections' legacy text references to the batch/operator foreign keys.
+
+`inspections.batch_id` / `operator_id` are free text from the original schema.
+`batch_id_fk` / `operator_id_fk` point at the rows they name, and they are
+what the routers, stats, rollup and scorecards join and filter on, since only
+they are indexed. A legacy value resolves to the batch (operator) with that
+id, or failing that with that batch_number (employee_id). Values that match
+nothing leave the FK NULL.
+
+Writers fill the FKs on insert (`batch_ref` / `operator_ref` for one row,
+`resolve_batches` / `resolve_operators` for a set); readers filter with
+`batch_filter` / `operator_filter`. `backfill` fills older
+rows in short keyset-ordered chunks; see scripts/backfill_inspection_fks.py.
+"""
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.orm_models import Batch, Inspection, Operator
+
+DEFAULT_CHUNK_SIZE = 1000
+
+_inspections = Inspection.__table__
+
+
+def batch_ref(value):
+    """SQL expression for the batch id a legacy batch_id (value or column) names."""
+    if value is None:
+        return None
+    return func.coalesce(
+        select(Batch.id).where(Batch.id == value).scalar_subquery(),
+        select(Batch.id).where(Batch.batch_number == value).scalar_subquery(),
+    )
+
+
+def operator_ref(value):
+    """SQL expression for the operator id a legacy operator_id names."""
+    if value is None:
+        return None
+    return func.coalesce(
+        select(Operator.id).where(Operator.id == value).scalar_subquery(),
+        select(Operator.id).where(Operator.employee_id == value).scalar_subquery(),
+    )
+
+
+def _resolve(session: Session, id_col, alt_col, values: Iterable[Optional[str]]) -> Dict[str, str]:
+    values = {v for v in values if v}
+    if not values:
+        return {}
+    by_id, by_alt = {}, {}
+    for row_id, alt in session.execute(
+        select(id_col, alt_col).where(or_(id_col.in_(values), alt_col.in_(values)))
+    ):
+        by_id[row_id] = row_id
+        if alt is not None:
+            by_alt[alt] = row_id
+    return {v: by_id.get(v) or by_alt[v] for v in values if v in by_id or v in by_alt}
+
+
+def resolve_batches(session: Session, values: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Map legacy batch_id values to batch ids with one query."""
+    return _resolve(session, Batch.id, Batch.batch_number, values)
+
+
+def resolve_operators(session: Session, values: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Map legacy operator_id values to operator ids with one query."""
+    return _resolve(session, Operator.id, Operator.employee_id, values)
+
+
+def batch_filter(session: Session, value: str):
+    """Predicate for the inspections of the batch `value` names.
+
+    Matches batch_id_fk when `value` resolves to a batch; a value naming no
+    batch falls back to the legacy batch_id text, as before the FKs.
+    """
+    batch = resolve_batches(session, [value]).get(value)
+    return Inspection.batch_id_fk == batch if batch is not None else Inspection.batch_id == value
+
+
+def operator_filter(session: Session, value: str):
+    """Predicate for the inspections of the operator `value` names; see `batch_filter`."""
+    operator = resolve_operators(session, [value]).get(value)
+    return Inspection.operator_id_fk == operator if operator is not None else Inspection.operator_id == value
+
+
+def backfill(session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE, log=None) -> int:
+    """Fill NULL batch_id_fk / operator_id_fk from the legacy columns.
+
+    Walks inspections in id order, one short transaction per chunk, so it can
+    run while the app is live. Returns the number of rows updated.
+    """
+    batch = batch_ref(_inspections.c.batch_id)
+    operator = operator_ref(_inspections.c.operator_id)
+    # only rows that gain a reference, so unresolvable legacy values are not
+    # rewritten on every run
+    missing = or_(
+        _inspections.c.batch_id_fk.is_(None) & batch.is_not(None),
+        _inspections.c.operator_id_fk.is_(None) & operator.is_not(None),
+    )
+    filled = 0
+    last_id = ''
+    while True:
+        ids = session.execute(
+            select(_inspections.c.id)
+            .where(_inspections.c.id > last_id)
+            .order_by(_inspections.c.id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            break
+        result = session.execute(
+            update(_inspections)
+            .where(_inspections.c.id.in_(ids), missing)
+            .values(
+                batch_id_fk=func.coalesce(_inspections.c.batch_id_fk, batch),
+                operator_id_fk=func.coalesce(_inspections.c.operator_id_fk, operator),
+            )
+        )
+        session.commit()
+        filled += result.rowcount
+        last_id = ids[-1]
+        if log:
+            log(f'checked through {last_id}: {filled} updated so far')
+    return filled
@@ -0,0 +1,91 @@
+"""Live dashboard deltas over Redis pub/sub, served as Server-Sent Events.
+
+The worker publishes one small JSON delta on `LIVE_CHANNEL` for every outbox
+event it processes (inspection created / status changed / defects changed /
+deleted), i.e. only after the change has committed. Each web process runs a
+single subscriber that fans the messages out to its SSE clients' in-memory
+queues, so open dashboards cost one Redis connection per process rather than
+one per screen, and nobody re-runs the stats aggregates to stay current.
+
+Each delta carries its outbox event's `seq` (see app/outbox.py). A client
+whose queue overflows, or any client while the subscriber is reconnecting,
+receives a `resync` message, on which the SSE endpoint sends a fresh snapshot.
+"""
+import asyncio
+import json
+import logging
+from typing import Iterable, Optional, Set
+
+from app.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+LIVE_CHANNEL = 'stats:live'
+CLIENT_QUEUE_SIZE = 256
+RESYNC = json.dumps({'type': 'resync'})
+
+
+def publish(r, deltas: Iterable[dict]) -> int:
+    """Publish deltas from a sync client (the worker) in one round trip."""
+    pipe = r.pipeline(transaction=False)
+    n = 0
+    for delta in deltas:
+        pipe.publish(LIVE_CHANNEL, json.dumps(delta, separators=(',', ':'), default=str))
+        n += 1
+    if n:
+        pipe.execute()
+    return n
+
+
+class LiveFeed:
+    def __init__(self):
+        self._clients: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self._clients.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._clients.discard(queue)
+        if not self._clients and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _fan_out(self, data: str):
+        for queue in list(self._clients):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                # slow client: drop its backlog and tell it to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    async def _run(self):
+        while True:
+            pubsub = get_async_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(LIVE_CHANNEL)
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message:
+                        self._fan_out(message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning('Live feed subscriber disconnected: %s', exc)
+                # deltas published while we reconnect are lost
+                self._fan_out(RESYNC)
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
+
+feed = LiveFeed()
@@ -41,6 +41,7 @@ except Exception:
     CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
 
 from redis.asyncio import Redis
+from app.redis_client import WORKER_QUEUE, get_async_redis, close_async_redis, close_redis, redis_health
 
 app = FastAPI(title="Quality Control Monolith", version="0.1.0")
 
@@ -240,14 +241,67 @@ async def startup_event():
             "ALTER TABLE users ADD COLUMN IF NOT EXISTS approval_status VARCHAR(32) DEFAULT 'approved'",
             "ALTER TABLE users ADD COLUMN IF NOT EXISTS approved_by VARCHAR(64)",
             "ALTER TABLE users ADD COLUMN IF NOT EXISTS approved_at TIMESTAMPTZ",
+            "CREATE INDEX IF NOT EXISTS ix_inspections_created_at_id ON inspections (created_at, id)",
+            """CREATE TABLE IF NOT EXISTS outbox_events (
+                id BIGSERIAL PRIMARY KEY,
+                queue VARCHAR(128) NOT NULL DEFAULT 'worker:queue',
+                item TEXT NOT NULL,
+                created_at TIMESTAMPTZ DEFAULT NOW()
+            )""",
+            "ALTER TABLE outbox_events ADD COLUMN IF NOT EXISTS txid BIGINT",
+            "CREATE INDEX IF NOT EXISTS ix_inspection_defects_inspection_id ON inspection_defects (inspection_id)",
+            "CREATE INDEX IF NOT EXISTS ix_inspections_batch_id_fk ON inspections (batch_id_fk)",
+            "CREATE INDEX IF NOT EXISTS ix_worker_audit_created_at_id ON worker_audit (created_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_worker_audit_event_type_created_at_id ON worker_audit (event_type, created_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_worker_audit_inspection_id_created_at_id ON worker_audit (inspection_id, created_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_worker_audit_worker_id_created_at_id ON worker_audit (worker_id, created_at, id)",
+            """CREATE TABLE IF NOT EXISTS daily_inspection_rollup (
+                day DATE NOT NULL,
+                status VARCHAR(32) NOT NULL,
+                product_id VARCHAR(64) NOT NULL DEFAULT '',
+                inspection_count INTEGER NOT NULL DEFAULT 0,
+                defect_sum INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ DEFAULT NOW(),
+                PRIMARY KEY (day, status, product_id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS rollup_state (
+                name VARCHAR(64) PRIMARY KEY,
+                populated_at TIMESTAMPTZ DEFAULT NOW()
+            )""",
+            "ALTER TABLE inspections ADD COLUMN IF NOT EXISTS finalized_at TIMESTAMPTZ",
+            "CREATE INDEX IF NOT EXISTS ix_inspections_operator_id_fk_created_at ON inspections (operator_id_fk, created_at)",
+            "DROP INDEX IF EXISTS ix_inspections_operator_id_created_at",
+            """CREATE TABLE IF NOT EXISTS operator_scorecards (
+                operator_id VARCHAR(128) NOT NULL,
+                window_days INTEGER NOT NULL,
+                inspections INTEGER NOT NULL DEFAULT 0,
+                shifts INTEGER NOT NULL DEFAULT 0,
+                passes INTEGER NOT NULL DEFAULT 0,
+                defect_sum INTEGER NOT NULL DEFAULT 0,
+                finalized INTEGER NOT NULL DEFAULT 0,
+                seconds_to_final DOUBLE PRECISION NOT NULL DEFAULT 0,
+                refreshed_at TIMESTAMPTZ DEFAULT NOW(),
+                PRIMARY KEY (operator_id, window_days)
+            )""",
+            "CREATE INDEX IF NOT EXISTS ix_operator_scorecards_window_days ON operator_scorecards (window_days)",
+            "CREATE INDEX IF NOT EXISTS ix_products_name_id ON products (name, id)",
+            "CREATE INDEX IF NOT EXISTS ix_batches_created_at_id ON batches (created_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_batches_product_id_created_at_id ON batches (product_id, created_at, id)",
+            # pg_trgm may need elevated privileges; if it is refused these
+            # fail on their own (each statement autocommits, see below)
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX IF NOT EXISTS ix_inspections_id_trgm ON inspections USING gin (id gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS ix_inspections_batch_id_trgm ON inspections USING gin (batch_id gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS ix_inspections_operator_id_trgm ON inspections USING gin (operator_id gin_trgm_ops)",
         ]
-        with _engine.connect() as _conn:
+        # AUTOCOMMIT: on PostgreSQL one failed statement would otherwise abort
+        # the shared transaction and roll back every statement with it
+        with _engine.connect().execution_options(isolation_level='AUTOCOMMIT') as _conn:
             for _stmt in _all_ddl:
                 try:
                     _conn.execute(_text(_stmt))
                 except Exception as _e:
                     print(f'[startup] DDL note (ok): {str(_e)[:120]}')
-            _conn.commit()
         print('[startup] All tables ensured')
     except Exception as _tbl_err:
         print(f'[startup] Table creation warning: {_tbl_err}')
@@ -258,12 +312,12 @@ async def startup_event():
         from app.models.orm_models import User
         from sqlalchemy import select
         from app.api.v1.auth import _hash_password
-        import uuid as _uuid
+        from app.ids import new_id as _new_id
         _s = get_session()
         existing = _s.execute(select(User).where(User.username == 'admin')).scalars().first()
         if not existing:
             _s.add(User(
-                id=f"usr-{_uuid.uuid4().hex[:12]}",
+                id=_new_id('usr'),
                 username='admin',
                 hashed_password=_hash_password('admin123'),
                 full_name='System Admin',
@@ -280,28 +334,21 @@ async def startup_event():
 
 
     global redis_client
-    # Support both a REDIS_URL (Render-managed Redis) or REDIS_HOST/REDIS_PORT env vars
-    redis_url = os.getenv("REDIS_URL")
-    if redis_url:
-        # when running on Render the managed Redis service commonly exposes a REDIS_URL
-        try:
-            redis_client = Redis.from_url(redis_url, decode_responses=True)
-        except Exception:
-            # fallback to host/port if parsing fails
-            redis_host = os.getenv("REDIS_HOST", "localhost")
-            redis_port = int(os.getenv("REDIS_PORT", "6379"))
-            redis_client = Redis(host=redis_host, port=redis_port, decode_responses=True)
-    else:
-        redis_host = os.getenv("REDIS_HOST", "localhost")
-        redis_port = int(os.getenv("REDIS_PORT", "6379"))
-        redis_client = Redis(host=redis_host, port=redis_port, decode_responses=True)
+    # Shared pooled client; honours REDIS_URL (Render-managed Redis) or REDIS_HOST/REDIS_PORT
+    redis_client = get_async_redis()
+    defects.start_catalogue_listener()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     global redis_client
+    defects.stop_catalogue_listener()
     if redis_client:
-        await redis_client.close()
+        await close_async_redis()
+        redis_client = None
+    close_redis()
+    from app.db import dispose_async_engine
+    await dispose_async_engine()
 
 
 @app.middleware("http")
@@ -326,7 +373,7 @@ async def metrics():
     # Update queue length gauge from Redis before returning metrics
     try:
         if redis_client:
-            length = await redis_client.llen('worker:queue')
+            length = await redis_client.llen(WORKER_QUEUE)
             WORKER_QUEUE_LENGTH.set(int(length))
     except Exception:
         # If Redis not available, leave gauge as-is
@@ -358,23 +405,17 @@ async def latest_audit(n: int = 10):
     """Return the last `n` rows from worker_audit table. This is a dev-only
     convenience endpoint to verify worker processing and DB writes.
     """
-    # Keep imports local to avoid import-time failures in environments
-    # where psycopg2 isn't installed (we already guard health checks similarly).
+    from sqlalchemy import select as _select
+    from app.db import get_async_session
+    from app.models.orm_models import WorkerAudit
     try:
-        import os as _os
-        import psycopg2 as _psycopg2
-        DATABASE_URL = _os.getenv('DATABASE_URL')
-        if not DATABASE_URL:
-            return JSONResponse({'error': 'DATABASE_URL not configured'}, status_code=400)
-
-        conn = _psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute('SELECT id, item, processed_at FROM worker_audit ORDER BY processed_at DESC LIMIT %s', (n,))
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-
-        results = [{'id': r[0], 'item': r[1], 'processed_at': r[2].isoformat() if r[2] is not None else None} for r in rows]
+        async with get_async_session() as session:
+            rows = (await session.execute(
+                _select(WorkerAudit.id, WorkerAudit.item, WorkerAudit.processed_at)
+                .order_by(WorkerAudit.created_at.desc(), WorkerAudit.id.desc())
+                .limit(n)
+            )).all()
+        results = [{'id': r.id, 'item': r.item, 'processed_at': r.processed_at.isoformat() if r.processed_at is not None else None} for r in rows]
         return JSONResponse(results)
     except Exception as ex:
         return JSONResponse({'error': str(type(ex).__name__), 'detail': str(ex)}, status_code=500)
@@ -394,10 +435,12 @@ async def health():
         if redis_client:
             pong = await redis_client.ping()
             checks["redis"] = "ok" if pong else "error"
+            redis_health.record_success()
         else:
             checks["redis"] = "not-configured"
     except Exception as ex:
         checks["redis"] = f"error: {type(ex).__name__}"
+        redis_health.record_failure(ex)
         status_code = 503
 
     # Postgres check (lightweight)
@@ -428,8 +471,8 @@ async def dev_queue_push(item: str = "x"):
     """Push an item to the Redis-backed worker queue for testing autoscaling."""
     if not redis_client:
         return {'error': 'redis not configured'}
-    await redis_client.rpush('worker:queue', item)
-    length = await redis_client.llen('worker:queue')
+    await redis_client.rpush(WORKER_QUEUE, item)
+    length = await redis_client.llen(WORKER_QUEUE)
     WORKER_QUEUE_LENGTH.set(int(length))
     return {'queue': length}
 
@@ -439,7 +482,7 @@ async def dev_queue_pop():
     """Pop an item from the Redis-backed worker queue."""
     if not redis_client:
         return {'error': 'redis not configured'}
-    item = await redis_client.lpop('worker:queue')
-    length = await redis_client.llen('worker:queue')
+    item = await redis_client.lpop(WORKER_QUEUE)
+    length = await redis_client.llen(WORKER_QUEUE)
     WORKER_QUEUE_LENGTH.set(int(length))
     return {'popped': item, 'queue': length}
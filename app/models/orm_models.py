@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, String, Integer, Text, DateTime, Boolean, ForeignKey, Float
+    Column, String, Integer, BigInteger, Text, Date, DateTime, Boolean, ForeignKey, Float, Index, text
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -21,6 +21,11 @@ class Product(Base):
 
     batches = relationship('Batch', back_populates='product')
 
+    __table_args__ = (
+        # keyset pagination of list_products
+        Index('ix_products_name_id', 'name', 'id'),
+    )
+
 
 # ---------------------------------------------------------------------------
 # Batches
@@ -40,6 +45,12 @@ class Batch(Base):
     product = relationship('Product', back_populates='batches')
     inspections = relationship('Inspection', back_populates='batch')
 
+    __table_args__ = (
+        # keyset pagination of list_batches, overall and per product
+        Index('ix_batches_created_at_id', 'created_at', 'id'),
+        Index('ix_batches_product_id_created_at_id', 'product_id', 'created_at', 'id'),
+    )
+
 
 # ---------------------------------------------------------------------------
 # Operators
@@ -94,12 +105,23 @@ class Inspection(Base):
     severity = Column(String(32), nullable=True, default='minor')
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # when the inspection last entered a final status (pass/fail/conditional_pass)
+    finalized_at = Column(DateTime(timezone=True), nullable=True)
 
     batch = relationship('Batch', back_populates='inspections')
     operator = relationship('Operator', back_populates='inspections')
     defects = relationship('InspectionDefect', back_populates='inspection')
     signatures = relationship('Signature', back_populates='inspection')
 
+    __table_args__ = (
+        # keyset pagination: ORDER BY created_at DESC, id DESC
+        Index('ix_inspections_created_at_id', 'created_at', 'id'),
+        # batch-scoped stats and listings
+        Index('ix_inspections_batch_id_fk', 'batch_id_fk'),
+        # operator lookups/stats and per-operator scorecard refresh
+        Index('ix_inspections_operator_id_fk_created_at', 'operator_id_fk', 'created_at'),
+    )
+
 
 # ---------------------------------------------------------------------------
 # Inspection <-> Defect  (many-to-many join)
@@ -116,6 +138,11 @@ class InspectionDefect(Base):
     inspection = relationship('Inspection', back_populates='defects')
     defect_type = relationship('DefectType', back_populates='inspection_defects')
 
+    __table_args__ = (
+        # per-inspection listing and defect_count reconciliation
+        Index('ix_inspection_defects_inspection_id', 'inspection_id'),
+    )
+
 
 # ---------------------------------------------------------------------------
 # Signatures
@@ -137,6 +164,13 @@ class Signature(Base):
     inspection = relationship('Inspection', back_populates='signatures')
     signer = relationship('Operator', back_populates='signatures')
 
+    __table_args__ = (
+        # one active signature per role: sign_inspection relies on this to
+        # reject concurrent duplicates
+        Index('uq_signatures_active_role', 'inspection_id', 'signer_role', unique=True,
+              postgresql_where=text('NOT revoked'), sqlite_where=text('NOT revoked')),
+    )
+
 
 # ---------------------------------------------------------------------------
 # Auth Users
@@ -226,3 +260,68 @@ class WorkerAudit(Base):
     item = Column(Text, nullable=True)
     processed_at = Column(DateTime(timezone=True), server_default=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # keyset pagination of the audit log, unfiltered and per filter
+        Index('ix_worker_audit_created_at_id', 'created_at', 'id'),
+        Index('ix_worker_audit_event_type_created_at_id', 'event_type', 'created_at', 'id'),
+        Index('ix_worker_audit_inspection_id_created_at_id', 'inspection_id', 'created_at', 'id'),
+        Index('ix_worker_audit_worker_id_created_at_id', 'worker_id', 'created_at', 'id'),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Transactional outbox (rows written with the business change, relayed to Redis)
+# ---------------------------------------------------------------------------
+class OutboxEvent(Base):
+    __tablename__ = 'outbox_events'
+    # ids double as event sequence numbers (app/outbox.py), so SQLite must not
+    # reuse them once relayed rows are deleted
+    __table_args__ = {'sqlite_autoincrement': True}
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    queue = Column(String(128), nullable=False, default='worker:queue')
+    item = Column(Text, nullable=False)
+    # PostgreSQL id of the writing transaction (NULL on SQLite), see app/outbox.py
+    txid = Column(BigInteger, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# ---------------------------------------------------------------------------
+# Daily quality rollup (maintained by the worker, see app/rollup.py)
+# ---------------------------------------------------------------------------
+class DailyInspectionRollup(Base):
+    __tablename__ = 'daily_inspection_rollup'
+    day = Column(Date, primary_key=True)
+    status = Column(String(32), primary_key=True)
+    # '' when the inspection has no batch/product
+    product_id = Column(String(64), primary_key=True, default='')
+    inspection_count = Column(Integer, nullable=False, default=0)
+    defect_sum = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RollupState(Base):
+    # one row per rollup table once it covers all history (app/rollup.py)
+    __tablename__ = 'rollup_state'
+    name = Column(String(64), primary_key=True)
+    populated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# ---------------------------------------------------------------------------
+# Operator scorecards (precomputed by the worker, see app/scorecards.py)
+# ---------------------------------------------------------------------------
+class OperatorScorecard(Base):
+    __tablename__ = 'operator_scorecards'
+    operator_id = Column(String(128), primary_key=True)
+    window_days = Column(Integer, primary_key=True)
+    inspections = Column(Integer, nullable=False, default=0)
+    shifts = Column(Integer, nullable=False, default=0)
+    passes = Column(Integer, nullable=False, default=0)
+    defect_sum = Column(Integer, nullable=False, default=0)
+    finalized = Column(Integer, nullable=False, default=0)
+    seconds_to_final = Column(Float, nullable=False, default=0)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_operator_scorecards_window_days', 'window_days'),
+    )
@@ -0,0 +1,126 @@
+"""Transactional outbox for events bound for the Redis worker queue.
+
+Routers call `enqueue()` inside the same session/transaction as the change
+that produced the event, so the event is committed iff the change is. The
+worker's relay (`relay_batch`) later moves committed rows to Redis in batches
+and deletes them, which keeps Redis entirely off the request path. Delivery is
+at-least-once: a crash between the Redis push and the DELETE commit replays
+that batch.
+
+The relay stamps each event with its outbox row id as `seq`, so a replayed
+event keeps its identity and consumers (the live dashboard) can drop
+duplicates. It also records the highest id relayed under RELAYED_KEY; together
+with the pending rows that gives `high_water()`, the newest committed event.
+
+Ids are assigned at insert, not at commit, so on PostgreSQL a transaction can
+commit an event with a lower id after a higher one has been relayed, and "seq
+at or below the high water" does not mean "already committed". There each
+event also carries `txid`, its writing transaction's id, and
+`commit_snapshot()` returns the transactions a read at that moment sees: an
+event is reflected in the read iff its txid is visible in that snapshot.
+SQLite serializes writers, so there ids are in commit order and the high
+water alone is exact.
+"""
+import json
+from typing import Iterable, Optional
+
+from sqlalchemy import BigInteger, Text, cast, delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.models.orm_models import OutboxEvent
+from app.redis_client import WORKER_QUEUE
+
+# sorted set holding the highest outbox id relayed so far (ZADD GT keeps the max)
+RELAYED_KEY = 'outbox:relayed'
+
+
+def event(event_type: str, **fields) -> str:
+    """Serialize a typed event for the worker queue.
+
+    Bare strings on the queue are legacy inspection-created events (the id);
+    everything newer is a JSON object with a `type`.
+    """
+    return json.dumps({'type': event_type, **fields}, separators=(',', ':'), default=str)
+
+
+def parse_event(item: str) -> dict:
+    """Inverse of `event()`; legacy bare ids become inspection.created events."""
+    if item.startswith('{'):
+        try:
+            return json.loads(item)
+        except ValueError:
+            pass
+    return {'type': 'inspection.created', 'id': item}
+
+
+def stamp(item: str, seq: int, txid: Optional[int] = None) -> str:
+    """Add the outbox row id to an event as `seq` (and its `txid`, if any)."""
+    stamped = {**parse_event(item), 'seq': seq}
+    if txid is not None:
+        stamped['txid'] = txid
+    return json.dumps(stamped, separators=(',', ':'), default=str)
+
+
+def enqueue(session: Session, items: Iterable[str], queue: str = WORKER_QUEUE) -> None:
+    rows = [{'queue': queue, 'item': item} for item in items]
+    if rows:
+        stmt = insert(OutboxEvent)
+        if session.get_bind().dialect.name == 'postgresql':
+            stmt = stmt.values(txid=cast(cast(func.pg_current_xact_id(), Text), BigInteger))
+        session.execute(stmt, rows)
+
+
+def relay_batch(session: Session, r, batch_size: int = 500) -> int:
+    """Push up to `batch_size` pending events in one pipelined round trip.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED so several workers can relay
+    concurrently without double-sending. Returns the number relayed.
+    """
+    rows = session.execute(
+        select(OutboxEvent.id, OutboxEvent.queue, OutboxEvent.item, OutboxEvent.txid)
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        session.rollback()
+        return 0
+    pipe = r.pipeline(transaction=False)
+    # consecutive runs per queue keep per-queue ordering with few commands
+    run_queue, run_items = None, []
+    for row in rows:
+        if row.queue != run_queue and run_items:
+            pipe.rpush(run_queue, *run_items)
+            run_items = []
+        run_queue = row.queue
+        run_items.append(stamp(row.item, row.id, row.txid))
+    pipe.rpush(run_queue, *run_items)
+    pipe.zadd(RELAYED_KEY, {'id': rows[-1].id}, gt=True)
+    try:
+        pipe.execute()
+    except Exception:
+        # release the claimed rows; they are retried on the next pass
+        session.rollback()
+        raise
+    session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([row.id for row in rows])))
+    session.commit()
+    return len(rows)
+
+
+async def high_water(session, r) -> int:
+    """Id of the newest committed event: every event with a `seq` at or below
+    it is already reflected in the tables. Takes an AsyncSession and an async
+    Redis client (None if Redis is down)."""
+    pending = await session.scalar(select(func.max(OutboxEvent.id)))
+    relayed = await r.zscore(RELAYED_KEY, 'id') if r is not None else None
+    return max(int(pending or 0), int(relayed or 0))
+
+
+async def commit_snapshot(session) -> Optional[dict]:
+    """The transactions a read started now sees, as {xmin, xmax, xip}: a txid
+    is visible iff it is below xmin, or below xmax and not in xip. None off
+    PostgreSQL, where `high_water()` is exact."""
+    if session.get_bind().dialect.name != 'postgresql':
+        return None
+    xmin, xmax, xip = (await session.scalar(text('SELECT pg_current_snapshot()::text'))).split(':')
+    return {'xmin': int(xmin), 'xmax': int(xmax), 'xip': [int(x) for x in xip.split(',') if x]}
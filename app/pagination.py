@@ -0,0 +1,42 @@
+"""Opaque keyset cursors shared by the list endpoints.
+
+A cursor is the sort key of the last row on a page, JSON-encoded and
+base64url-wrapped so clients treat it as an opaque token. The next page is
+fetched with a row-value comparison (`(created_at, id) < (:c, :i)`), which
+the composite indexes serve directly, so page N costs the same as page 1.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(*values: Any) -> str:
+    parts = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(parts, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """Decode a cursor into `size` raw values; raises 400 on malformed input."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        parts = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(parts, list) or len(parts) != size:
+            raise ValueError('wrong cursor arity')
+        return tuple(parts)
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+
+def parse_cursor_datetime(value: Optional[str]) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(400, "Invalid cursor")
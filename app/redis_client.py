@@ -0,0 +1,124 @@
+"""Application-wide Redis connections.
+
+One bounded, blocking connection pool per process for the sync client (routers
+running in the threadpool, `worker.py`) and one for the asyncio client (async
+endpoints, metrics, health). Pools cap the number of sockets a slow Redis can
+pile up, and every connection carries connect/read timeouts.
+
+`redis_health` records failures shared by both facades: after an error the
+sync accessor returns None for `REDIS_RETRY_AFTER` seconds so request paths
+fall back immediately instead of each waiting out a timeout.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import redis
+from redis import asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+WORKER_QUEUE = 'worker:queue'
+
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '20'))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '2'))
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', '1'))
+# how long a caller waits for a free pooled connection before giving up
+REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', '1'))
+REDIS_RETRY_AFTER = float(os.getenv('REDIS_RETRY_AFTER', '5'))
+
+
+def redis_url() -> str:
+    """REDIS_URL (Render-managed Redis) or REDIS_HOST/REDIS_PORT."""
+    url = os.getenv('REDIS_URL')
+    if url:
+        return url
+    host = os.getenv('REDIS_HOST', 'localhost')
+    port = int(os.getenv('REDIS_PORT', '6379'))
+    return f"redis://{host}:{port}"
+
+
+def _pool_kwargs() -> dict:
+    return dict(
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        health_check_interval=30,
+        decode_responses=True,
+    )
+
+
+class RedisHealth:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at = 0.0
+
+    def record_success(self):
+        if self.failures:
+            with self._lock:
+                self.failures = 0
+                self.last_error = None
+
+    def record_failure(self, exc: BaseException):
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            self.last_failure_at = time.monotonic()
+        logger.warning('Redis call failed (%d in a row): %s', self.failures, self.last_error)
+
+    @property
+    def available(self) -> bool:
+        return not self.failures or time.monotonic() - self.last_failure_at >= REDIS_RETRY_AFTER
+
+    def snapshot(self) -> dict:
+        return {'available': self.available, 'failures': self.failures, 'last_error': self.last_error}
+
+
+redis_health = RedisHealth()
+
+_sync_client: Optional[redis.Redis] = None
+_sync_lock = threading.Lock()
+_async_client: Optional[aioredis.Redis] = None
+
+
+def get_redis(ignore_health: bool = False) -> Optional[redis.Redis]:
+    """Shared sync client, or None while Redis is in its post-failure backoff."""
+    global _sync_client
+    if not ignore_health and not redis_health.available:
+        return None
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                pool = redis.BlockingConnectionPool.from_url(redis_url(), **_pool_kwargs())
+                _sync_client = redis.Redis(connection_pool=pool)
+    return _sync_client
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Shared asyncio client; create it from the running event loop (app startup)."""
+    global _async_client
+    if _async_client is None:
+        pool = aioredis.BlockingConnectionPool.from_url(redis_url(), **_pool_kwargs())
+        _async_client = aioredis.Redis(connection_pool=pool)
+    return _async_client
+
+
+def close_redis():
+    global _sync_client
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client.connection_pool.disconnect()
+        _sync_client = None
+
+
+async def close_async_redis():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        await _async_client.connection_pool.disconnect()
+        _async_client = None
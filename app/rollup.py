@@ -0,0 +1,155 @@
+"""Daily quality rollup: one row per (UTC day, status, product).
+
+The worker keeps `daily_inspection_rollup` current from the outbox events
+(inspection created / status changed / defects changed / deleted): for each
+batch of events it recomputes only the (day, product) buckets those
+inspections fall in. Recomputing a bucket from `inspections` rather than
+applying +1/-1 deltas keeps the table correct under the outbox's
+at-least-once delivery, where an event can be replayed.
+
+`rebuild` backfills or repairs any day range in chunks; see
+scripts/backfill_rollup.py. A rebuild of all history records it in
+`rollup_state`. Until then the table may cover only the buckets the worker
+has touched, so readers check `populated_query()` and read `inspections`
+instead. The worker runs that first rebuild itself when it starts.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.orm_models import Batch, DailyInspectionRollup, Inspection, RollupState
+
+DEFAULT_CHUNK_DAYS = 31
+# serializes rollup writers across workers (pg_advisory_xact_lock key)
+ROLLUP_LOCK_KEY = 0x726F6C6C
+
+_rollup = DailyInspectionRollup.__table__
+ROLLUP_NAME = _rollup.name
+
+Bucket = Tuple[date, str]
+
+
+def day_of(ts: datetime) -> date:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return ts.date()
+
+
+def _day_start(d: date) -> datetime:
+    return datetime.combine(d, time.min, tzinfo=timezone.utc)
+
+
+def day_expr(session: Session):
+    """UTC calendar day of Inspection.created_at as a SQL expression."""
+    if session.get_bind().dialect.name == 'postgresql':
+        return cast(func.timezone('UTC', Inspection.created_at), Date)
+    return func.date(Inspection.created_at)
+
+
+_product = func.coalesce(Batch.product_id, '')
+
+
+def _replace(session: Session, start: date, end: date, product_id: Optional[str] = None):
+    """Recompute rollup rows for days [start, end), optionally one product."""
+    day = day_expr(session)
+    agg = (
+        select(day, Inspection.status, _product, func.count(), func.coalesce(func.sum(Inspection.defect_count), 0))
+        .select_from(Inspection)
+        .outerjoin(Batch, Batch.id == Inspection.batch_id_fk)
+        .where(Inspection.created_at >= _day_start(start), Inspection.created_at < _day_start(end))
+        .group_by(day, Inspection.status, _product)
+    )
+    stale = delete(_rollup).where(_rollup.c.day >= start, _rollup.c.day < end)
+    if product_id is not None:
+        agg = agg.where(_product == product_id)
+        stale = stale.where(_rollup.c.product_id == product_id)
+    session.execute(stale)
+    session.execute(insert(_rollup).from_select(
+        ['day', 'status', 'product_id', 'inspection_count', 'defect_sum'], agg,
+    ))
+
+
+def _lock(session: Session):
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(select(func.pg_advisory_xact_lock(ROLLUP_LOCK_KEY)))
+
+
+def buckets_for(session: Session, events: Iterable[dict]) -> Set[Bucket]:
+    """(day, product) buckets touched by a batch of parsed outbox events."""
+    buckets, ids = set(), []
+    for ev in events:
+        if ev.get('type') == 'inspection.deleted':
+            if ev.get('day'):
+                buckets.add((date.fromisoformat(ev['day']), ev.get('product_id') or ''))
+        elif ev.get('id'):
+            ids.append(ev['id'])
+    if ids:
+        rows = session.execute(
+            select(Inspection.created_at, _product)
+            .select_from(Inspection)
+            .outerjoin(Batch, Batch.id == Inspection.batch_id_fk)
+            .where(Inspection.id.in_(ids), Inspection.created_at.is_not(None))
+        ).all()
+        buckets.update((day_of(created_at), product) for created_at, product in rows)
+    return buckets
+
+
+def refresh(session: Session, buckets: Iterable[Bucket]) -> int:
+    """Recompute the given buckets in one transaction; returns how many."""
+    buckets = sorted(set(buckets))
+    if not buckets:
+        return 0
+    _lock(session)
+    for day, product_id in buckets:
+        _replace(session, day, day + timedelta(days=1), product_id)
+    session.commit()
+    return len(buckets)
+
+
+def populated_query():
+    """Select that returns a row once the rollup has been built over all history."""
+    return select(RollupState.populated_at).where(RollupState.name == ROLLUP_NAME)
+
+
+def is_populated(session: Session) -> bool:
+    return session.execute(populated_query()).first() is not None
+
+
+def _mark_populated(session: Session):
+    insert_ = postgresql.insert if session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+    session.execute(insert_(RollupState).values(name=ROLLUP_NAME).on_conflict_do_nothing(index_elements=['name']))
+    session.commit()
+
+
+def rebuild(session: Session, start: Optional[date] = None, end: Optional[date] = None,
+            chunk_days: int = DEFAULT_CHUNK_DAYS, log=None) -> int:
+    """Recompute every bucket in [start, end) (default: all history), one
+    short transaction per `chunk_days`. Returns the number of days covered.
+
+    A rebuild of all history marks the rollup populated when it finishes;
+    changes made meanwhile reach it through the worker's bucket refreshes."""
+    full = start is None and end is None
+    if start is None:
+        first = session.scalar(select(func.min(Inspection.created_at)))
+        if first is None:
+            if full:
+                _mark_populated(session)
+            return 0
+        start = day_of(first)
+    if end is None:
+        end = datetime.now(timezone.utc).date() + timedelta(days=1)
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+        _lock(session)
+        _replace(session, chunk_start, chunk_end)
+        session.commit()
+        if log:
+            log(f'rolled up {chunk_start} .. {chunk_end - timedelta(days=1)}')
+        chunk_start = chunk_end
+    if full:
+        _mark_populated(session)
+    return (end - start).days
@@ -0,0 +1,100 @@
+"""Operator scorecards over sliding 7/30/90-day windows.
+
+`operator_scorecards` stores, per (operator, window), the raw sums the
+scorecard metrics derive from: inspections, distinct shifts worked, passes,
+defects, and the count/total seconds of inspections that reached a final
+status. Ratios (inspections per shift, pass rate, defect density, mean time
+to final status) are computed when read, so the leaderboard is an indexed
+read of a few hundred rows.
+
+The worker refreshes the operators touched by each batch of outbox events and
+does a full refresh every SCORECARD_REFRESH_SECONDS so the windows keep
+sliding when an operator is idle.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import Float, Integer, cast, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.orm_models import Inspection, OperatorScorecard
+
+WINDOWS = (7, 30, 90)
+FINAL_STATUSES = ('pass', 'fail', 'conditional_pass')
+# shifts are fixed UTC blocks of this many hours (00-08, 08-16, 16-24 by default)
+SHIFT_HOURS = int(os.getenv('SHIFT_HOURS', '8'))
+SCORECARD_REFRESH_SECONDS = float(os.getenv('SCORECARD_REFRESH_SECONDS', '900'))
+# serializes scorecard writers across workers (pg_advisory_xact_lock key)
+SCORECARD_LOCK_KEY = 0x73636F72
+
+_scorecards = OperatorScorecard.__table__
+
+
+def _epoch(session: Session, col):
+    if session.get_bind().dialect.name == 'postgresql':
+        return func.extract('epoch', col)
+    return cast(func.strftime('%s', col), Integer)
+
+
+def _aggregate(session: Session, window_days: int, now: datetime, operator_ids: Optional[Set[str]]):
+    created = _epoch(session, Inspection.created_at)
+    final = Inspection.status.in_(FINAL_STATUSES)
+    finalized_at = func.coalesce(Inspection.finalized_at, Inspection.updated_at)
+    q = (
+        select(
+            Inspection.operator_id_fk,
+            window_days,
+            func.count(),
+            func.count(func.distinct(func.floor(created / (SHIFT_HOURS * 3600)))),
+            func.count().filter(Inspection.status == 'pass'),
+            func.coalesce(func.sum(Inspection.defect_count), 0),
+            func.count().filter(final),
+            cast(func.coalesce(func.sum(_epoch(session, finalized_at) - created).filter(final), 0), Float),
+        )
+        .where(Inspection.operator_id_fk.is_not(None),
+               Inspection.created_at >= now - timedelta(days=window_days))
+        .group_by(Inspection.operator_id_fk)
+    )
+    if operator_ids is not None:
+        q = q.where(Inspection.operator_id_fk.in_(operator_ids))
+    return q
+
+
+def refresh(session: Session, operator_ids: Optional[Iterable[str]] = None) -> None:
+    """Recompute every window for `operator_ids` (all operators if None)."""
+    if operator_ids is not None:
+        operator_ids = set(operator_ids)
+        if not operator_ids:
+            return
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(select(func.pg_advisory_xact_lock(SCORECARD_LOCK_KEY)))
+    stale = delete(_scorecards)
+    if operator_ids is not None:
+        stale = stale.where(_scorecards.c.operator_id.in_(operator_ids))
+    session.execute(stale)
+    now = datetime.now(timezone.utc)
+    columns = ['operator_id', 'window_days', 'inspections', 'shifts', 'passes',
+               'defect_sum', 'finalized', 'seconds_to_final']
+    for window_days in WINDOWS:
+        session.execute(insert(_scorecards).from_select(
+            columns, _aggregate(session, window_days, now, operator_ids),
+        ))
+    session.commit()
+
+
+def operators_for(session: Session, events: Iterable[dict]) -> Set[str]:
+    """Operators whose scorecards a batch of parsed outbox events changes."""
+    operators, ids = set(), []
+    for ev in events:
+        if ev.get('type') == 'inspection.deleted':
+            if ev.get('operator_id'):
+                operators.add(ev['operator_id'])
+        elif ev.get('id'):
+            ids.append(ev['id'])
+    if ids:
+        operators.update(session.execute(
+            select(Inspection.operator_id_fk).distinct()
+            .where(Inspection.id.in_(ids), Inspection.operator_id_fk.is_not(None))
+        ).scalars())
+    return operators
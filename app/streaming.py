@@ -0,0 +1,93 @@
+"""Constant-memory streaming of query results as CSV / NDJSON / a JSON array.
+
+`stream_rows` runs a Core select with `yield_per`, which makes psycopg2 use a
+server-side cursor, and encodes one partition at a time, so memory stays flat
+however many rows match. The generator owns the session and closes it when
+the response finishes (or the client disconnects).
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+DEFAULT_CHUNK_SIZE = 1000
+
+MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def ndjson_encoder(columns: Sequence[str]) -> Callable[[Iterable], str]:
+    def encode(rows) -> str:
+        return ''.join(
+            json.dumps({c: _jsonable(v) for c, v in zip(columns, row)}, separators=(',', ':')) + '\n'
+            for row in rows
+        )
+    return encode
+
+
+def json_array_encoder(columns: Sequence[str]) -> Callable[[Iterable], str]:
+    """Objects for the body of a JSON array; stream with head='[' tail=']'."""
+    first = True
+
+    def encode(rows) -> str:
+        nonlocal first
+        out = ','.join(
+            json.dumps({c: _jsonable(v) for c, v in zip(columns, row)}, separators=(',', ':'))
+            for row in rows
+        )
+        if out and not first:
+            out = ',' + out
+        first = first and not out
+        return out
+    return encode
+
+
+def csv_encoder(columns: Sequence[str]) -> Callable[[Iterable], str]:
+    def encode(rows) -> str:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerows([_jsonable(v) for v in row] for row in rows)
+        return buf.getvalue()
+    return encode
+
+
+def csv_header(columns: Sequence[str]) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(columns)
+    return buf.getvalue()
+
+
+def encoder_for(fmt: str, columns: Sequence[str]) -> Callable[[Iterable], str]:
+    return csv_encoder(columns) if fmt == 'csv' else ndjson_encoder(columns)
+
+
+def stream_rows(
+    session: Session,
+    query,
+    encode: Callable[[List], str],
+    head: Optional[str] = None,
+    tail: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    try:
+        if head:
+            yield head
+        result = session.execute(query.execution_options(yield_per=chunk_size))
+        for part in result.partitions():
+            yield encode(part)
+        if tail:
+            yield tail
+    finally:
+        session.close()
+
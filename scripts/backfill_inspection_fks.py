@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Fill inspections.batch_id_fk / operator_id_fk from the legacy text columns.
+
+Usage:
+  python scripts/backfill_inspection_fks.py [--chunk-size 1000]
+
+Walks inspections in id order, one short transaction per chunk, and sets each
+missing foreign key whose legacy value names an existing batch (by id or
+batch_number) or operator (by id or employee_id). Safe to run while the app
+is live and to re-run. Afterwards rebuild the derived tables, which group by
+the foreign keys:
+
+  python scripts/backfill_rollup.py
+  (operator scorecards catch up on the worker's next full refresh)
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import get_session  # noqa: E402
+from app.inspection_fks import DEFAULT_CHUNK_SIZE, backfill  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    session = get_session()
+    try:
+        filled = backfill(session, args.chunk_size, log=None if args.quiet else print)
+    finally:
+        session.close()
+    print(f'{filled} inspection(s) updated')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Backfill (or repair) the daily_inspection_rollup table from inspections.
+
+Usage:
+  python scripts/backfill_rollup.py [--from 2026-01-01] [--to 2026-02-01] [--chunk-days 31]
+
+Recomputes every (day, status, product) row in [--from, --to), defaulting to
+all history, one short transaction per chunk. The worker does a full run on
+its first start and keeps the rollup current afterwards; use this to repair a
+range or rebuild without waiting for the worker. Safe to re-run at any time.
+
+Run scripts/backfill_inspection_fks.py first: inspections are attributed to a
+product through batch_id_fk, and rows it has not filled roll up under none.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import get_session  # noqa: E402
+from app.rollup import DEFAULT_CHUNK_DAYS, rebuild  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, default=None)
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, default=None)
+    parser.add_argument('--chunk-days', type=int, default=DEFAULT_CHUNK_DAYS)
+    args = parser.parse_args()
+
+    session = get_session()
+    try:
+        days = rebuild(session, args.start, args.end, args.chunk_days, log=print)
+    finally:
+        session.close()
+    print(f'{days} day(s) rolled up')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Load-test the async DB path against the sync threadpool path.
+
+Usage:
+  DATABASE_URL=postgresql://... python scripts/bench_async_db.py [--concurrency 200] [--requests 4000] [--db-latency-ms 20]
+
+Starts one uvicorn worker serving two equivalent endpoints that run the
+`list_inspections` first-page query plus a `pg_sleep` standing in for network
+and I/O latency:
+
+  /sync   `def` handler + get_session()        (runs in AnyIO's 40-slot threadpool)
+  /async  `async def` handler + AsyncSession   (awaits on the event loop)
+
+Both engines get the same pool size (`--pool`) so the threadpool is the only
+difference. The script then fires `--requests` requests at each endpoint with
+`--concurrency` in flight and prints throughput and latency percentiles.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import create_engine, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db import DATABASE_URL, ASYNC_DATABASE_URL  # noqa: E402
+from app.models.orm_models import Inspection  # noqa: E402
+
+PORT = 8765
+
+
+def build_app(pool: int, latency_s: float) -> FastAPI:
+    sync_session = sessionmaker(bind=create_engine(DATABASE_URL, pool_size=pool, max_overflow=0))
+    async_session = async_sessionmaker(create_async_engine(ASYNC_DATABASE_URL, pool_size=pool, max_overflow=0))
+    page = select(Inspection).order_by(Inspection.created_at.desc(), Inspection.id.desc()).limit(50)
+    sleep = text('SELECT pg_sleep(:s)')
+    bench = FastAPI()
+
+    @bench.get('/sync')
+    def sync_page():
+        session = sync_session()
+        try:
+            session.execute(sleep, {'s': latency_s})
+            return len(session.execute(page).scalars().all())
+        finally:
+            session.close()
+
+    @bench.get('/async')
+    async def async_page():
+        async with async_session() as session:
+            await session.execute(sleep, {'s': latency_s})
+            return len((await session.scalars(page)).all())
+
+    return bench
+
+
+async def hammer(path: str, total: int, concurrency: int) -> dict:
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{PORT}', limits=limits, timeout=60) as client:
+        async def one():
+            async with sem:
+                start = time.perf_counter()
+                r = await client.get(path)
+                r.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        await one()  # warm up pools
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'p99': latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--pool', type=int, default=80)
+    parser.add_argument('--db-latency-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    if not DATABASE_URL.startswith('postgres'):
+        print('This benchmark needs PostgreSQL (set DATABASE_URL).')
+        sys.exit(1)
+
+    config = uvicorn.Config(build_app(args.pool, args.db_latency_ms / 1000), port=PORT, log_level='warning')
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    print(f'{args.requests} requests, {args.concurrency} in flight, {args.db_latency_ms:.0f} ms DB latency')
+    print(f"{'path':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for path in ('/sync', '/async'):
+        res = asyncio.run(hammer(path, args.requests, args.concurrency))
+        print(f"{path:<8}{res['rps']:>10.0f}{res['p50']:>10.1f}{res['p95']:>10.1f}{res['p99']:>10.1f}")
+    server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
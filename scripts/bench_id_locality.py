@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Compare random vs time-ordered primary keys: insert throughput and index size.
+
+Usage:
+  DATABASE_URL=postgresql://... python scripts/bench_id_locality.py [--rows 1000000] [--batch 1000]
+
+Creates two scratch tables shaped like `inspections` (VARCHAR(64) primary key
+plus a payload), fills one with the old `ins-<uuid4 hex>` keys and the other
+with `app.ids.new_id('ins')`, and prints rows/s and the size of each primary
+key index. Random keys land on arbitrary B-tree pages, so every insert dirties
+a page somewhere in the index and pages split half-full; time-ordered keys
+append to the right-most page. The tables are dropped afterwards.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.db import DATABASE_URL  # noqa: E402
+from app.ids import new_id  # noqa: E402
+
+GENERATORS = {
+    'random': lambda: f"ins-{uuid.uuid4().hex[:12]}",
+    'time_ordered': lambda: new_id('ins'),
+}
+
+
+def run(conn, name: str, make_id, rows: int, batch: int) -> dict:
+    table = f"bench_ids_{name}"
+    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    conn.execute(text(f"CREATE TABLE {table} (id VARCHAR(64) PRIMARY KEY, payload TEXT, created_at TIMESTAMP DEFAULT now())"))
+    conn.commit()
+    insert = text(f"INSERT INTO {table} (id, payload) VALUES (:id, :payload)")
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        n = min(batch, rows - offset)
+        conn.execute(insert, [{'id': make_id(), 'payload': 'x' * 64} for _ in range(n)])
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    index_bytes = conn.execute(text(f"SELECT pg_relation_size('{table}_pkey')")).scalar()
+    conn.execute(text(f"DROP TABLE {table}"))
+    conn.commit()
+    return {'rps': rows / elapsed, 'index_mb': index_bytes / 1024 / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    if not DATABASE_URL.startswith('postgres'):
+        print('This benchmark needs PostgreSQL (set DATABASE_URL).')
+        sys.exit(1)
+
+    engine = create_engine(DATABASE_URL)
+    print(f'{args.rows} rows in batches of {args.batch}')
+    print(f"{'keys':<14}{'rows/s':>10}{'pkey MB':>10}")
+    with engine.connect() as conn:
+        for name, make_id in GENERATORS.items():
+            res = run(conn, name, make_id, args.rows, args.batch)
+            print(f"{name:<14}{res['rps']:>10.0f}{res['index_mb']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark the inspections search query with and without the trigram indexes.
+
+Usage:
+  DATABASE_URL=postgresql://... python scripts/bench_inspection_search.py [--rows 1000000] [--runs 20]
+
+Seeds `--rows` synthetic inspections (ids prefixed `bench-`) unless that many
+already exist, then times the exact query `list_inspections` issues for a few
+search terms twice: once as planned (GIN trigram bitmap scans) and once with
+index scans disabled, which reproduces the old sequential-scan behaviour.
+Run it against a scratch database; `--cleanup` deletes the seeded rows.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, text  # noqa: E402
+
+from app.db import engine  # noqa: E402
+from app.models.orm_models import Inspection  # noqa: E402
+from app.api.v1.inspections import _search_clause  # noqa: E402
+
+TERMS = ['B-0420', 'op-77', 'bench-ins-0099', 'zz-nomatch', 'B-']
+
+
+def seed(conn, rows: int):
+    have = conn.execute(text("SELECT count(*) FROM inspections WHERE id LIKE 'bench-%'")).scalar()
+    conn.commit()
+    if have >= rows:
+        return
+    print(f'seeding {rows - have} inspections...')
+    conn.execute(text("""
+        INSERT INTO inspections (id, batch_id, operator_id, status, defect_count, created_at)
+        SELECT 'bench-ins-' || lpad(g::text, 10, '0'),
+               'B-' || lpad((g % 50000)::text, 6, '0'),
+               'op-' || (g % 500),
+               (ARRAY['pending','in_review','pass','fail','conditional_pass'])[1 + g % 5],
+               g % 7,
+               now() - (g || ' seconds')::interval
+        FROM generate_series(:start, :stop) AS g
+    """), {'start': have + 1, 'stop': rows})
+    conn.commit()
+    conn.execute(text('ANALYZE inspections'))
+    conn.commit()
+
+
+def p95(samples: list) -> float:
+    return sorted(samples)[max(0, int(len(samples) * 0.95) - 1)]
+
+
+def time_query(conn, term: str, runs: int, use_index: bool) -> list:
+    q = (select(Inspection.id).where(_search_clause(term))
+         .order_by(Inspection.created_at.desc(), Inspection.id.desc()).limit(51))
+    samples = []
+    for _ in range(runs):
+        with conn.begin():
+            if not use_index:
+                conn.execute(text('SET LOCAL enable_bitmapscan = off'))
+                conn.execute(text('SET LOCAL enable_indexscan = off'))
+            start = time.perf_counter()
+            conn.execute(q).all()
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--cleanup', action='store_true')
+    args = parser.parse_args()
+
+    if engine.dialect.name != 'postgresql':
+        print('This benchmark needs PostgreSQL (set DATABASE_URL).')
+        sys.exit(1)
+
+    with engine.connect() as conn:
+        seed(conn, args.rows)
+        print(f"{'term':<18}{'seq p50 ms':>12}{'seq p95 ms':>12}{'trgm p50 ms':>13}{'trgm p95 ms':>13}")
+        for term in TERMS:
+            seq = time_query(conn, term, args.runs, use_index=False)
+            idx = time_query(conn, term, args.runs, use_index=True)
+            print(f'{term:<18}{statistics.median(seq):>12.1f}{p95(seq):>12.1f}'
+                  f'{statistics.median(idx):>13.1f}{p95(idx):>13.1f}')
+        if args.cleanup:
+            conn.execute(text("DELETE FROM inspections WHERE id LIKE 'bench-%'"))
+            conn.commit()
+
+
+if __name__ == '__main__':
+    main()
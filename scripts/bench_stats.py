@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Benchmark dashboard stats latency: nine sequential queries vs the single-pass version.
+
+Usage:
+  DATABASE_URL=postgresql://... python scripts/bench_stats.py [--sizes 1000000 10000000] [--runs 10]
+
+For each size, seeds synthetic inspections (ids prefixed `bench-`) up to that
+many rows, then times:
+
+  sequential  the previous `get_stats`: total, four status counts, avg, top
+              defects, recent, trend and total defects, one after another on
+              one session
+  current     `compute_stats()`: counts, average and trend from the daily
+              rollup, the remaining queries run concurrently
+
+The rollup is rebuilt after seeding (see scripts/backfill_rollup.py).
+
+Run it against a scratch database; `--cleanup` deletes the seeded rows.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import Date, cast, func, select, text  # noqa: E402
+
+from app.db import engine, get_session, get_async_session, dispose_async_engine  # noqa: E402
+from app.models.orm_models import Inspection, InspectionDefect  # noqa: E402
+from app.api.v1 import stats  # noqa: E402
+from app import rollup  # noqa: E402
+
+
+def seed(conn, rows: int):
+    have = conn.execute(text("SELECT count(*) FROM inspections WHERE id LIKE 'bench-%'")).scalar()
+    conn.commit()
+    if have >= rows:
+        return
+    print(f'seeding {rows - have} inspections...')
+    conn.execute(text("""
+        INSERT INTO inspections (id, batch_id, operator_id, status, defect_count, created_at)
+        SELECT 'bench-ins-' || lpad(g::text, 10, '0'),
+               'B-' || lpad((g % 50000)::text, 6, '0'),
+               'op-' || (g % 500),
+               (ARRAY['pending','in_review','pass','fail','conditional_pass'])[1 + g % 5],
+               g % 7,
+               now() - (g || ' seconds')::interval
+        FROM generate_series(:start, :stop) AS g
+    """), {'start': have + 1, 'stop': rows})
+    conn.commit()
+    conn.execute(text('ANALYZE inspections'))
+    conn.commit()
+    session = get_session()
+    try:
+        rollup.rebuild(session)
+    finally:
+        session.close()
+
+
+async def sequential():
+    async with get_async_session() as session:
+        await session.scalar(select(func.count()).select_from(Inspection))
+        for status in ('pass', 'fail', 'pending', 'in_review'):
+            await session.scalar(select(func.count()).select_from(Inspection).where(Inspection.status == status))
+        await session.scalar(select(func.avg(Inspection.defect_count)))
+        await stats._top_defects(session)
+        await stats._recent_activity(session)
+        day = cast(Inspection.created_at, Date)
+        await session.execute(
+            select(day, Inspection.status, func.count()).group_by(day, Inspection.status).order_by(day)
+        )
+        await session.scalar(select(func.sum(InspectionDefect.quantity)))
+
+
+async def time_runs(fn, runs: int) -> list:
+    await fn()  # warm cache and pool
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def measure(runs: int) -> dict:
+    try:
+        return {
+            'sequential': await time_runs(sequential, runs),
+            'current': await time_runs(stats.compute_stats, runs),
+        }
+    finally:
+        await dispose_async_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--cleanup', action='store_true')
+    args = parser.parse_args()
+
+    if engine.dialect.name != 'postgresql':
+        print('This benchmark needs PostgreSQL (set DATABASE_URL).')
+        sys.exit(1)
+
+    print(f"{'rows':>12}  {'variant':<12}{'p50 ms':>10}{'max ms':>10}")
+    with engine.connect() as conn:
+        for size in sorted(args.sizes):
+            seed(conn, size)
+            for variant, samples in asyncio.run(measure(args.runs)).items():
+                print(f'{size:>12}  {variant:<12}{statistics.median(samples):>10.1f}{max(samples):>10.1f}')
+        if args.cleanup:
+            conn.execute(text("DELETE FROM inspections WHERE id LIKE 'bench-%'"))
+            conn.commit()
+
+
+if __name__ == '__main__':
+    main()
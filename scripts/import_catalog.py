@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Bulk-import products or batches from a CSV or NDJSON file (e.g. the nightly ERP dump).
+
+Usage:
+  python scripts/import_catalog.py products products.csv
+  python scripts/import_catalog.py batches batches.ndjson [--format ndjson] [--chunk-size 1000]
+
+Products upsert on `sku`, batches on `batch_number`; batches may reference
+their product by `product_id` or `product_sku`. Rows are validated and loaded
+in chunks, one transaction each; invalid rows are printed with their line
+number and skipped. The format defaults to the file extension.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import get_session  # noqa: E402
+from app.catalog_import import DEFAULT_CHUNK_SIZE, FORMATS, KINDS, import_catalog  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('kind', choices=KINDS)
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=FORMATS)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    fmt = args.format or ('ndjson' if args.path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    session = get_session()
+    try:
+        with open(args.path, 'rb') as fp:
+            result = import_catalog(session, args.kind, fp, fmt, args.chunk_size,
+                                    log=None if args.quiet else print)
+    finally:
+        session.close()
+    for err in result.errors:
+        print(f"line {err['line']}: {err['error']}", file=sys.stderr)
+    print(f'{result.upserted} upserted, {result.failed} failed')
+    sys.exit(1 if result.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
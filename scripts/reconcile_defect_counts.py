@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Recompute inspections.defect_count from inspection_defects.
+
+Usage:
+  python scripts/reconcile_defect_counts.py [--chunk-size 1000]
+
+Walks inspections in id order, one short transaction per chunk, and rewrites
+only the rows whose stored count differs. Inspections without any
+inspection_defects rows keep the defect_count they were created with. Safe to
+run while the app is live (e.g. as a nightly Render cron job).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import get_session  # noqa: E402
+from app.defect_counts import DEFAULT_CHUNK_SIZE, reconcile  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    session = get_session()
+    try:
+        fixed = reconcile(session, args.chunk_size, log=None if args.quiet else print)
+    finally:
+        session.close()
+    print(f'{fixed} inspection(s) corrected')
+
+
+if __name__ == '__main__':
+    main()
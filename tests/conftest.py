@@ -0,0 +1,147 @@
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import db
+from app.redis_client import RedisHealth
+
+
+class FakeRedis:
+    """In-memory stand-in for the sync client: just the commands the worker,
+    outbox relay and batch quality versioning use."""
+
+    def __init__(self):
+        self.data = {}
+        self.lists = {}
+        self.zsets = {}
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        # app.cache's lock release: delete the key if it still holds our token
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    def lpop(self, key, count=None):
+        items = self.lists.get(key, [])
+        popped, self.lists[key] = items[:count or 1], items[count or 1:]
+        return popped or None
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+    def expire(self, key, seconds):
+        pass
+
+    def zadd(self, key, mapping, gt=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not gt or score > zset.get(member, float('-inf')):
+                zset[member] = score
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis, self._calls = redis, []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+
+
+class AsyncFakeRedis:
+    """The async client's view of the same FakeRedis."""
+
+    def __init__(self, redis):
+        self._redis = redis
+
+    def __getattr__(self, name):
+        method = getattr(self._redis, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+def _enforce_foreign_keys(dbapi_conn, _):
+    dbapi_conn.execute('PRAGMA foreign_keys=ON')
+
+
+@pytest.fixture
+def sqlite_db(monkeypatch, tmp_path):
+    """A fresh SQLite database behind every module's get_session /
+    get_async_session, with foreign keys enforced and Redis treated as down.
+
+    Yields the sync sessionmaker.
+    """
+    import app.main  # noqa: F401  (imports every router)
+    import worker  # noqa: F401
+
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url, future=True)
+    event.listen(engine, 'connect', _enforce_foreign_keys)
+    db.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, future=True)
+    async_engine = create_async_engine(url.replace('sqlite:', 'sqlite+aiosqlite:'), poolclass=NullPool)
+    event.listen(async_engine.sync_engine, 'connect', _enforce_foreign_keys)
+    AsyncSession = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    # app.db itself included, hence the originals are looked up once up front
+    replacements = [(db.get_session, 'get_session', Session),
+                    (db.get_async_session, 'get_async_session', AsyncSession),
+                    (db.engine, 'engine', engine)]
+    for name, module in list(sys.modules.items()):
+        if not (name == 'worker' or name.startswith('app')) or module is None:
+            continue
+        for original, attr, replacement in replacements:
+            if getattr(module, attr, None) is original:
+                monkeypatch.setattr(module, attr, replacement)
+    monkeypatch.setattr(RedisHealth, 'available', property(lambda self: False))
+    # the in-process defect catalogue would otherwise outlive the database
+    from app.api.v1.defects import catalogue
+    catalogue.invalidate()
+    yield Session
+    catalogue.invalidate()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(sqlite_db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def async_fake_redis(fake_redis):
+    return AsyncFakeRedis(fake_redis)
@@ -0,0 +1,34 @@
+from app import batch_quality, cache
+from app.models.orm_models import Batch, Inspection, Product, Signature
+from app.redis_client import RedisHealth
+
+
+def test_cached_view_is_retired_when_a_child_record_changes(client, sqlite_db, fake_redis, async_fake_redis, monkeypatch):
+    monkeypatch.setattr(RedisHealth, 'available', property(lambda self: True))
+    monkeypatch.setattr(batch_quality, 'get_redis', lambda: fake_redis)
+    monkeypatch.setattr(batch_quality, 'get_async_redis', lambda: async_fake_redis)
+    monkeypatch.setattr(cache, 'get_async_redis', lambda: async_fake_redis)
+    s = sqlite_db()
+    s.add(Product(id='prod-1', name='Widget', sku='W-1'))
+    s.add(Batch(id='batch-1', batch_number='B-1', product_id='prod-1'))
+    s.add(Inspection(id='ins-1', status='pass', batch_id_fk='batch-1'))
+    s.commit()
+
+    view = client.get('/api/v1/batches/batch-1/quality').json()
+    assert (view['batch']['product_name'], [i['id'] for i in view['inspections']]) == ('Widget', ['ins-1'])
+    assert view['signature_status'] == {'signed_inspections': 0, 'unsigned_inspections': 1, 'by_role': {}}
+
+    # a write that does not touch the version is not seen: the view is cached
+    s.add(Signature(inspection_id='ins-1', signer_name='Ann', signer_role='inspector'))
+    s.commit()
+    s.close()
+    assert client.get('/api/v1/batches/batch-1/quality').json()['signatures'] == []
+
+    # signing through the API bumps the batch's version
+    r = client.post('/api/v1/inspections/ins-1/signatures', json={'signer_name': 'Bob', 'signer_role': 'reviewer'})
+    assert r.status_code == 201
+    assert fake_redis.data['batch:quality:ver:batch-1'] == '1'
+    view = client.get('/api/v1/batches/batch-1/quality').json()
+    assert view['signature_status']['by_role'] == {'inspector': 1, 'reviewer': 1}
+
+    assert client.get('/api/v1/batches/batch-404/quality').status_code == 404
@@ -0,0 +1,61 @@
+import asyncio
+import itertools
+
+from app import cache
+
+
+class FakeRedis:
+    """Just the commands app.cache uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+def test_concurrent_callers_share_one_computation(monkeypatch):
+    monkeypatch.setattr(cache, '_redis', lambda: None)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'total': 42}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute('k', compute) for _ in range(20)))
+
+    assert asyncio.run(main()) == [{'total': 42}] * 20
+    assert len(calls) == 1
+
+
+def test_stale_value_is_served_while_refreshing(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, '_redis', lambda: fake)
+    results = itertools.count(1)
+
+    async def compute():
+        return next(results)
+
+    async def main():
+        first = await cache.get_or_compute('k', compute, ttl=0, stale_ttl=60)
+        stale = await cache.get_or_compute('k', compute, ttl=0, stale_ttl=60)
+        await asyncio.gather(*cache._background)
+        fresh = await cache.get_or_compute('k', compute, ttl=0, stale_ttl=60)
+        return first, stale, fresh
+
+    assert asyncio.run(main()) == (1, 1, 2)
+    assert 'k:lock' not in fake.data
@@ -0,0 +1,77 @@
+import io
+
+from app import catalog_import
+from app.api.v1 import products
+from app.models.orm_models import Batch, Product
+
+PRODUCTS_CSV = b"""sku,name,category
+W-1,Widget,parts
+W-2,,parts
+W-3,Gadget,parts
+W-1,Widget again,parts
+"""
+
+
+def test_csv_rows_are_upserted_with_errors_by_line(client, sqlite_db):
+    r = client.post('/api/v1/products/import?format=csv', content=PRODUCTS_CSV)
+    assert r.status_code == 200
+    assert r.json() == {'upserted': 2, 'failed': 2, 'errors': [
+        {'line': 3, 'error': 'name is required'},
+        {'line': 5, 'error': 'duplicate sku W-1 (first on line 2)'},
+    ]}
+    s = sqlite_db()
+    assert {p.sku: p.name for p in s.query(Product)} == {'W-1': 'Widget', 'W-3': 'Gadget'}
+    s.close()
+
+    # re-importing updates in place
+    client.post('/api/v1/products/import?format=csv', content=b"sku,name\nW-3,Gadget v2\n")
+    s = sqlite_db()
+    assert s.query(Product).filter_by(sku='W-3').one().name == 'Gadget v2'
+    s.close()
+
+
+def test_ndjson_batches_resolve_products_and_report_duplicates_across_chunks(sqlite_db):
+    s = sqlite_db()
+    s.add(Product(id='prod-1', name='Widget', sku='W-1'))
+    s.commit()
+    body = io.BytesIO(b'\n'.join([
+        b'{"batch_number": "B-1", "product_sku": "W-1", "quantity": 5}',
+        b'{"batch_number": "B-2", "product_sku": "W-404"}',
+        b'not json',
+        b'{"batch_number": "B-1", "product_id": "prod-1", "quantity": 7}',
+    ]))
+    result = catalog_import.import_catalog(s, 'batches', body, 'ndjson', chunk_size=2)
+    assert result.upserted == 1
+    assert [e['line'] for e in result.errors] == [2, 3, 4]
+    assert result.errors[2]['error'] == 'duplicate batch_number B-1 (first on line 1)'
+    batch = s.query(Batch).one()
+    assert (batch.batch_number, batch.product_id, batch.quantity) == ('B-1', 'prod-1', 5)
+    s.close()
+
+
+def test_reimport_with_fewer_columns_keeps_the_others(client, sqlite_db):
+    client.post('/api/v1/products/import?format=csv', content=b"sku,name,category,description\nW-1,Widget,parts,Steel\n")
+    client.post('/api/v1/batches/import?format=csv', content=(
+        b"batch_number,product_sku,quantity,status,notes,expiry_date\nB-1,W-1,5,on_hold,Check seals,2027-01-01\n"
+    ))
+
+    client.post('/api/v1/products/import?format=csv', content=b"sku,name\nW-1,Widget v2\n")
+    r = client.post('/api/v1/batches/import?format=ndjson', content=b'{"batch_number": "B-1", "quantity": 8}\n')
+    assert r.json()['upserted'] == 1
+    # a new batch without those columns still gets the defaults
+    client.post('/api/v1/batches/import?format=csv', content=b"batch_number\nB-2\n")
+
+    s = sqlite_db()
+    product = s.query(Product).one()
+    assert (product.name, product.category, product.description) == ('Widget v2', 'parts', 'Steel')
+    batches = {b.batch_number: b for b in s.query(Batch)}
+    b1, b2 = batches['B-1'], batches['B-2']
+    assert (b1.quantity, b1.status, b1.notes, b1.expiry_date, b1.product_id) == (8, 'on_hold', 'Check seals', '2027-01-01', product.id)
+    assert (b2.quantity, b2.status, b2.product_id) == (0, 'active', None)
+    s.close()
+
+
+def test_oversized_body_is_refused(client, monkeypatch):
+    monkeypatch.setattr(products, 'IMPORT_MAX_BYTES', 16)
+    r = client.post('/api/v1/products/import?format=csv', content=PRODUCTS_CSV)
+    assert r.status_code == 413
@@ -0,0 +1,90 @@
+from app.defect_counts import reconcile
+from app.models.orm_models import DefectType, Inspection, OutboxEvent
+
+
+def _setup(client, sqlite_db):
+    s = sqlite_db()
+    s.add_all([Inspection(id='ins-1', status='pending', defect_count=0),
+               Inspection(id='ins-2', status='pending', defect_count=0)])
+    s.commit()
+    s.close()
+    return client.post('/api/v1/defects/types', json={'name': 'Scratch', 'code': 'SCR'}).json()['id']
+
+
+def _counts(sqlite_db):
+    s = sqlite_db()
+    try:
+        return {i.id: i.defect_count for i in s.query(Inspection)}
+    finally:
+        s.close()
+
+
+def test_bulk_attach_increments_each_inspection_once(client, sqlite_db):
+    dt = _setup(client, sqlite_db)
+    r = client.post('/api/v1/defects/bulk', json={'items': [
+        {'inspection_id': 'ins-1', 'defect_type_id': dt, 'quantity': 2},
+        {'inspection_id': 'ins-1', 'defect_type_id': dt, 'quantity': 3},
+        {'inspection_id': 'ins-2', 'defect_type_id': dt},
+    ]})
+    assert r.status_code == 201
+    assert [d['quantity'] for d in r.json()] == [2, 3, 1]
+    assert _counts(sqlite_db) == {'ins-1': 5, 'ins-2': 1}
+    s = sqlite_db()
+    assert s.query(OutboxEvent).count() == 2
+    s.close()
+
+
+def test_bulk_attach_is_all_or_nothing(client, sqlite_db):
+    dt = _setup(client, sqlite_db)
+    r = client.post('/api/v1/defects/bulk', json={'items': [
+        {'inspection_id': 'ins-1', 'defect_type_id': dt},
+        {'inspection_id': 'ins-missing', 'defect_type_id': dt},
+    ]})
+    assert r.status_code == 404
+    assert _counts(sqlite_db) == {'ins-1': 0, 'ins-2': 0}
+
+
+def test_reconcile_repairs_drift_but_keeps_counts_without_defect_rows(client, sqlite_db):
+    dt = _setup(client, sqlite_db)
+    client.post('/api/v1/defects/inspection/ins-1', json={'defect_type_id': dt, 'quantity': 4})
+    s = sqlite_db()
+    s.get(Inspection, 'ins-1').defect_count = 9  # drifted
+    s.get(Inspection, 'ins-2').defect_count = 3  # supplied at creation, no rows
+    s.commit()
+
+    assert reconcile(s, chunk_size=1) == 1
+    s.close()
+    assert _counts(sqlite_db) == {'ins-1': 4, 'ins-2': 3}
+
+
+def test_attaching_a_type_deleted_behind_a_stale_catalogue_is_404(client, sqlite_db):
+    _setup(client, sqlite_db)
+    for url, body in [('/api/v1/defects/inspection/ins-1', {}),
+                      ('/api/v1/defects/bulk', {'items': [{'inspection_id': 'ins-1'}]})]:
+        dt = client.post('/api/v1/defects/types', json={'name': 'Dent'}).json()['id']
+        client.get('/api/v1/defects/types')  # catalogue loaded
+        s = sqlite_db()
+        s.execute(DefectType.__table__.delete().where(DefectType.id == dt))  # by another replica
+        s.commit()
+        s.close()
+        if 'items' in body:
+            body['items'][0]['defect_type_id'] = dt
+        else:
+            body['defect_type_id'] = dt
+        r = client.post(url, json=body)
+        assert r.status_code == 404
+        assert r.json()['detail'] == f'Defect type(s) not found: {dt}'
+    assert _counts(sqlite_db) == {'ins-1': 0, 'ins-2': 0}
+
+
+def test_quantity_must_be_positive(client, sqlite_db):
+    dt = _setup(client, sqlite_db)
+    for quantity in (0, -2):
+        r = client.post('/api/v1/defects/inspection/ins-1', json={'defect_type_id': dt, 'quantity': quantity})
+        assert r.status_code == 422
+        r = client.post('/api/v1/defects/bulk', json={'items': [
+            {'inspection_id': 'ins-1', 'defect_type_id': dt, 'quantity': 2},
+            {'inspection_id': 'ins-2', 'defect_type_id': dt, 'quantity': quantity},
+        ]})
+        assert r.status_code == 422
+    assert _counts(sqlite_db) == {'ins-1': 0, 'ins-2': 0}
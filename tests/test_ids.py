@@ -0,0 +1,13 @@
+import re
+
+from app.ids import new_id
+
+
+def test_new_id_keeps_prefix():
+    assert re.fullmatch(r'ins-[0-9a-f]{28}', new_id('ins'))
+
+
+def test_new_ids_are_time_ordered_and_unique():
+    ids = [new_id('doc') for _ in range(5000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
@@ -0,0 +1,83 @@
+from app import inspection_fks
+from app.models.orm_models import Batch, Inspection, Operator, Product
+
+
+def _catalog(sqlite_db):
+    s = sqlite_db()
+    s.add(Product(id='prod-1', name='Widget', sku='W-1'))
+    s.add(Batch(id='batch-1', batch_number='B-1', product_id='prod-1'))
+    s.add(Operator(id='op-1', name='Ann', employee_id='E-1'))
+    s.commit()
+    return s
+
+
+def test_create_resolves_ids_and_alternate_keys(client, sqlite_db):
+    _catalog(sqlite_db).close()
+    by_number = client.post('/api/v1/inspections/', json={'batch_id': 'B-1', 'operator_id': 'E-1'}).json()
+    by_id = client.post('/api/v1/inspections/', json={'batch_id': 'batch-1', 'operator_id': 'op-1'}).json()
+    unknown = client.post('/api/v1/inspections/', json={'batch_id': 'B-404'}).json()
+    s = sqlite_db()
+    fks = {i.id: (i.batch_id_fk, i.operator_id_fk) for i in s.query(Inspection)}
+    s.close()
+    assert fks == {by_number['id']: ('batch-1', 'op-1'), by_id['id']: ('batch-1', 'op-1'), unknown['id']: (None, None)}
+
+
+def test_resolve_batches_maps_both_keys_in_one_lookup(sqlite_db):
+    s = _catalog(sqlite_db)
+    assert inspection_fks.resolve_batches(s, ['B-1', 'batch-1', 'B-404', None]) == {'B-1': 'batch-1', 'batch-1': 'batch-1'}
+    assert inspection_fks.resolve_operators(s, ['E-1']) == {'E-1': 'op-1'}
+    s.close()
+
+
+def test_backfill_fills_only_resolvable_rows(sqlite_db):
+    s = _catalog(sqlite_db)
+    s.add_all([
+        Inspection(id='ins-1', status='pending', batch_id='B-1', operator_id='E-1'),
+        Inspection(id='ins-2', status='pending', batch_id='batch-1'),
+        Inspection(id='ins-3', status='pending', batch_id='B-404', operator_id='nobody'),
+    ])
+    s.commit()
+    assert inspection_fks.backfill(s, chunk_size=2) == 2
+    assert {i.id: (i.batch_id_fk, i.operator_id_fk) for i in s.query(Inspection)} == {
+        'ins-1': ('batch-1', 'op-1'), 'ins-2': ('batch-1', None), 'ins-3': (None, None),
+    }
+    # nothing left to resolve
+    assert inspection_fks.backfill(s) == 0
+    s.close()
+
+
+def test_bulk_status_by_batch_uses_the_fk_or_the_legacy_text(client, sqlite_db):
+    s = _catalog(sqlite_db)
+    s.add_all([
+        Inspection(id='ins-1', status='pending', batch_id='B-1', batch_id_fk='batch-1'),
+        Inspection(id='ins-2', status='pending', batch_id='LEGACY-7'),
+        Inspection(id='ins-3', status='pending', batch_id='LEGACY-8'),
+    ])
+    s.commit()
+    s.close()
+    r = client.patch('/api/v1/inspections/status', json={'status': 'pass', 'batch_id': 'B-1'})
+    assert r.json()['ids'] == ['ins-1']
+    r = client.patch('/api/v1/inspections/status', json={'status': 'pass', 'batch_id': 'LEGACY-7'})
+    assert r.json()['ids'] == ['ins-2']
+
+
+def test_list_and_export_filters_match_the_rows_bulk_status_updates(client, sqlite_db):
+    s = _catalog(sqlite_db)
+    s.add_all([
+        Inspection(id='ins-1', status='pending', batch_id='B-1', batch_id_fk='batch-1', operator_id_fk='op-1'),
+        Inspection(id='ins-2', status='pending', batch_id='LEGACY-7', operator_id='E-LEGACY'),
+        Inspection(id='ins-3', status='pending', batch_id='LEGACY-7'),
+    ])
+    s.commit()
+    s.close()
+    listed = lambda params: {i['id'] for i in client.get('/api/v1/inspections', params=params).json()}
+    assert listed({'batch_id': 'B-1'}) == listed({'batch_id': 'batch-1'}) == {'ins-1'}
+    assert listed({'operator_id': 'E-1'}) == {'ins-1'}
+    # names no batch / operator row: the legacy text, as bulk status does
+    assert listed({'batch_id': 'LEGACY-7'}) == {'ins-2', 'ins-3'}
+    assert listed({'operator_id': 'E-LEGACY'}) == {'ins-2'}
+    exported = client.get('/api/v1/inspections/export', params={'batch_id': 'LEGACY-7'}).text.splitlines()
+    assert len(exported) == 2
+
+    r = client.patch('/api/v1/inspections/status', json={'status': 'pass', 'batch_id': 'LEGACY-7'})
+    assert sorted(r.json()['ids']) == ['ins-2', 'ins-3']
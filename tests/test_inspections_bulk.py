@@ -0,0 +1,72 @@
+from app import outbox
+from app.models.orm_models import Inspection, OutboxEvent
+
+
+def test_bad_row_is_reported_and_the_rest_are_created(client, sqlite_db):
+    items = [
+        {'batch_id': 'B-1', 'status': 'pass', 'defect_count': 2},
+        {'severity': 'x' * 33},
+        {'operator_id': 'o' * 129},
+        {'defect_count': -1},
+        {'status': 'not-a-status', 'severity': 'major'},
+    ]
+    r = client.post('/api/v1/inspections/bulk', json={'items': items})
+    assert r.status_code == 201
+    body = r.json()
+    assert (body['created'], body['failed']) == (2, 3)
+    assert [res['ok'] for res in body['results']] == [True, False, False, False, True]
+    assert body['results'][1]['error'] == 'severity must be at most 32 characters'
+    assert body['results'][2]['error'] == 'operator_id must be at most 128 characters'
+    assert body['results'][4]['inspection']['status'] == 'pending'
+
+    s = sqlite_db()
+    created = {res['id'] for res in body['results'] if res['ok']}
+    assert {i.id for i in s.query(Inspection)} == created
+    # one outbox event per created inspection, carrying its status as created
+    events = sorted((outbox.parse_event(e.item) for e in s.query(OutboxEvent)), key=lambda e: e['id'])
+    assert [e['id'] for e in events] == sorted(created)
+    assert {e['type'] for e in events} == {'inspection.created'}
+    assert sorted((e['status'], e['defect_count']) for e in events) == [('pass', 2), ('pending', 0)]
+    s.close()
+
+
+def test_too_many_items_is_rejected(client):
+    r = client.post('/api/v1/inspections/bulk', json={'items': [{}] * 501})
+    assert r.status_code == 422
+
+
+def test_bulk_status_returns_changed_rows_and_queues_their_previous_status(client, sqlite_db):
+    s = sqlite_db()
+    s.add_all([
+        Inspection(id='ins-1', status='in_review'),
+        Inspection(id='ins-2', status='pending'),
+        Inspection(id='ins-3', status='pass'),
+    ])
+    s.commit()
+    s.close()
+
+    r = client.patch('/api/v1/inspections/status', json={'status': 'pass', 'ids': ['ins-1', 'ins-2', 'ins-3']})
+    assert r.status_code == 200
+    assert sorted(r.json()['ids']) == ['ins-1', 'ins-2']  # ins-3 already passed
+
+    s = sqlite_db()
+    assert {i.id: (i.status, i.finalized_at is not None) for i in s.query(Inspection)} == {
+        'ins-1': ('pass', True), 'ins-2': ('pass', True), 'ins-3': ('pass', False),
+    }
+    events = sorted((outbox.parse_event(e.item) for e in s.query(OutboxEvent)), key=lambda e: e['id'])
+    s.close()
+    assert events == [
+        {'type': 'inspection.status_changed', 'id': 'ins-1', 'from': 'in_review', 'to': 'pass'},
+        {'type': 'inspection.status_changed', 'id': 'ins-2', 'from': 'pending', 'to': 'pass'},
+    ]
+
+
+def test_bulk_status_from_status_narrows_the_transition(client, sqlite_db):
+    s = sqlite_db()
+    s.add_all([Inspection(id='ins-1', status='in_review'), Inspection(id='ins-2', status='pending')])
+    s.commit()
+    s.close()
+    r = client.patch('/api/v1/inspections/status',
+                     json={'status': 'fail', 'ids': ['ins-1', 'ins-2'], 'from_status': 'in_review'})
+    assert r.json()['ids'] == ['ins-1']
+    assert client.patch('/api/v1/inspections/status', json={'status': 'pass'}).status_code == 422
@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.orm_models import Inspection
+
+
+@pytest.fixture
+def inspections(sqlite_db):
+    s = sqlite_db()
+    s.add_all([
+        Inspection(id=f'ins-{day}', status='fail' if day == 3 else 'pass', defect_count=day,
+                   notes='scratch, "deep"' if day == 1 else None,
+                   created_at=datetime(2026, 3, day, 9, tzinfo=timezone.utc))
+        for day in (1, 2, 3, 4)
+    ])
+    s.commit()
+    s.close()
+
+
+def test_csv_export_has_a_header_row_and_every_match(client, inspections):
+    r = client.get('/api/v1/inspections/export', params={'format': 'csv'})
+    assert r.status_code == 200
+    assert r.headers['content-type'].startswith('text/csv')
+    assert r.headers['content-disposition'] == 'attachment; filename="inspections.csv"'
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert list(rows[0]) == ['id', 'batch_id', 'operator_id', 'status', 'defect_count', 'severity',
+                             'notes', 'created_at', 'updated_at']
+    # newest first; commas and quotes survive the round trip
+    assert [row['id'] for row in rows] == ['ins-4', 'ins-3', 'ins-2', 'ins-1']
+    assert rows[-1]['notes'] == 'scratch, "deep"'
+
+
+def test_ndjson_export_bounds_include_from_and_exclude_to(client, inspections):
+    r = client.get('/api/v1/inspections/export', params={
+        'from': '2026-03-02T09:00:00Z', 'to': '2026-03-04T09:00:00Z',
+    })
+    assert r.status_code == 200
+    assert r.headers['content-type'].startswith('application/x-ndjson')
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [(row['id'], row['defect_count']) for row in rows] == [('ins-3', 3), ('ins-2', 2)]
+
+    r = client.get('/api/v1/inspections/export', params={'format': 'ndjson', 'status': 'fail'})
+    assert [json.loads(line)['id'] for line in r.text.splitlines()] == ['ins-3']
+
+
+def test_unknown_export_format_is_rejected(client, inspections):
+    assert client.get('/api/v1/inspections/export', params={'format': 'xml'}).status_code == 422
@@ -0,0 +1,39 @@
+from app.models.orm_models import DefectType, Inspection, InspectionDefect, Signature
+
+
+def test_full_inspection_has_typed_defects_and_only_active_signatures(client, sqlite_db):
+    s = sqlite_db()
+    s.add_all([
+        DefectType(id='dt-1', code='SCR', name='Scratch', severity='minor'),
+        DefectType(id='dt-2', code='CRK', name='Crack', severity='critical'),
+        Inspection(id='ins-1', status='fail', defect_count=3),
+        Inspection(id='ins-2', status='pass'),
+    ])
+    s.flush()
+    s.add_all([
+        InspectionDefect(inspection_id='ins-1', defect_type_id='dt-2', quantity=1),
+        InspectionDefect(inspection_id='ins-1', defect_type_id='dt-1', quantity=2, notes='edge'),
+        InspectionDefect(inspection_id='ins-2', defect_type_id='dt-1', quantity=5),
+        Signature(inspection_id='ins-1', signer_name='Ann', signer_role='inspector', revoked=True,
+                  revoked_by='Ann'),
+        Signature(inspection_id='ins-1', signer_name='Ann', signer_role='inspector'),
+        Signature(inspection_id='ins-1', signer_name='Bob', signer_role='supervisor'),
+    ])
+    s.commit()
+    s.close()
+
+    r = client.get('/api/v1/inspections/ins-1/full')
+    assert r.status_code == 200
+    body = r.json()
+    assert (body['inspection']['id'], body['inspection']['status']) == ('ins-1', 'fail')
+    assert [(d['defect_code'], d['defect_name'], d['severity'], d['quantity']) for d in body['defects']] == [
+        ('CRK', 'Crack', 'critical', 1), ('SCR', 'Scratch', 'minor', 2),
+    ]
+    assert body['defects'][1]['notes'] == 'edge'
+    assert [(sig['signer_name'], sig['signer_role'], sig['revoked']) for sig in body['signatures']] == [
+        ('Ann', 'inspector', False), ('Bob', 'supervisor', False),
+    ]
+
+
+def test_full_inspection_of_an_unknown_id_is_404(client, sqlite_db):
+    assert client.get('/api/v1/inspections/ins-404/full').status_code == 404
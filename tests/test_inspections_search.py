@@ -0,0 +1,36 @@
+import pytest
+
+from app.models.orm_models import Inspection
+
+
+@pytest.fixture
+def batches(sqlite_db):
+    s = sqlite_db()
+    s.add_all([
+        Inspection(id=f'ins-{n}', status='pending', batch_id=batch)
+        for n, batch in enumerate(['LOT%7', 'LOTX7', 'LOT_8', 'LOTY8', 'LOT\\9', 'LOT9', 'AB-QX'])
+    ])
+    s.commit()
+    s.close()
+
+
+def _search(client, term):
+    r = client.get('/api/v1/inspections', params={'search': term})
+    assert r.status_code == 200
+    return sorted(i['batch_id'] for i in r.json())
+
+
+@pytest.mark.parametrize('term, matches', [
+    ('%', ['LOT%7']),
+    ('_', ['LOT_8']),
+    ('\\', ['LOT\\9']),
+    ('T%7', ['LOT%7']),
+])
+def test_wildcards_in_the_term_match_literally(client, batches, term, matches):
+    assert _search(client, term) == matches
+
+
+def test_short_terms_match_anywhere_not_just_as_a_prefix(client, batches):
+    assert _search(client, 'x7') == ['LOTX7']
+    assert _search(client, 'Q') == ['AB-QX']
+    assert _search(client, 'ab') == ['AB-QX']
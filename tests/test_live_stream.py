@@ -0,0 +1,102 @@
+import asyncio
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import worker
+from app import outbox
+from app.api.v1 import stats
+from app.models.orm_models import Inspection
+
+LIVE_STATS_JS = Path(__file__).resolve().parents[1] / 'webui' / 'src' / 'liveStats.js'
+KPIS = ('total_inspections', 'pass_count', 'fail_count', 'pending_count', 'in_review_count',
+        'total_defects', 'defect_count_sum', 'avg_defects_per_ins', 'avg_defects_per_inspection')
+
+
+def test_stamp_keeps_the_event_and_adds_its_seq():
+    assert outbox.parse_event(outbox.stamp('ins-1', 7)) == {'type': 'inspection.created', 'id': 'ins-1', 'seq': 7}
+    stamped = outbox.stamp(outbox.event('inspection.defects_changed', id='ins-1', delta=2), 8)
+    assert outbox.parse_event(stamped) == {'type': 'inspection.defects_changed', 'id': 'ins-1', 'delta': 2, 'seq': 8}
+
+
+def test_snapshot_is_fresh_and_versioned_by_the_newest_event(sqlite_db):
+    s = sqlite_db()
+    s.add(Inspection(id='ins-1', status='pass'))
+    outbox.enqueue(s, ['ins-1', 'ins-2'])
+    s.commit()
+    s.close()
+
+    frame = asyncio.run(stats._snapshot_event())
+    assert frame.startswith('event: snapshot\n')
+    snapshot = json.loads(frame.split('data: ', 1)[1])
+    assert snapshot['version'] == 2
+    assert snapshot['total_inspections'] == 1
+
+
+def _run_live_stats(body, payload):
+    """Evaluate `body` (a JS expression over `payload` and the exports of
+    webui/src/liveStats.js) under node and return its JSON result."""
+    script = (
+        "const fs = await import('node:fs');"
+        "const src = fs.readFileSync(process.argv[1], 'utf8');"
+        "const live = await import('data:text/javascript,' + encodeURIComponent(src));"
+        "const payload = JSON.parse(fs.readFileSync(0, 'utf8'));"
+        f"process.stdout.write(JSON.stringify({body}));"
+    )
+    out = subprocess.run(
+        ['node', '--input-type=module', '-e', script, str(LIVE_STATS_JS)],
+        input=json.dumps(payload), capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout)
+
+
+needs_node = pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+
+
+@needs_node
+def test_snapshot_plus_deltas_matches_a_fresh_snapshot(client, sqlite_db, fake_redis):
+    s = sqlite_db()
+    s.add_all([Inspection(id='ins-1', status='pass', defect_count=0),
+               Inspection(id='ins-2', status='fail', defect_count=4),
+               Inspection(id='ins-3', status='pending', defect_count=1)])
+    s.commit()
+    s.close()
+    dt = client.post('/api/v1/defects/types', json={'name': 'Scratch', 'code': 'SCR'}).json()['id']
+    attached = client.post('/api/v1/defects/inspection/ins-1', json={'defect_type_id': dt, 'quantity': 2}).json()
+    worker.relay_outbox(fake_redis)
+    fake_redis.lpop(worker.QUEUE_KEY, 100)
+    before = asyncio.run(stats.compute_stats(stats.StatsScope(committed=True)))
+
+    # the new inspection changes again before the worker sees its created event
+    new = client.post('/api/v1/inspections', json={'status': 'pending', 'defect_count': 2}).json()['id']
+    client.post(f'/api/v1/defects/inspection/{new}', json={'defect_type_id': dt, 'quantity': 3})
+    client.patch(f'/api/v1/inspections/{new}/status', json={'status': 'fail'})
+    client.patch('/api/v1/inspections/ins-3/status', json={'status': 'in_review'})
+    client.delete(f"/api/v1/defects/inspection/ins-1/{attached['id']}")
+    client.delete('/api/v1/inspections/ins-2')
+
+    worker.relay_outbox(fake_redis)
+    worker.process_items(fake_redis, fake_redis.lpop(worker.QUEUE_KEY, 100))
+    deltas = [json.loads(message) for _, message in fake_redis.published]
+    after = asyncio.run(stats.compute_stats(stats.StatsScope(committed=True)))
+
+    applied = _run_live_stats('payload.deltas.reduce(live.applyDelta, payload.snapshot)',
+                              {'snapshot': {k: before[k] for k in KPIS}, 'deltas': deltas})
+    assert {k: applied[k] for k in KPIS} == {k: after[k] for k in KPIS}
+
+
+@needs_node
+def test_a_lower_seq_committed_after_the_snapshot_is_still_applied():
+    # transaction 102 took seq 5 but was still open when the snapshot (which
+    # saw seq 12 from transaction 101) was read
+    snapshot = {'version': 12, 'xact': {'xmin': 100, 'xmax': 104, 'xip': [102]}}
+    deltas = [{'seq': 5, 'txid': 102}, {'seq': 12, 'txid': 101}, {'seq': 3, 'txid': 99}, {'seq': 13, 'txid': 104}]
+    reflected = _run_live_stats('payload.deltas.map(d => live.isReflected(payload.snapshot, d))',
+                                {'snapshot': snapshot, 'deltas': deltas})
+    assert reflected == [False, True, True, False]
+    # without transaction ids (SQLite) the version decides
+    assert _run_live_stats('payload.deltas.map(d => live.isReflected(payload.snapshot, d))',
+                           {'snapshot': {'version': 12, 'xact': None}, 'deltas': deltas}) == [True, True, True, False]
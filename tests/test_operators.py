@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+
+from app import scorecards
+from app.models.orm_models import Inspection, Operator
+
+
+def _seed(sqlite_db):
+    s = sqlite_db()
+    s.add_all([Operator(id='op-1', name='Ann', employee_id='E-1', active=True),
+               Operator(id='op-2', name='Bob', employee_id='E-2', active=True)])
+    at = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    s.add_all([
+        Inspection(id='ins-1', status='pass', operator_id_fk='op-1', created_at=at),
+        Inspection(id='ins-2', status='fail', operator_id_fk='op-1', created_at=at),
+        Inspection(id='ins-3', status='pass', operator_id_fk='op-1', created_at=datetime(2026, 3, 2, tzinfo=timezone.utc)),
+    ])
+    s.commit()
+    s.close()
+
+
+def test_list_counts_each_operators_inspections(client, sqlite_db):
+    _seed(sqlite_db)
+    ops = {o['id']: (o['inspection_count'], o['pass_rate']) for o in client.get('/api/v1/operators/').json()}
+    assert ops['op-1'][0] == 3
+    assert round(ops['op-1'][1]) == 67
+    assert ops['op-2'] == (0, None)
+
+
+def test_window_bounds_are_compared_in_utc(client, sqlite_db):
+    _seed(sqlite_db)
+    # 10:00+02:00 is 08:00Z, before the two 09:00Z inspections
+    params = {'from': '2026-03-01T10:00:00+02:00', 'to': '2026-03-01T10:00:00'}
+    op = client.get('/api/v1/operators/op-1', params=params).json()
+    assert op['inspection_count'] == 2
+    assert client.get('/api/v1/operators/op-404').status_code == 404
+
+
+def test_scorecards_aggregate_each_window_and_rank_the_leaderboard(client, sqlite_db):
+    s = sqlite_db()
+    s.add_all([Operator(id='op-1', name='Ann', employee_id='E-1', active=True),
+               Operator(id='op-2', name='Bob', employee_id='E-2', active=True)])
+    midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    two_days_ago = midnight - timedelta(days=2)
+    s.add_all([
+        # two in one 00-08 shift, one in the 08-16 shift
+        Inspection(id='ins-1', status='pass', operator_id_fk='op-1', created_at=two_days_ago + timedelta(hours=1),
+                   finalized_at=two_days_ago + timedelta(hours=2)),
+        Inspection(id='ins-2', status='pass', operator_id_fk='op-1', created_at=two_days_ago + timedelta(hours=2),
+                   finalized_at=two_days_ago + timedelta(hours=5)),
+        Inspection(id='ins-3', status='fail', defect_count=3, operator_id_fk='op-1',
+                   created_at=two_days_ago + timedelta(hours=10), finalized_at=two_days_ago + timedelta(hours=12)),
+        Inspection(id='ins-4', status='pending', operator_id_fk='op-1', created_at=midnight - timedelta(days=40)),
+        Inspection(id='ins-5', status='pass', operator_id_fk='op-2', created_at=midnight - timedelta(days=1)),
+    ])
+    s.commit()
+    scorecards.refresh(s)
+    s.close()
+
+    cards = {c['window_days']: c for c in client.get('/api/v1/operators/op-1/scorecard').json()}
+    assert sorted(cards) == [7, 30, 90]
+    week = cards[7]
+    assert (week['inspections'], week['shifts'], week['inspections_per_shift']) == (3, 2, 1.5)
+    assert (week['pass_rate'], week['defect_density'], week['mean_hours_to_final']) == (66.67, 1.0, 2.0)
+    assert cards[90]['inspections'] == 4
+
+    board = client.get('/api/v1/operators/leaderboard', params={'window': 7}).json()
+    assert [c['operator_id'] for c in board] == ['op-2', 'op-1']
+    board = client.get('/api/v1/operators/leaderboard', params={'window': 7, 'metric': 'defect_density'}).json()
+    assert [c['operator_id'] for c in board] == ['op-2', 'op-1']
+    assert client.get('/api/v1/operators/leaderboard', params={'window': 14}).status_code == 422
+
+    # a targeted refresh replaces only that operator's rows
+    s = sqlite_db()
+    s.get(Inspection, 'ins-5').status = 'fail'
+    s.commit()
+    scorecards.refresh(s, ['op-2'])
+    s.close()
+    assert client.get('/api/v1/operators/op-2/scorecard', params={'window': 7}).json()[0]['pass_rate'] == 0.0
+    assert client.get('/api/v1/operators/op-1/scorecard', params={'window': 7}).json()[0]['inspections'] == 3
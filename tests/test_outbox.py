@@ -0,0 +1,60 @@
+import pytest
+
+from app import outbox
+from app.models.orm_models import OutboxEvent
+
+
+def _pending(Session):
+    s = Session()
+    try:
+        return [e.item for e in s.query(OutboxEvent).order_by(OutboxEvent.id)]
+    finally:
+        s.close()
+
+
+def test_relay_pushes_in_order_per_queue_and_deletes(sqlite_db, fake_redis):
+    s = sqlite_db()
+    outbox.enqueue(s, ['ins-1', outbox.event('inspection.deleted', id='ins-2')])
+    outbox.enqueue(s, ['other-1'], queue='other:queue')
+    outbox.enqueue(s, ['ins-3'])
+    s.commit()
+
+    assert outbox.relay_batch(s, fake_redis, batch_size=3) == 3
+    assert [outbox.parse_event(i) for i in fake_redis.lists['worker:queue']] == [
+        {'type': 'inspection.created', 'id': 'ins-1', 'seq': 1},
+        {'type': 'inspection.deleted', 'id': 'ins-2', 'seq': 2},
+    ]
+    assert [outbox.parse_event(i)['seq'] for i in fake_redis.lists['other:queue']] == [3]
+    assert _pending(sqlite_db) == ['ins-3']
+
+    assert outbox.relay_batch(s, fake_redis) == 1
+    assert outbox.relay_batch(s, fake_redis) == 0
+    assert fake_redis.zsets[outbox.RELAYED_KEY] == {'id': 4}
+    s.close()
+
+
+def test_failed_push_keeps_the_rows_for_the_next_pass(sqlite_db, fake_redis, monkeypatch):
+    s = sqlite_db()
+    outbox.enqueue(s, ['ins-1'])
+    s.commit()
+
+    def down(*args, **kwargs):
+        raise ConnectionError('redis down')
+    monkeypatch.setattr(fake_redis, 'rpush', down)
+    with pytest.raises(ConnectionError):
+        outbox.relay_batch(s, fake_redis)
+    assert _pending(sqlite_db) == ['ins-1']
+    s.close()
+
+
+def test_relay_stamps_the_writing_transaction(sqlite_db, fake_redis):
+    s = sqlite_db()
+    # enqueue fills txid on PostgreSQL only
+    s.add_all([OutboxEvent(item='ins-1', txid=731), OutboxEvent(item='ins-2')])
+    s.commit()
+    outbox.relay_batch(s, fake_redis)
+    assert [outbox.parse_event(i) for i in fake_redis.lists['worker:queue']] == [
+        {'type': 'inspection.created', 'id': 'ins-1', 'seq': 1, 'txid': 731},
+        {'type': 'inspection.created', 'id': 'ins-2', 'seq': 2},
+    ]
+    s.close()
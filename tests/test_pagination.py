@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db import Base
+from app.pagination import encode_cursor, decode_cursor, parse_cursor_datetime
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    cursor = encode_cursor(ts, 'ins-abc')
+    created_at, ins_id = decode_cursor(cursor, 2)
+    assert parse_cursor_datetime(created_at) == ts
+    assert ins_id == 'ins-abc'
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor('not-a-cursor', 2)
+    assert exc.value.status_code == 400
+
+
+def test_inspection_keyset_pages_are_disjoint(monkeypatch, tmp_path):
+    from app.main import app
+    from app.api.v1 import inspections
+    from app.models.orm_models import Inspection
+
+    db_file = tmp_path / 'pages.db'
+    engine = create_engine(f'sqlite:///{db_file}')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    base = datetime(2026, 1, 1)
+    s = Session()
+    # identical timestamps in pairs exercise the id tiebreak
+    s.add_all([
+        Inspection(id=f"ins-{i:03d}", status='pending', created_at=base + timedelta(minutes=i // 2))
+        for i in range(7)
+    ])
+    s.commit()
+    s.close()
+    async_engine = create_async_engine(f'sqlite+aiosqlite:///{db_file}', poolclass=NullPool)
+    monkeypatch.setattr(inspections, 'get_async_session', async_sessionmaker(async_engine))
+
+    client = TestClient(app)
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+        r = client.get('/api/v1/inspections/', params=params)
+        assert r.status_code == 200
+        seen += [row['id'] for row in r.json()]
+        cursor = r.headers.get('x-next-cursor')
+        if not cursor:
+            break
+    assert seen == [f"ins-{i:03d}" for i in reversed(range(7))]
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.orm_models import Batch, Product
+
+
+def _walk(client, url, limit, **params):
+    ids, cursor = [], None
+    while True:
+        r = client.get(url, params={'limit': limit, **params, **({'cursor': cursor} if cursor else {})})
+        assert r.status_code == 200
+        ids += [row['id'] for row in r.json()]
+        cursor = r.headers.get('X-Next-Cursor')
+        if not cursor:
+            return ids
+
+
+def _seed(sqlite_db):
+    s = sqlite_db()
+    # duplicate names and timestamps exercise the id tiebreak
+    s.add_all([Product(id=f'prod-{i}', sku=f'S-{i}', name=f'Widget {i // 2}', category='parts' if i % 2 else 'tools')
+               for i in range(7)])
+    at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    s.add_all([Batch(id=f'batch-{i}', batch_number=f'B-{i}', product_id=f'prod-{i % 2}',
+                     created_at=at + timedelta(minutes=i // 2)) for i in range(7)])
+    s.commit()
+    s.close()
+
+
+def test_product_pages_are_disjoint_and_match_the_stream(client, sqlite_db):
+    _seed(sqlite_db)
+    streamed = client.get('/api/v1/products')
+    assert streamed.headers['content-type'] == 'application/json'
+    in_order = [p['id'] for p in streamed.json()]
+    assert in_order == ['prod-0', 'prod-1', 'prod-2', 'prod-3', 'prod-4', 'prod-5', 'prod-6']
+    assert _walk(client, '/api/v1/products', 2) == in_order
+    assert _walk(client, '/api/v1/products', 2, category='parts') == ['prod-1', 'prod-3', 'prod-5']
+
+
+def test_batch_pages_run_newest_first_with_product_names(client, sqlite_db):
+    _seed(sqlite_db)
+    streamed = client.get('/api/v1/batches').json()
+    assert [b['id'] for b in streamed] == [f'batch-{i}' for i in (6, 5, 4, 3, 2, 1, 0)]
+    assert streamed[0]['product_name'] == 'Widget 0'
+    assert _walk(client, '/api/v1/batches', 3) == [b['id'] for b in streamed]
+    assert _walk(client, '/api/v1/batches', 3, product_id='prod-1') == ['batch-5', 'batch-3', 'batch-1']
+    assert client.get('/api/v1/batches', params={'cursor': 'garbage'}).status_code == 400
@@ -0,0 +1,29 @@
+def _inspection(client):
+    return client.post('/api/v1/inspections/', json={'status': 'pending'}).json()['id']
+
+
+def test_second_active_signature_for_a_role_conflicts(client):
+    url = f'/api/v1/inspections/{_inspection(client)}/signatures'
+    first = client.post(url, json={'signer_name': 'Ann', 'signer_role': 'inspector'})
+    assert first.status_code == 201
+    assert first.json()['signer_role'] == 'inspector'
+
+    assert client.post(url, json={'signer_name': 'Bob', 'signer_role': 'inspector'}).status_code == 409
+    assert client.post(url, json={'signer_name': 'Bob', 'signer_role': 'reviewer'}).status_code == 201
+
+    # revoking frees the role again
+    assert client.delete(f"{url}/{first.json()['id']}").status_code == 200
+    assert client.post(url, json={'signer_name': 'Cy', 'signer_role': 'inspector'}).status_code == 201
+    assert len(client.get(url).json()) == 3
+
+
+def test_unknown_inspection_is_404(client):
+    r = client.post('/api/v1/inspections/missing/signatures', json={'signer_name': 'Ann', 'signer_role': 'lead'})
+    assert r.status_code == 404
+
+
+def test_unknown_signer_is_not_reported_as_a_conflict(client):
+    url = f'/api/v1/inspections/{_inspection(client)}/signatures'
+    r = client.post(url, json={'signer_name': 'Ann', 'signer_role': 'lead', 'signer_id': 'op-missing'})
+    assert r.status_code == 422
+    assert client.get(url).json() == []
@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+
+from app import rollup
+from app.models.orm_models import Batch, Inspection, Product, RollupState, WorkerAudit
+
+
+def _seed(sqlite_db):
+    s = sqlite_db()
+    s.add_all([Product(id='prod-1', name='Widget', sku='W-1'), Product(id='prod-2', name='Gadget', sku='G-1')])
+    s.add_all([Batch(id='batch-1', batch_number='B-1', product_id='prod-1'),
+               Batch(id='batch-2', batch_number='B-2', product_id='prod-1'),
+               Batch(id='batch-3', batch_number='B-3', product_id='prod-2')])
+    day1, day2 = datetime(2026, 3, 1, 9, tzinfo=timezone.utc), datetime(2026, 3, 2, 9, tzinfo=timezone.utc)
+    s.add_all([
+        Inspection(id='ins-1', status='pass', defect_count=0, batch_id_fk='batch-1', created_at=day1),
+        Inspection(id='ins-2', status='fail', defect_count=4, batch_id_fk='batch-2', created_at=day1),
+        Inspection(id='ins-3', status='pass', defect_count=0, batch_id_fk='batch-1', created_at=day2),
+        Inspection(id='ins-4', status='pending', defect_count=2, batch_id_fk='batch-3', created_at=day2),
+    ])
+    s.commit()
+    rollup.rebuild(s)
+    s.close()
+
+
+def _counts(stats):
+    return stats['total_inspections'], stats['pass_count'], stats['fail_count'], stats['pending_count']
+
+
+def test_stats_are_scoped_by_product_batch_and_window(client, sqlite_db):
+    _seed(sqlite_db)
+    get = lambda **params: client.get('/api/v1/stats/', params=params).json()
+
+    assert _counts(get()) == (4, 2, 1, 1)
+    # day-aligned scopes are served from the rollup, the rest from inspections
+    assert _counts(get(product_id='prod-1')) == (3, 2, 1, 0)
+    assert _counts(get(product_id='prod-1', **{'from': '2026-03-02'})) == (1, 1, 0, 0)
+    assert _counts(get(batch_id='batch-1')) == (2, 2, 0, 0)
+    assert _counts(get(**{'from': '2026-03-01T12:00:00Z'})) == (2, 1, 0, 1)
+    assert [d['day'] for d in get(product_id='prod-1')['trend']] == ['2026-03-01', '2026-03-02']
+
+
+def test_stats_read_inspections_until_the_rollup_is_populated(client, sqlite_db):
+    _seed(sqlite_db)
+    s = sqlite_db()
+    s.query(RollupState).delete()
+    # a fresh deploy: the worker has refreshed one bucket, nothing else
+    rollup._replace(s, datetime(2026, 3, 2).date(), datetime(2026, 3, 3).date())
+    s.commit()
+    get = lambda **params: client.get('/api/v1/stats/', params=params).json()
+    assert _counts(get()) == (4, 2, 1, 1)
+    assert [d['day'] for d in get()['trend']] == ['2026-03-01', '2026-03-02']
+
+    assert not rollup.is_populated(s)
+    rollup.rebuild(s)
+    assert rollup.is_populated(s)
+    # from now on the rollup answers: a row it has not seen is not counted
+    s.add(Inspection(id='ins-5', status='pass', created_at=datetime(2026, 3, 2, 10, tzinfo=timezone.utc)))
+    s.commit()
+    s.close()
+    assert _counts(get(**{'from': '2026-03-01'})) == (4, 2, 1, 1)
+
+
+def test_inverted_window_is_rejected(client, sqlite_db):
+    r = client.get('/api/v1/stats/', params={'from': '2026-03-02', 'to': '2026-03-01'})
+    assert r.status_code == 422
+
+
+def test_audit_log_pages_newest_first_without_gaps(client, sqlite_db):
+    s = sqlite_db()
+    at = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    # equal timestamps in pairs exercise the id tiebreak
+    s.add_all([
+        WorkerAudit(id=i, event_type='inspection.created' if i % 3 else 'inspection.deleted',
+                    worker_id='w1', status='processed', created_at=at.replace(minute=i // 2))
+        for i in range(1, 8)
+    ])
+    s.commit()
+    s.close()
+
+    seen, cursor = [], None
+    while True:
+        r = client.get('/api/v1/stats/audit-log', params={'limit': 3, **({'cursor': cursor} if cursor else {})})
+        seen += [row['id'] for row in r.json()]
+        cursor = r.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+    deleted = client.get('/api/v1/stats/audit-log', params={'event_type': 'inspection.deleted'}).json()
+    assert [row['id'] for row in deleted] == [6, 3]
+    assert client.get('/api/v1/stats/audit-log', params={'cursor': 'garbage'}).status_code == 400
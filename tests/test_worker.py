@@ -0,0 +1,80 @@
+import json
+from datetime import date, datetime, timezone
+
+import pytest
+
+import worker
+from app import outbox
+from app.models.orm_models import Batch, DailyInspectionRollup, Inspection, Product, WorkerAudit
+
+
+@pytest.fixture
+def inspections(sqlite_db):
+    s = sqlite_db()
+    s.add(Product(id='prod-1', name='Widget', sku='W-1'))
+    s.add(Batch(id='batch-1', batch_number='B-1', product_id='prod-1'))
+    created = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    s.add_all([
+        Inspection(id='ins-1', status='pass', defect_count=1, batch_id_fk='batch-1', created_at=created),
+        Inspection(id='ins-2', status='fail', defect_count=3, batch_id_fk='batch-1', created_at=created),
+    ])
+    s.commit()
+    s.close()
+    return sqlite_db
+
+
+def _rollup(Session):
+    s = Session()
+    try:
+        return sorted((r.day, r.status, r.product_id, r.inspection_count, r.defect_sum)
+                      for r in s.query(DailyInspectionRollup))
+    finally:
+        s.close()
+
+
+def test_batch_recomputes_the_rollup_and_is_audited(inspections, fake_redis):
+    items = [outbox.stamp('ins-1', 1), outbox.stamp('ins-2', 2)]
+    worker.process_items(fake_redis, items)
+    # a replayed batch recomputes rather than double counts
+    worker.process_items(fake_redis, items)
+
+    assert _rollup(inspections) == [
+        (date(2026, 3, 1), 'fail', 'prod-1', 1, 3),
+        (date(2026, 3, 1), 'pass', 'prod-1', 1, 1),
+    ]
+    s = inspections()
+    assert s.query(WorkerAudit).count() == 4
+    s.close()
+    seqs = [json.loads(message)['seq'] for _, message in fake_redis.published]
+    assert seqs == [1, 2, 1, 2]
+
+
+def test_failed_batch_is_requeued_not_lost(inspections, fake_redis, monkeypatch):
+    def broken(session, operator_ids=None):
+        raise RuntimeError('database went away')
+    monkeypatch.setattr(worker.scorecards, 'refresh', broken)
+    monkeypatch.setattr(worker, 'WORKER_MAX_ATTEMPTS', 2)
+
+    with pytest.raises(RuntimeError):
+        worker.process_items(fake_redis, ['ins-1'])
+    requeued = fake_redis.lpop(worker.QUEUE_KEY, 10)
+    assert [outbox.parse_event(i) for i in requeued] == [{'type': 'inspection.created', 'id': 'ins-1', 'attempts': 1}]
+    s = inspections()
+    assert s.query(WorkerAudit).count() == 0
+    s.close()
+    assert fake_redis.published == []
+
+    with pytest.raises(RuntimeError):
+        worker.process_items(fake_redis, requeued)
+    assert fake_redis.lpop(worker.QUEUE_KEY, 10) is None
+    assert len(fake_redis.lists[worker.DEAD_LETTER_KEY]) == 1
+
+
+def test_first_start_builds_the_rollup_once(inspections, monkeypatch):
+    worker.ensure_rollup()
+    assert [row[3] for row in _rollup(inspections)] == [1, 1]
+
+    def again(*args, **kwargs):
+        raise AssertionError('rebuilt an already populated rollup')
+    monkeypatch.setattr(worker.rollup, 'rebuild', again)
+    worker.ensure_rollup()
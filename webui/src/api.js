@@ -4,7 +4,7 @@ function getToken() {
   return localStorage.getItem('qms_token');
 }
 
-async function req(method, path, body) {
+async function send(method, path, body) {
   const token = getToken();
   const res = await fetch(`${BASE}${path}`, {
     method,
@@ -18,6 +18,11 @@ async function req(method, path, body) {
     const err = await res.json().catch(() => ({ detail: res.statusText }));
     throw new Error(err.detail || res.statusText);
   }
+  return res;
+}
+
+async function req(method, path, body) {
+  const res = await send(method, path, body);
   if (res.status === 204) return null;
   return res.json();
 }
@@ -45,13 +50,16 @@ export const login = (username, password) => req('POST', '/auth/login', { userna
 export const register = (data) => req('POST', '/auth/register', data);
 export const getStats = () => req('GET', '/stats/');
 
-export const listInspections = (params = {}) => {
+export const listInspections = async (params = {}) => {
   const q = new URLSearchParams();
   if (params.status) q.set('status', params.status);
   if (params.search) q.set('search', params.search);
   if (params.limit) q.set('limit', String(params.limit || 50));
   if (params.offset) q.set('offset', String(params.offset || 0));
-  return req('GET', `/inspections/?${q}`);
+  if (params.cursor) q.set('cursor', params.cursor);
+  const res = await send('GET', `/inspections/?${q}`);
+  // pass nextCursor back as params.cursor for the next page; null on the last
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
 };
 export const createInspection = (data) => req('POST', '/inspections/', data);
 export const getInspection = (id) => req('GET', `/inspections/${id}`);
@@ -0,0 +1,48 @@
+// Applies the live feed's deltas (app/live.py) to a /stats/stream snapshot.
+// Every KPI is moved by exactly what the server's aggregates would move by,
+// so snapshot + deltas equals a fresh snapshot:
+//   total_defects        SUM(inspection_defects.quantity): defects_changed deltas
+//   defect_count_sum     SUM(inspections.defect_count): the average's numerator
+//   avg_defects_per_ins  defect_count_sum / total_inspections
+// Created events carry the inspection's status and defect_count at creation,
+// so later changes arrive as their own deltas and are not counted twice.
+
+const STATUS_KEYS = { pass: 'pass_count', fail: 'fail_count', pending: 'pending_count', in_review: 'in_review_count' }
+
+function bump(s, status, by) {
+  const key = STATUS_KEYS[status]
+  return key ? { ...s, [key]: (s[key] ?? 0) + by } : s
+}
+
+export function applyDelta(s, d) {
+  let next = s
+  const count = d.defect_count ?? 0
+  if (d.type === 'inspection.created') {
+    next = bump({ ...s, total_inspections: (s.total_inspections ?? 0) + 1,
+                  defect_count_sum: (s.defect_count_sum ?? 0) + count }, d.status, 1)
+  } else if (d.type === 'inspection.status_changed') {
+    next = bump(bump(s, d.from, -1), d.to, 1)
+  } else if (d.type === 'inspection.defects_changed') {
+    next = { ...s, total_defects: (s.total_defects ?? 0) + (d.delta ?? 0),
+             defect_count_sum: (s.defect_count_sum ?? 0) + (d.delta ?? 0) }
+  } else if (d.type === 'inspection.deleted') {
+    next = bump({ ...s, total_inspections: (s.total_inspections ?? 0) - 1,
+                  defect_count_sum: (s.defect_count_sum ?? 0) - count }, d.status, -1)
+  } else {
+    return s
+  }
+  const avg = next.total_inspections ? Math.round(next.defect_count_sum / next.total_inspections * 100) / 100 : 0
+  return { ...next, avg_defects_per_ins: avg, avg_defects_per_inspection: avg }
+}
+
+// Whether a snapshot already includes a delta's change. Outbox ids are taken
+// at insert, not commit, so a lower seq can commit after the snapshot's
+// version: on PostgreSQL the snapshot's `xact` decides by transaction
+// visibility, elsewhere (SQLite, one writer at a time) the version does.
+export function isReflected(snapshot, d) {
+  const xact = snapshot.xact
+  if (xact && d.txid != null) {
+    return d.txid < xact.xmin || (d.txid < xact.xmax && !xact.xip.includes(d.txid))
+  }
+  return d.seq <= (snapshot.version ?? 0)
+}
@@ -1,5 +1,6 @@
 import { useEffect, useState } from 'react'
 import { api } from '../api'
+import { applyDelta, isReflected } from '../liveStats'
 
 const KPI_DEFS = [
   { key: 'total_inspections',   label: 'Total Inspections', icon: '🔍', accent: '#6366f1' },
@@ -12,6 +13,20 @@ const KPI_DEFS = [
   { key: 'avg_defects_per_ins', label: 'Avg Defects/Insp',  icon: '📊', accent: '#ec4899' },
 ]
 
+// applied delta seqs remembered to skip at-least-once redeliveries
+const SEEN_LIMIT = 2048
+
+function applyRecent(recent, d) {
+  if (d.type === 'inspection.created') return [d, ...recent].slice(0, 6)
+  if (d.type === 'inspection.deleted') return recent.filter(ins => ins.id !== d.id)
+  return recent.map(ins => {
+    if (ins.id !== d.id) return ins
+    if (d.type === 'inspection.status_changed') return { ...ins, status: d.to }
+    if (d.type === 'inspection.defects_changed') return { ...ins, defect_count: (ins.defect_count ?? 0) + (d.delta ?? 0) }
+    return ins
+  })
+}
+
 export default function Dashboard() {
   const [stats, setStats] = useState(null)
   const [recent, setRecent] = useState([])
@@ -22,10 +37,33 @@ export default function Dashboard() {
       api('/stats/summary').catch(() => ({})),
       api('/inspections?limit=6').catch(() => [])
     ]).then(([s, r]) => {
-      setStats(s)
+      setStats(cur => cur ?? s)  // the stream's snapshot is fresher
       setRecent(Array.isArray(r) ? r : [])
       setLoading(false)
     })
+
+    // live deltas instead of polling; each snapshot already includes some
+    // deltas (see isReflected)
+    let snapshot = { version: 0, xact: null }
+    const seen = new Set()
+    const es = new EventSource('/api/v1/stats/stream')
+    es.addEventListener('snapshot', e => {
+      const s = JSON.parse(e.data)
+      snapshot = { version: s.version ?? 0, xact: s.xact ?? null }
+      seen.clear()
+      setStats(s)
+    })
+    es.onmessage = e => {
+      const d = JSON.parse(e.data)
+      if (d.seq != null) {
+        if (isReflected(snapshot, d) || seen.has(d.seq)) return
+        seen.add(d.seq)
+        if (seen.size > SEEN_LIMIT) seen.delete(seen.values().next().value)
+      }
+      setStats(s => s && applyDelta(s, d))
+      setRecent(r => applyRecent(r, d))
+    }
+    return () => es.close()
   }, [])
 
   if (loading) return (